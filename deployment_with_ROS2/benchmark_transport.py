@@ -0,0 +1,114 @@
+# Transport benchmark: KittiPublisher -> TrackerNode over the image topic vs composed (direct hand-off)
+# This piece of code does the following:
+# Runs the full deployment (both nodes, executor, tracker worker, diagnostics) once per transport on one sequence:
+# 1) 'topic': two nodes in one process, frames as sensor_msgs/Image on /camera/image_raw (cv2_to_imgmsg + imgmsg_to_cv2)
+# 2) 'composed': the publisher hands the decoded array to TrackerNode.push_frame() (see composed_pipeline.py)
+# The publisher replays the sequence once at target_fps ('max' = as fast as possible, the transport's ceiling) and the tracker
+# keeps every frame (lossless queue), so both transports process the same frames. Reports frames/sec processed, decode stage
+# and end-to-end latency (publish stamp -> tracks) percentiles. Above the tracker's capacity the latency includes queueing.
+# Frames can still be lost in transport: the image subscription keeps 10 messages (KEEP_LAST), like the deployed node.
+# Uses ROS 2 when installed, the local stand-in bus (local_bus.py) otherwise, and saves the results as JSON.
+
+# Note:
+# By default detection is a stub replaying input/detection_file/filtered_0000.txt in call order (the tracker still gets a
+# realistic workload, stub_detect_ms emulates the model's latency). use_yolo = True runs the configured detector instead.
+
+import os
+import json
+import time
+import platform
+import threading
+import numpy as np
+try:
+    import rclpy
+    from rclpy.executors import SingleThreadedExecutor
+except ImportError:                                                                                             # No ROS 2: in-process stand-in bus (local_bus.py)
+    import local_bus as rclpy
+    from local_bus import SingleThreadedExecutor
+from kitti_publisher import KittiPublisher
+from tracker_node import TrackerNode
+from bytetrack_tracker import load_detections                                                                   # scripts/ is on sys.path via the nodes
+from frame_queue import FrameQueue
+
+# Config
+img_dir = '/home/monisha/ros2_ws/src/mot_tracker/kitti_tracking/data_tracking_image_2/training/image_02/0000'
+det_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'input', 'detection_file', 'filtered_0000.txt')
+use_yolo = False                                                                                                # True = TrackerNode's configured detector
+stub_detect_ms = 0.0                                                                                            # Emulated detector latency per call
+transports = ['topic', 'composed']
+replay_mode = 'fixed'                                                                                           # 'fixed' (target_fps) or 'max'
+target_fps = 30.0
+preload = True                                                                                                  # Decode frames up front, so disk reads don't skew the runs
+idle_s = 2.0                                                                                                    # Stop waiting when no frame finished for this long
+output_json = 'transport_results.json'
+
+class ReplayDetector:
+    # Stub with the detector interface: one frame's saved detections per predicted frame, in call order
+    def __init__(self, det_file, delay_s=0.0):
+        frames = load_detections(det_file)
+        self.dets = [np.array(frames.get(i, []), dtype=np.float32).reshape(-1, 6) for i in range(max(frames) + 1)]
+        self.delay_s = delay_s
+        self.calls = 0
+
+    def predict(self, frames, conf):
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        out = []
+        for _ in frames:
+            out.append(self.dets[self.calls % len(self.dets)])
+            self.calls += 1
+        return out
+
+def run_transport(transport):
+    detector = None if use_yolo else ReplayDetector(det_file, stub_detect_ms / 1000.0)
+    tracker = TrackerNode(detector=detector, direct_input=transport == 'composed')
+    stream = tracker.streams[0]
+    stream.frame_queue = FrameQueue(100000, 'drop_newest')                                                      # Lossless, before any frame arrives
+    publisher = KittiPublisher(frame_sink=tracker.push_frame if transport == 'composed' else None, img_dir=img_dir,
+                               replay_mode=replay_mode, target_fps=target_fps, loop=False, preload=preload)
+    executor = SingleThreadedExecutor()
+    executor.add_node(tracker)
+    executor.add_node(publisher)
+    spinner = threading.Thread(target=executor.spin, daemon=True)
+    start = time.perf_counter()
+    spinner.start()
+    publisher.sender.join()                                                                                     # Last frame published
+    count, last_s = -1, time.perf_counter()
+    while count < len(publisher.img_files) and time.perf_counter() - last_s < idle_s:                          # Until all done or idle
+        if tracker.metrics.counters.get('frames', 0) != count:
+            count, last_s = tracker.metrics.counters.get('frames', 0), time.perf_counter()
+        time.sleep(0.005)
+    wall_s = last_s - start                                                                                     # Until the last processed frame
+    executor.shutdown()
+    publisher.stop()
+    tracker.stop()
+    snap = tracker.metrics.snapshot()
+    processed = snap['counters'].get('frames', 0)
+    result = {'published': len(publisher.img_files), 'received': stream.frame_idx, 'processed': processed,
+              'lost': len(publisher.img_files) - processed, 'fps': processed / wall_s}
+    for stage in ('decode', 'end_to_end'):
+        s = snap['stages'].get(stage)
+        if s and s['count']:
+            result.update({f'{stage}_p50_ms': s['p50_ms'], f'{stage}_p95_ms': s['p95_ms']})
+    publisher.destroy_node()
+    tracker.destroy_node()
+    return result
+
+if __name__ == '__main__':
+    rclpy.init()
+    results = {'meta': {'python': platform.python_version(), 'cpu_count': os.cpu_count(), 'platform': platform.platform(),
+                        'bus': rclpy.__name__, 'detector': 'yolo' if use_yolo else f'replay ({stub_detect_ms} ms)',
+                        'replay': 'max' if replay_mode == 'max' else f'{target_fps} FPS',
+                        'time': time.strftime('%Y-%m-%d %H:%M:%S')},
+               'transports': {}}
+    for transport in transports:
+        results['transports'][transport] = run_transport(transport)
+    rclpy.shutdown()
+
+    keys = ['fps', 'processed', 'lost', 'decode_p50_ms', 'end_to_end_p50_ms', 'end_to_end_p95_ms']
+    print(f"\n{'transport':<10}" + ''.join(f'{key:>20}' for key in keys))
+    for transport, r in results['transports'].items():
+        print(f'{transport:<10}' + ''.join(f'{r.get(key, float("nan")):>20.1f}' for key in keys))
+    with open(output_json, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'\nSaved transport results to: {output_json}')
@@ -0,0 +1,43 @@
+# Composed deployment: KittiPublisher and TrackerNode in one process, one executor
+# This piece of code does the following:
+# Runs both nodes in the same process. The publisher hands every decoded frame (the NumPy array itself) to
+# TrackerNode.push_frame() with its stamped header, so there is no cv2_to_imgmsg / imgmsg_to_cv2 conversion, no serialization
+# and no copy between decoding and detection. Topics, timers (/diagnostics), /tracker/ready and the tracker outputs are unchanged,
+# and /camera/image_raw is still published when something else (rviz, a recorder) subscribes to it.
+# Without ROS 2 installed, both nodes run on the local stand-in bus (local_bus.py).
+
+# Note:
+# rclpy has no intra-process transport (use_intra_process_comms is rclcpp only): two Python nodes in one process still
+# serialize every message through the middleware. The direct hand-off is the in-process, zero-copy path for Python nodes.
+# The hand-off follows the tracker's queue settings (async_mode, queue_size, drop_policy), same as the subscription did.
+
+try:
+    import rclpy
+    from rclpy.executors import SingleThreadedExecutor
+except ImportError:                                                                                             # No ROS 2: in-process stand-in bus (local_bus.py)
+    import local_bus as rclpy
+    from local_bus import SingleThreadedExecutor
+import cv2
+from kitti_publisher import KittiPublisher
+from tracker_node import TrackerNode
+
+def main(args=None):
+    rclpy.init(args=args)
+    tracker = TrackerNode(direct_input=True)                                                                    # Started first: ready before the first frame
+    publisher = KittiPublisher(frame_sink=tracker.push_frame)
+    executor = SingleThreadedExecutor()                                                                         # Timers and subscriptions of both nodes
+    executor.add_node(tracker)
+    executor.add_node(publisher)
+    try:
+        executor.spin()
+    except KeyboardInterrupt:
+        pass
+    publisher.stop()
+    tracker.stop()
+    publisher.destroy_node()
+    tracker.destroy_node()
+    cv2.destroyAllWindows()
+    rclpy.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -1,49 +1,199 @@
-import rclpy                                                                     # ROS 2 Python client library
-from rclpy.node import Node                                                      # Base class to create nodes
-from sensor_msgs.msg import Image                                                # Message type for publishing images
-from cv_bridge import CvBridge                                                   # Converts between OpenCV images and ROS Image messages
+try:
+    import rclpy                                                                 # ROS 2 Python client library
+    from rclpy.node import Node                                                  # Base class to create nodes
+    from sensor_msgs.msg import Image                                            # Message type for publishing images
+    from std_msgs.msg import Header                                              # Stamp of frames handed over directly (composed mode)
+    from cv_bridge import CvBridge                                               # Converts between OpenCV images and ROS Image messages
+except ImportError:                                                              # No ROS 2: in-process stand-in bus (local_bus.py)
+    import local_bus as rclpy
+    from local_bus import Node, Image, Header, CvBridge
 import cv2                                                                       # OpenCV for image loading and manipulation
 import os                                                                        # For file handling
-import time                                                                      # (Optional here, for delays etc.)
+import sys
+import time                                                                      # Rate control and achieved-rate stats
+import threading
+from datetime import datetime
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))  # Shared helpers live in scripts/
+from frame_queue import FrameQueue                                               # Bounded prefetch queue
+
+# Replay modes:
+# 'fixed':      publish at target_fps (the original 10 FPS timer behaviour when target_fps = 10)
+# 'max':        publish as fast as frames can be delivered (stress test the tracker's throughput ceiling)
+# 'timestamps': follow the original capture times from timestamps_file (KITTI raw format, one time per line), scaled by speed
+# Frames are decoded ahead of time by a background thread (prefetch queue) or once for the whole sequence (preload),
+# optionally into a memory-mapped .npy cache that later runs reuse without decoding.
+# Composed mode (frame_sink, see composed_pipeline.py): each decoded frame is passed as is to frame_sink(frame, header) in the
+# same process, no Image message is built unless something else subscribes to /camera/image_raw.
 
 class KittiPublisher(Node):                                                      # Custom ROS 2 node that inherits from Node (publishers, timers, loggers, etc)
-    def __init__(self):
+    def __init__(self, frame_sink=None, **overrides):
+        # frame_sink: callable(frame, header) receiving the decoded frames (e.g. TrackerNode.push_frame), None = publish only
+        # overrides: settings below to change before the threads start, e.g. img_dir='...', replay_mode='max', loop=False
         super().__init__('kitti_publisher')                                      # Node initialization
         self.publisher_ = self.create_publisher(Image, '/camera/image_raw', 10)  # Image: ROS msg type, Queue size: how many messages can be stored if subscribers are slow.
         self.bridge = CvBridge()
 
         # Update this path based on your sequence
         self.img_dir = '/home/monisha/ros2_ws/src/mot_tracker/kitti_tracking/data_tracking_image_2/training/image_02/0000'
-        self.img_files = sorted(os.listdir(self.img_dir))
         self.index = 0
-        self.timer = self.create_timer(0.1, self.publish_frame)                  # Creates a timer to call publish_frame() every 0.1 seconds = 10 FPS
-
-    # Image publishing logic
-    def publish_frame(self):
-        if self.index >= len(self.img_files):
-            self.get_logger().info("All KITTI images published.Restarting sequence.")
-            self.index = 0  # Restart from beginning
-           # rclpy.shutdown()
-           # return
-
-        img_path = os.path.join(self.img_dir, self.img_files[self.index])
-        frame = cv2.imread(img_path)
-
-        if frame is None:
-            self.get_logger().warn(f"Could not read: {img_path}")
-            return
-
-        # Converts to ROS Image message with timestamp
-        msg = self.bridge.cv2_to_imgmsg(frame, encoding='bgr8')                  # Converts OpenCV BGR image to ROS2 
-        msg.header.stamp = self.get_clock().now().to_msg()                       # Adds a timestamp to the message header
-        self.publisher_.publish(msg)                                             # Publishes the image on the ROS topic
-        self.get_logger().info(f"Published frame {self.index}: {self.img_files[self.index]}")
-        self.index += 1
+
+        # Replay settings
+        self.replay_mode = 'fixed'                                               # 'fixed', 'max' or 'timestamps'
+        self.target_fps = 10.0                                                   # Used by 'fixed'
+        self.speed = 1.0                                                         # Used by 'timestamps' (2.0 = twice as fast as recorded)
+        self.timestamps_file = None                                              # e.g. '.../oxts/timestamps.txt', None = assume 10 Hz
+        self.loop = True                                                         # Restart from the beginning after the last frame
+        self.prefetch_size = 32                                                  # Frames decoded ahead by the background thread
+        self.preload = False                                                     # Decode the whole sequence once into memory
+        self.frame_cache_file = None                                             # e.g. '/tmp/kitti_0000_frames.npy', memory-mapped decoded frames
+        self.stats_every_s = 5.0                                                 # Log achieved vs target rate every N seconds
+        self.frame_sink = frame_sink
+        for name, value in overrides.items():
+            if not hasattr(self, name):
+                raise ValueError(f"Unknown KittiPublisher setting '{name}'")
+            setattr(self, name, value)
+        self.img_files = sorted(os.listdir(self.img_dir))
+
+        self.timestamps = self.load_timestamps()
+        self.frames = self.load_frame_cache() if (self.preload or self.frame_cache_file) else None
+        self.frame_queue = FrameQueue(self.prefetch_size, 'block')               # Decoder waits when the publisher is behind, no frame is skipped
+        self.running = True
+        self.decoder = threading.Thread(target=self.decode_loop, daemon=True)
+        self.sender = threading.Thread(target=self.publish_loop, daemon=True)
+        self.decoder.start()
+        self.sender.start()
+
+    def load_timestamps(self):
+        # Relative capture times in seconds, one per frame
+        if self.timestamps_file is None:
+            return np.arange(len(self.img_files)) / 10.0                         # KITTI tracking is recorded at 10 Hz
+        with open(self.timestamps_file) as f:
+            times = [datetime.strptime(line.strip()[:26], '%Y-%m-%d %H:%M:%S.%f') for line in f if line.strip()]   # Nanoseconds cut to microseconds
+        if len(times) != len(self.img_files):                                    # Checked here, not as an IndexError mid-stream
+            raise ValueError(f"{self.timestamps_file} has {len(times)} timestamps for {len(self.img_files)} images in {self.img_dir}")
+        return np.array([(t - times[0]).total_seconds() for t in times])
+
+    def load_frame_cache(self):
+        # All decoded frames as one (N, H, W, 3) array, memory-mapped from frame_cache_file if set (built on first run)
+        if self.frame_cache_file and os.path.exists(self.frame_cache_file):
+            self.get_logger().info(f"Using frame cache: {self.frame_cache_file}")
+            return np.load(self.frame_cache_file, mmap_mode='r')
+        first = cv2.imread(os.path.join(self.img_dir, self.img_files[0]))
+        shape = (len(self.img_files), *first.shape)
+        if self.frame_cache_file:
+            frames = np.lib.format.open_memmap(self.frame_cache_file, mode='w+', dtype=np.uint8, shape=shape)
+        else:
+            frames = np.empty(shape, dtype=np.uint8)
+        for i, name in enumerate(self.img_files):
+            frames[i] = cv2.imread(os.path.join(self.img_dir, name))             # KITTI frames of a sequence share the same size
+        if self.frame_cache_file:
+            frames.flush()
+        self.get_logger().info(f"Preloaded {len(frames)} frames ({frames.nbytes / 1024 ** 2:.0f} MB)")
+        return frames
+
+    # Background decoding: frame -> ROS Image message (or the frame itself for frame_sink), so the publish loop only stamps and publishes
+    def decode_loop(self):
+        decoded = 0                                                              # Frames decoded in the current pass
+        while self.running:
+            if self.index >= len(self.img_files):
+                if decoded == 0:                                                 # A whole pass without one readable image, looping would spin forever
+                    self.get_logger().error(f"No readable image in {self.img_dir}, stopping.")
+                    self.frame_queue.close()
+                    return
+                if not self.loop:
+                    self.frame_queue.close()
+                    return
+                self.get_logger().info("All KITTI images published.Restarting sequence.")
+                self.index = 0  # Restart from beginning
+                decoded = 0
+
+            if self.frames is not None:
+                frame = self.frames[self.index]
+            else:
+                img_path = os.path.join(self.img_dir, self.img_files[self.index])
+                frame = cv2.imread(img_path)
+                if frame is None:
+                    self.get_logger().warn(f"Could not read: {img_path}")
+                    self.index += 1
+                    continue
+
+            frame = np.ascontiguousarray(frame)                                  # No copy for frames that are already contiguous
+            if self.frame_sink is None:
+                frame = self.bridge.cv2_to_imgmsg(frame, encoding='bgr8')        # Converts OpenCV BGR image to ROS2
+            self.frame_queue.put((self.index, frame))
+            self.index += 1
+            decoded += 1
+
+    # Image publishing logic with rate control
+    def publish_loop(self):
+        start = time.perf_counter()
+        loop_start = start                                                       # Time origin of the current pass over the sequence
+        stats_start, stats_count = start, 0
+        next_due = start                                                         # 'fixed': time slot of the next frame
+        sent = 0
+        while self.running:
+            item = self.frame_queue.get(timeout=0.5)
+            if item is None:
+                if self.frame_queue.closed:
+                    break                                                        # Sequence finished (loop = False)
+                continue
+            index, payload = item
+
+            # When should this frame go out?
+            if self.replay_mode == 'fixed':
+                due = max(next_due, time.perf_counter() - 1.0 / self.target_fps)  # If behind, don't burst to catch up
+                next_due = due + 1.0 / self.target_fps
+            elif self.replay_mode == 'timestamps':
+                if index == 0 and sent > 0:
+                    loop_start = time.perf_counter()
+                due = loop_start + self.timestamps[index] / self.speed
+            elif self.replay_mode == 'max':
+                due = 0.0
+            else:
+                raise ValueError(f"Unknown replay_mode '{self.replay_mode}', expected 'fixed', 'max' or 'timestamps'")
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            stamp = self.get_clock().now().to_msg()
+            if self.frame_sink is None:
+                payload.header.stamp = stamp                                     # Adds a timestamp to the message header
+                self.publisher_.publish(payload)                                 # Publishes the image on the ROS topic
+            else:
+                self.frame_sink(payload, Header(stamp=stamp))                    # Same process: the array itself, no serialization
+                if self.publisher_.get_subscription_count():                     # Other viewers (rviz, recorders) still get the topic
+                    msg = self.bridge.cv2_to_imgmsg(payload, encoding='bgr8')
+                    msg.header.stamp = stamp
+                    self.publisher_.publish(msg)
+            self.get_logger().debug(f"Published frame {index}: {self.img_files[index]}")   # Debug level: per-frame info logging costs CPU at high rates
+            sent += 1
+            stats_count += 1
+
+            now = time.perf_counter()
+            if now - stats_start >= self.stats_every_s:
+                self.get_logger().info(f"Achieved {stats_count / (now - stats_start):.1f} FPS (target: {self.target_rate_label()}), "
+                                       f"prefetched frames: {len(self.frame_queue)}")
+                stats_start, stats_count = now, 0
+
+    def target_rate_label(self):
+        if self.replay_mode == 'fixed':
+            return f"{self.target_fps:.1f} FPS"
+        if self.replay_mode == 'timestamps':
+            return f"recorded rate x{self.speed}"
+        return "max"
+
+    def stop(self):
+        self.running = False
+        self.frame_queue.close()
+        self.decoder.join()
+        self.sender.join()
 
 def main(args=None):
     rclpy.init(args=args)                                                         # Initializes the ROS 2 Python client library (rclpy), create nodes, publishers, etc.
     node = KittiPublisher()                                                       # Instantiates the node class
     rclpy.spin(node)                                                              # Keep node running, listen for callbacks
+    node.stop()
     node.destroy_node()                                                           # Cleanup
     rclpy.shutdown()                                                              # Shutdown ROS 2
 
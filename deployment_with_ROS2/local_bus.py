@@ -0,0 +1,301 @@
+# Local pub/sub stand-in for ROS 2 (runs the deployment without a ROS installation)
+# This module does the following:
+# Provides the part of the rclpy API the deployment nodes use, backed by an in-process bus:
+# Node (create_publisher / create_subscription / create_timer / get_logger / get_clock), Time / Duration, QoS settings,
+# init / ok / spin / shutdown and a SingleThreadedExecutor, plus the message types the nodes publish (Image, Header, String,
+# diagnostics, vision_msgs detections) and a CvBridge with the same two conversions.
+# kitti_publisher.py and tracker_node.py fall back to it when rclpy can't be imported, so the whole pipeline (both nodes,
+# topics, timers, composed mode) runs and can be benchmarked on a machine without ROS 2 (see benchmark_transport.py).
+
+# Semantics (same as ROS 2 defaults where it matters here):
+# 1) publish() hands the message object (no serialization) to every subscription of the topic. Each subscription keeps the last
+#    'depth' messages (KEEP_LAST, the oldest is dropped when full), the executor runs the callbacks in arrival order.
+# 2) TRANSIENT_LOCAL publishers keep their last 'depth' messages and replay them to subscriptions created later.
+# 3) CvBridge copies the pixels into / out of Image.data like cv_bridge, so the topic path keeps its conversion cost.
+# 4) Time is system time (like a ROS clock without use_sim_time).
+
+import time
+import logging
+import threading
+from collections import deque
+from types import SimpleNamespace
+import numpy as np
+
+# QoS
+class DurabilityPolicy:
+    VOLATILE = "volatile"
+    TRANSIENT_LOCAL = "transient_local"
+
+class QoSProfile:
+    def __init__(self, depth=10, durability=DurabilityPolicy.VOLATILE):
+        self.depth = depth
+        self.durability = durability
+
+def _qos(qos_profile):
+    return qos_profile if isinstance(qos_profile, QoSProfile) else QoSProfile(depth=qos_profile)        # int = depth, like rclpy
+
+# Time
+class Stamp:                                                                                            # builtin_interfaces/Time
+    def __init__(self, sec=0, nanosec=0):
+        self.sec = sec
+        self.nanosec = nanosec
+
+class Duration:
+    def __init__(self, nanoseconds=0):
+        self.nanoseconds = nanoseconds
+
+class Time:
+    def __init__(self, nanoseconds=0):
+        self.nanoseconds = int(nanoseconds)
+
+    def __sub__(self, other):
+        return Duration(self.nanoseconds - other.nanoseconds)
+
+    def to_msg(self):
+        return Stamp(self.nanoseconds // 10 ** 9, self.nanoseconds % 10 ** 9)
+
+    @classmethod
+    def from_msg(cls, msg):
+        return cls(msg.sec * 10 ** 9 + msg.nanosec)
+
+class Clock:
+    def now(self):
+        return Time(time.time_ns())
+
+# Messages
+class Header:
+    def __init__(self, stamp=None, frame_id=""):
+        self.stamp = stamp if stamp is not None else Stamp()
+        self.frame_id = frame_id
+
+class Image:
+    def __init__(self):
+        self.header = Header()
+        self.height = 0
+        self.width = 0
+        self.encoding = ""
+        self.step = 0
+        self.data = b""
+
+class String:
+    def __init__(self, data=""):
+        self.data = data
+
+class KeyValue:
+    def __init__(self, key="", value=""):
+        self.key = key
+        self.value = value
+
+class DiagnosticStatus:
+    OK, WARN, ERROR, STALE = 0, 1, 2, 3
+
+    def __init__(self):
+        self.level = self.OK
+        self.name = ""
+        self.message = ""
+        self.hardware_id = ""
+        self.values = []
+
+class DiagnosticArray:
+    def __init__(self):
+        self.header = Header()
+        self.status = []
+
+class ObjectHypothesisWithPose:
+    def __init__(self):
+        self.hypothesis = SimpleNamespace(class_id="", score=0.0)
+        self.pose = SimpleNamespace(pose=None, covariance=None)
+
+class Detection2D:
+    def __init__(self):
+        self.header = Header()
+        self.id = ""
+        self.bbox = SimpleNamespace(center=SimpleNamespace(position=SimpleNamespace(x=0.0, y=0.0), theta=0.0), size_x=0.0, size_y=0.0)
+        self.results = []
+
+class Detection2DArray:
+    def __init__(self):
+        self.header = Header()
+        self.detections = []
+
+class CvBridge:
+    # bgr8 / mono8 uint8 images, pixels are copied like cv_bridge (tobytes / frombuffer)
+    def cv2_to_imgmsg(self, cvim, encoding="passthrough"):
+        msg = Image()
+        msg.height, msg.width = cvim.shape[:2]
+        msg.encoding = encoding
+        msg.step = msg.width * (cvim.shape[2] if cvim.ndim == 3 else 1)
+        msg.data = cvim.tobytes()
+        return msg
+
+    def imgmsg_to_cv2(self, img_msg, desired_encoding="passthrough"):
+        channels = img_msg.step // img_msg.width
+        shape = (img_msg.height, img_msg.width, channels) if channels > 1 else (img_msg.height, img_msg.width)
+        return np.frombuffer(img_msg.data, dtype=np.uint8).reshape(shape)
+
+# Bus
+class _Bus:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.subscriptions = {}                                                                         # { topic: [Subscription, ...] }
+        self.publishers = {}                                                                            # { topic: [Publisher, ...] }
+        self.running = False
+
+_bus = _Bus()
+
+class Publisher:
+    def __init__(self, topic, qos):
+        self.topic = topic
+        self.history = deque(maxlen=qos.depth) if qos.durability == DurabilityPolicy.TRANSIENT_LOCAL else None
+        with _bus.cond:
+            _bus.publishers.setdefault(topic, []).append(self)
+
+    def publish(self, msg):
+        with _bus.cond:
+            if self.history is not None:
+                self.history.append(msg)
+            for sub in _bus.subscriptions.get(self.topic, []):
+                sub.queue.append(msg)
+            _bus.cond.notify_all()
+
+    def get_subscription_count(self):
+        with _bus.cond:
+            return len(_bus.subscriptions.get(self.topic, []))
+
+class Subscription:
+    def __init__(self, topic, callback, qos):
+        self.topic = topic
+        self.callback = callback
+        self.queue = deque(maxlen=qos.depth)                                                            # KEEP_LAST: oldest dropped when full
+        with _bus.cond:
+            for pub in _bus.publishers.get(topic, []):
+                if pub.history:
+                    self.queue.extend(pub.history)                                                      # Late joiner gets latched messages
+            _bus.subscriptions.setdefault(topic, []).append(self)
+            _bus.cond.notify_all()
+
+class Timer:
+    def __init__(self, period_s, callback):
+        self.period_s = period_s
+        self.callback = callback
+        self.next_due = time.perf_counter() + period_s
+
+    def cancel(self):
+        self.next_due = None
+
+class _Logger:
+    def __init__(self, name):
+        self.logger = logging.getLogger(name)
+
+    def debug(self, msg):
+        self.logger.debug(msg)
+
+    def info(self, msg):
+        self.logger.info(msg)
+
+    def warn(self, msg):
+        self.logger.warning(msg)
+
+    warning = warn
+
+    def error(self, msg):
+        self.logger.error(msg)
+
+class Node:
+    def __init__(self, node_name):
+        self._name = node_name
+        self._publishers = []
+        self._subscriptions = []
+        self._timers = []
+        self._logger = _Logger(node_name)
+        self._clock = Clock()
+
+    def get_name(self):
+        return self._name
+
+    def get_logger(self):
+        return self._logger
+
+    def get_clock(self):
+        return self._clock
+
+    def create_publisher(self, msg_type, topic, qos_profile):
+        pub = Publisher(topic, _qos(qos_profile))
+        self._publishers.append(pub)
+        return pub
+
+    def create_subscription(self, msg_type, topic, callback, qos_profile):
+        sub = Subscription(topic, callback, _qos(qos_profile))
+        self._subscriptions.append(sub)
+        return sub
+
+    def create_timer(self, timer_period_sec, callback):
+        timer = Timer(timer_period_sec, callback)
+        self._timers.append(timer)
+        return timer
+
+    def destroy_node(self):
+        with _bus.cond:
+            for pub in self._publishers:
+                _bus.publishers[pub.topic].remove(pub)
+            for sub in self._subscriptions:
+                _bus.subscriptions[sub.topic].remove(sub)
+        self._publishers, self._subscriptions, self._timers = [], [], []
+
+# Executor / lifecycle
+class SingleThreadedExecutor:
+    # Runs subscription callbacks (in arrival order per subscription) and due timers of its nodes in the spinning thread
+    def __init__(self):
+        self.nodes = []
+        self.stopped = False
+
+    def add_node(self, node):
+        self.nodes.append(node)
+
+    def spin_once(self, timeout_sec=0.1):
+        work = []
+        with _bus.cond:
+            for node in self.nodes:
+                for sub in node._subscriptions:
+                    while sub.queue:
+                        work.append((sub.callback, sub.queue.popleft()))
+            now = time.perf_counter()
+            dues = [t.next_due for node in self.nodes for t in node._timers if t.next_due is not None]
+            if not work and (not dues or min(dues) > now):
+                _bus.cond.wait(min([timeout_sec] + [d - now for d in dues]))
+        for callback, msg in work:
+            callback(msg)
+        now = time.perf_counter()
+        for node in self.nodes:
+            for timer in list(node._timers):
+                if timer.next_due is not None and timer.next_due <= now:
+                    timer.callback()
+                    if timer.next_due is not None:
+                        timer.next_due = max(timer.next_due + timer.period_s, now)                      # Don't burst to catch up
+
+    def spin(self):
+        while ok() and not self.stopped:
+            self.spin_once()
+
+    def shutdown(self):
+        self.stopped = True
+        with _bus.cond:
+            _bus.cond.notify_all()
+
+def init(args=None):
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=logging.INFO, format="[%(levelname)s] [%(created).3f] [%(name)s]: %(message)s")
+    _bus.running = True
+
+def ok():
+    return _bus.running
+
+def spin(node):
+    executor = SingleThreadedExecutor()
+    executor.add_node(node)
+    executor.spin()
+
+def shutdown():
+    _bus.running = False
+    with _bus.cond:
+        _bus.cond.notify_all()
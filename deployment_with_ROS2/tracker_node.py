@@ -1,71 +1,354 @@
-import rclpy
-from rclpy.node import Node
-from sensor_msgs.msg import Image
-from cv_bridge import CvBridge
+import time
+IMPORT_START = time.perf_counter()                                                                              # Cold-start clock, see TrackerNode.startup
+import os
+import sys
+import json
+import threading
+import traceback
+try:
+    import rclpy
+    from rclpy.node import Node
+    from rclpy.time import Time
+    from rclpy.qos import QoSProfile, DurabilityPolicy
+    from sensor_msgs.msg import Image
+    from std_msgs.msg import String                                                                             # Readiness message on /tracker/ready
+    from diagnostic_msgs.msg import DiagnosticArray, DiagnosticStatus, KeyValue                                 # Runtime metrics on /diagnostics
+    from cv_bridge import CvBridge
+    try:
+        from vision_msgs.msg import Detection2D, Detection2DArray, ObjectHypothesisWithPose                    # Structured track output (ros-<distro>-vision-msgs)
+    except ImportError:
+        Detection2DArray = None
+except ImportError:                                                                                             # No ROS 2: in-process stand-in bus (local_bus.py)
+    import local_bus as rclpy
+    from local_bus import (Node, Time, QoSProfile, DurabilityPolicy, Image, String, DiagnosticArray, DiagnosticStatus, KeyValue,
+                           CvBridge, Detection2D, Detection2DArray, ObjectHypothesisWithPose)
 import cv2
 import numpy as np
-from ultralytics import YOLO                                                                                    # Ultralytics YOLOv8 model wrapper
-from shapely.geometry import box
 from types import SimpleNamespace                                                                               # Helper to pass parameters to BYTETracker
-from yolox.tracker.byte_tracker import BYTETracker      
-#from byte_tracker import BYTETracker
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))                     # Shared helpers live in scripts/
+from byte_tracker import BYTETracker                                                                            # Array-backed BYTETrack, carries class IDs
+from detector import load_detector, warm_up, input_size                                                         # YOLOv8 on Ultralytics / ONNX Runtime backends (imported on load)
+from detection_scheduler import DetectionScheduler                                                              # Adaptive keyframe interval
+from box_ops import cyclist_mask                                                                                # Vectorized IoU matrix ops
+from class_resolver import ClassResolver, CYCLIST_IOU_THRESH                                                    # Per-track class / cyclist votes, shared thresholds
+from frame_queue import FrameQueue                                                                              # Bounded queue with drop policies
+from instrumentation import Metrics, JsonFileExporter                                                           # Stage timers, latency percentiles
+IMPORT_S = time.perf_counter() - IMPORT_START
+
+# Startup: heavy libraries are imported when first needed (torch / ultralytics or onnxruntime by load_detector, motmetrics only
+# with online evaluation), the model is warmed up on dummy frames before any subscription exists, and readiness is published
+# on /tracker/ready (latched) with the measured cold-start breakdown, so frames published during startup don't pile up.
 
-np.float = float
 CLASS_PEDESTRIAN = 0
 CLASS_CAR = 2
 
+class CameraStream:
+    # Per-camera state: own tracker, latest-frame queue, output publishers and counters (the YOLO model is shared)
+    def __init__(self, name, topic, tracker, frame_queue, pub_image, pub_tracks, suffix):
+        self.name = name
+        self.topic = topic
+        self.tracker = tracker
+        self.frame_queue = frame_queue
+        self.pub_image = pub_image
+        self.pub_tracks = pub_tracks
+        self.suffix = suffix                                                                                    # Metric name suffix, '' with a single camera
+        self.frame_idx = 0                                                                                      # Index of the next received frame
+        self.processed = 0
+        self.last_render_time = None
+        self.evaluator = None
+        self.scheduler = None                                                                                   # DetectionScheduler when keyframe scheduling is on
+        self.resolver = None                                                                                    # ClassResolver when class resolution is on
+
 class TrackerNode(Node):
-    def __init__(self):
+    def __init__(self, detector=None, direct_input=False):
+        # detector: already loaded detector (e.g. a replay stub in benchmark_transport.py), None = load the configured model
+        # direct_input: frames come from push_frame() (composed mode, see composed_pipeline.py) instead of image subscriptions
         super().__init__('tracker_node')
-
-        self.subscription = self.create_subscription(Image, '/camera/image_raw', self.listener_callback, 10)    # Subscription, listener_callback: this function will be called every time a new message is received on the topic (/camera/image_raw)
         self.bridge = CvBridge()
+        self.direct_input = direct_input
 
-        # Publish result
-        self.pub_image = self.create_publisher(Image, '/tracker/output_image', 10)                              # Publisher
+        # Cameras: one entry per image topic. All streams share one YOLO model, the newest frame of every stream goes into
+        # one batched inference call, and each stream has its own tracker and outputs.
+        # One topic: outputs on /tracker/output_image and /tracker/tracks (original topics).
+        # Several topics: outputs on /tracker/<name>/output_image and /tracker/<name>/tracks, <name> = first part of the topic.
+        self.image_topics = ['/camera/image_raw']                                                              # e.g. ['/cam_front/image_raw', '/cam_left/image_raw']
+        if Detection2DArray is None:
+            self.get_logger().warn("vision_msgs not found, '/tracker/tracks' is disabled (only the rendered image is published)")
 
-        # Load YOLOv8 model (trained on COCO)
-        self.model = YOLO("yolov8s.pt")
+        # Rendering is a separate stage: drawing + bgr8 encoding only run when enabled, someone subscribes, and the rate limit allows
+        self.render_enabled = True
+        self.render_max_fps = 0.0                                                                               # 0 = render every processed frame (per stream)
+
+        # Load YOLOv8 model (trained on COCO), 'torch' (Ultralytics), 'onnx' or 'onnx_int8' (ONNX Runtime, see scripts/detector.py)
+        self.detector_backend = 'torch'
+        self.model_path = 'yolov8s.pt'                                                                          # .pt (exported on first use for ONNX) or .onnx
+        self.num_threads = None                                                                                 # CPU inference threads, None = library default
+        # Model input: rectangular, with the cameras' aspect ratio (long side input_long_side, see scripts/detector.py input_size),
+        # optionally tiles overlapping horizontal tiles per frame, all tiles in the same batch, boxes merged across tiles
+        self.warmup_shape = (375, 1242, 3)                                                                      # Camera frame size (KITTI), also used for warm-up
+        self.input_long_side = 640
+        self.tiles = 1
+        self.tile_overlap = 0.2
+        self.imgsz = input_size(self.warmup_shape[:2], self.input_long_side, self.tiles, self.tile_overlap)
+        start = time.perf_counter()
+        if detector is None:
+            detector = load_detector(self.detector_backend, self.model_path, num_threads=self.num_threads, imgsz=self.imgsz,
+                                     tiles=self.tiles, tile_overlap=self.tile_overlap)
+        self.detector = detector
+        self.startup = {'import_s': IMPORT_S, 'model_load_s': time.perf_counter() - start}                      # Cold-start breakdown
+        self.warmup_runs = 2                                                                                    # Dummy inferences before subscribing, 0 = off
         self.conf_thresh = 0.6
+        self.cyclist_iou_thresh = CYCLIST_IOU_THRESH                                                            # person-bicycle IoU above this = cyclist (shared with scripts/)
+        # Class resolution (scripts/class_resolver.py): persons are tracked with bicycles kept aside, each track's class and
+        # cyclist flag come from its vote history (no class flicker, cyclist tracks hidden). False = per-frame cyclist filter.
+        self.class_resolution = True
 
         # Mapping COCO classes to the target classes
         self.wanted_classes = {'person': 0, 'bicycle': 1, 'car': 2}
         self.id_to_name = {v: k for k, v in self.wanted_classes.items()}
 
-        # Initialize BYTETracker with parameters
-        self.tracker = BYTETracker(SimpleNamespace(
+        # BYTETracker parameters, one tracker per stream (each track keeps the class ID of the detection it was last matched with)
+        self.tracker_args = SimpleNamespace(
             track_thresh=0.5,
             track_buffer=30,
             match_thresh=0.8,
             mot20=False,
             min_box_area=100
-        ), frame_rate=10)
+        )
+        self.tracker_frame_rate = 10
+
+        # Keyframe scheduling (optional, see scripts/detection_scheduler.py): YOLO only runs on keyframes, on the other frames
+        # the stream's tracks coast on their Kalman prediction. Each stream adapts its own interval to the latency budget
+        # (detector call vs per-frame cost) and to its scene (fastest track motion, track count).
+        self.keyframe_scheduling = False
+        self.scheduler_args = dict(
+            min_interval=1,
+            max_interval=4,
+            latency_budget_s=0.1,                                                                               # Average per frame, 0.1 s = keep up with 10 FPS
+            max_shift=0.25,                                                                                     # Max drift between detections, in box heights
+            crowd_tracks=20
+        )
+
+        # Online evaluation (optional): running MOTA / IDF1 of the first stream against a KITTI label file while the node runs.
+        # Frame index = number of frames received, so start this node before kitti_publisher (both start at frame 0).
+        # Frames dropped by the real-time queue below are not evaluated.
+        self.eval_label_file = None                                                                             # e.g. '.../label_02/0000.txt' (or .npy), None = off
+        self.eval_report_every = 50                                                                             # Log running metrics every N evaluated frames
+
+        # Real-time mode: the callbacks only enqueue, a worker thread runs detection + tracking on the newest frame of each stream.
+        # If the worker is busy, stale frames are dropped instead of piling up in the subscription queue.
+        # Every stream has its own queue and a batch takes at most one frame per stream, so a fast camera can't delay the others:
+        # per-stream latency stays within about two batch durations.
+        self.async_mode = True                                                                                  # False = process inside the callback (original behaviour)
+        self.queue_size = 1                                                                                     # Per stream, 1 + 'drop_oldest' = latest-frame-wins
+        self.drop_policy = 'drop_oldest'                                                                        # 'drop_oldest' or 'drop_newest' (see scripts/frame_queue.py)
+        self.stats_every = 100                                                                                  # Log latency / drop stats every N processed frames (per stream)
+
+        # Instrumentation: per-stage latency percentiles (p50 / p95 / p99), detection / track gauges and counters.
+        # Published on /diagnostics every diag_period_s, optionally also written to a local JSON / text file.
+        self.metrics_enabled = True                                                                             # False = near-zero overhead, nothing is timed
+        self.metrics = Metrics(enabled=self.metrics_enabled, window=1000)                                       # Percentiles over the last 1000 frames
+        self.metrics_file = None                                                                                # e.g. '/tmp/tracker_metrics.json' (or .txt)
+        self.exporter = JsonFileExporter(self.metrics, self.metrics_file) if self.metrics_file else None
+        self.diag_period_s = 1.0
+        self.pub_diag = self.create_publisher(DiagnosticArray, '/diagnostics', 10)
+        self.diag_timer = self.create_timer(self.diag_period_s, self.publish_diagnostics) if self.metrics_enabled else None
+
+        self.warm_up()
+        # Readiness (JSON cold-start breakdown), latched: subscribers that start later still get it
+        self.pub_ready = self.create_publisher(String, '/tracker/ready', QoSProfile(depth=1, durability=DurabilityPolicy.TRANSIENT_LOCAL))
+        self.streams = [self.create_stream(topic) for topic in self.image_topics]
+        if self.eval_label_file:
+            from mot_eval import OnlineMOTEvaluator, load_gt_arrays, ALLOWED_CLASS_IDS                          # motmetrics / pandas only when evaluating
+            self.streams[0].evaluator = OnlineMOTEvaluator(load_gt_arrays(self.eval_label_file))
+            self.eval_class_ids = ALLOWED_CLASS_IDS
+        self.frame_ready = threading.Event()                                                                    # Set when any stream queued a frame
+        self.running = True
+        self.worker = None
+        self.worker_errors = 0                                                                                  # Batches lost to an exception in the worker
+        if self.async_mode:
+            self.worker = threading.Thread(target=self.worker_loop, daemon=True)
+            self.worker.start()
+        self.publish_ready()
+
+    def warm_up(self):
+        # Detector (one batch as large as the camera count) and tracker code paths on dummy data, before any frame can arrive
+        start = time.perf_counter()
+        if self.warmup_runs:
+            runs = warm_up(self.detector, self.warmup_shape, batch_size=len(self.image_topics), runs=self.warmup_runs, conf=self.conf_thresh)
+            self.startup['first_inference_s'] = runs[0]
+            self.startup['warm_inference_s'] = runs[-1]
+            tracker = BYTETracker(self.tracker_args, frame_rate=self.tracker_frame_rate)
+            for dx in (0, 2):
+                tracker.update(np.array([[100 + dx, 100, 200, 200, 0.9, CLASS_CAR]], dtype=np.float32), (1, 1), (1, 1))
+        self.startup['warmup_s'] = time.perf_counter() - start
+
+    def publish_ready(self):
+        # Cold start = module import start -> ready to receive frames
+        self.startup['cold_start_s'] = time.perf_counter() - IMPORT_START
+        for name, value in self.startup.items():
+            self.metrics.gauge(f'startup.{name}', round(value, 4))
+        self.pub_ready.publish(String(data=json.dumps(self.startup)))
+        self.get_logger().info("Ready: " + ", ".join(f"{name} {value:.2f}s" for name, value in self.startup.items()))
 
-        self.image_shape = None                                                                                 # Will be updated on each frame
+    def create_stream(self, topic):
+        single = len(self.image_topics) == 1
+        name = topic.strip('/').split('/')[0]
+        prefix = '/tracker' if single else f'/tracker/{name}'
+        stream = CameraStream(
+            name, topic,
+            BYTETracker(self.tracker_args, frame_rate=self.tracker_frame_rate),
+            FrameQueue(self.queue_size, self.drop_policy),
+            self.create_publisher(Image, f'{prefix}/output_image', 10),                                         # Publisher (rendered visualization)
+            # Structured tracks: one vision_msgs/Detection2DArray per frame (id = track ID, class_id = class name, bbox = center + size)
+            self.create_publisher(Detection2DArray, f'{prefix}/tracks', 10) if Detection2DArray else None,
+            '' if single else f'.{name}')
+        # Subscription, listener_callback: this function will be called every time a new message is received on the topic
+        if self.keyframe_scheduling:
+            stream.scheduler = DetectionScheduler(**self.scheduler_args)
+        if self.class_resolution:
+            stream.resolver = ClassResolver(cyclist_iou_thresh=self.cyclist_iou_thresh)
+        stream.subscription = None
+        if not self.direct_input:
+            stream.subscription = self.create_subscription(Image, topic, lambda msg: self.listener_callback(stream, msg), 10)
+        return stream
 
-    def compute_iou(self, box1, box2):
-        # box1 and box2 are (x1, y1, x2, y2)
-        b1 = box(*box1)
-        b2 = box(*box2)
-        if b1.area == 0 or b2.area == 0:
-            return 0.0
-        return b1.intersection(b2).area / b1.union(b2).area
+    def listener_callback(self, stream, msg):                                                                   # Called in subscription, when it receives a message from the defined topic (this callback is called on message arrival)
+        self.enqueue(stream, msg.header, msg)
 
-    def listener_callback(self, msg):                                                                           # Called in subscription, when it receives a message from the defined topic (this callback is called on message arrival)
-        # Convert ROS Image to OpenCV image
-        frame = self.bridge.imgmsg_to_cv2(msg, desired_encoding='bgr8')
-        self.image_shape = frame.shape[:2]  # (height, width)
+    def push_frame(self, frame, header, topic=None):
+        # Composed mode: the publisher hands over its decoded BGR frame (no Image conversion, no copy), topic None = first stream
+        stream = self.streams[0] if topic is None else next(s for s in self.streams if s.topic == topic)
+        self.enqueue(stream, header, frame)
 
-        # Run YOLO inference
-        results = self.model.predict(source=frame, conf=self.conf_thresh, verbose=False)[0]
+    def enqueue(self, stream, header, image):
+        # image: sensor_msgs/Image (decoded by the worker) or an already decoded BGR array
+        frame_idx = stream.frame_idx
+        stream.frame_idx += 1
+        if self.async_mode:
+            stream.frame_queue.put((frame_idx, header, image))                                                  # Never blocks, drops a frame if the worker is behind
+            self.frame_ready.set()
+        else:
+            self.process_batch([(stream, frame_idx, header, image)])
 
+    def worker_loop(self):
+        while self.running:
+            if not self.frame_ready.wait(timeout=0.5):                                                          # Timeout so stop() is noticed
+                continue
+            self.frame_ready.clear()
+            batch = []
+            for stream in self.streams:                                                                         # Newest frame of every stream that has one
+                item = stream.frame_queue.get(timeout=0)
+                if item is not None:
+                    batch.append((stream, *item))
+            if batch:
+                try:
+                    self.process_batch(batch)
+                except Exception:                                                                               # One bad frame / detector error must not end the worker
+                    self.worker_errors += 1
+                    self.metrics.count('worker_errors')
+                    frames = ', '.join(f'{stream.name}#{frame_idx}' for stream, frame_idx, _, _ in batch)
+                    self.get_logger().error(f'Batch [{frames}] failed, skipped:\n{traceback.format_exc()}')
+            if any(len(stream.frame_queue) for stream in self.streams):
+                self.frame_ready.set()                                                                          # Frames left over ('drop_newest', queue_size > 1)
+
+    def stop(self):
+        self.running = False
+        for stream in self.streams:
+            stream.frame_queue.close()
+        if self.worker is not None:
+            self.worker.join()
+
+    def process_batch(self, batch):
+        # batch: [(stream, frame_idx, header, image), ...], at most one frame per stream
+        m = self.metrics
+        with m.stage('total'):
+            # Convert ROS Images to OpenCV images (frames pushed in composed mode are already arrays)
+            with m.stage('decode'):
+                frames = [image if isinstance(image, np.ndarray) else self.bridge.imgmsg_to_cv2(image, desired_encoding='bgr8')
+                          for _, _, _, image in batch]
+
+            # Run YOLO inference, one call for the keyframes of all streams (every frame without scheduling)
+            keys = [stream.scheduler is None or stream.scheduler.is_keyframe() for stream, _, _, _ in batch]
+            results = iter(())
+            if any(keys):
+                with m.stage('detect'):
+                    start = time.perf_counter()
+                    results = iter(self.detector.predict([f for f, key in zip(frames, keys) if key], self.conf_thresh))   # One (N, 6) array per frame
+                    detect_s = time.perf_counter() - start
+                for (stream, _, _, _), key in zip(batch, keys):
+                    if key and stream.scheduler is not None:
+                        stream.scheduler.observe_latency(detect_s=detect_s)
+
+            for (stream, frame_idx, header, _), frame, key in zip(batch, frames, keys):
+                start = time.perf_counter()
+                self.process_stream_frame(stream, frame_idx, header, frame, next(results) if key else None)
+                if stream.scheduler is not None:
+                    stream.scheduler.observe_tracks(stream.tracker.motion())
+                    stream.scheduler.observe_latency(frame_s=time.perf_counter() - start)
+                    m.gauge('keyframe_interval' + stream.suffix, stream.scheduler.interval)
+
+        m.gauge('batch_size', len(batch))
+        m.gauge('queue_depth', sum(len(stream.frame_queue) for stream in self.streams))
+        m.gauge('dropped_frames', sum(stream.frame_queue.dropped for stream in self.streams))
+        for stream, _, header, _ in batch:
+            self.record_latency(stream, header)
+
+    def process_stream_frame(self, stream, frame_idx, header, frame, boxes_data):
+        # boxes_data = None: detection skipped (not a keyframe), the tracks coast on their prediction
+        m = self.metrics
+        bicycles = None
+        if boxes_data is None:
+            with m.stage('track'):
+                tracks = stream.tracker.coast()
+            filtered_detections = None
+        else:
+            with m.stage('cyclist_filter'):
+                filtered_detections, bicycles = self.filter_detections(boxes_data.tolist())
+
+            dets_np = np.array(filtered_detections, dtype=np.float32).reshape(-1, 6)                           # [x1, y1, x2, y2, conf, cls_id]
+
+            img_h, img_w = frame.shape[:2]
+            # BYTETracker expects (width, height)
+            with m.stage('track'):
+                tracks = stream.tracker.update(dets_np, img_info=(img_w, img_h), img_size=(img_w, img_h))
+        if stream.resolver is not None:
+            with m.stage('class_resolution'):
+                tracks = stream.resolver.resolve(tracks, None if bicycles is None else np.array(bicycles).reshape(-1, 4))
+
+        tracked_results = []
+        for t in tracks:
+            tracked_results.append({
+                'track_id': t.track_id,
+                'class_id': t.cls,
+                'score': t.score,
+                'bbox': [*t.tlbr]                                                                               # [x1, y1, x2, y2]
+            })
+
+        if stream.evaluator is not None:
+            self.evaluate_frame(stream, frame_idx, tracked_results)
+
+        with m.stage('publish_tracks'):
+            self.publish_tracks(stream, header, tracked_results)
+        if self.should_render(stream):
+            with m.stage('render'):
+                self.render(stream, frame, header, tracked_results)
+
+        if filtered_detections is not None:
+            m.gauge('detections' + stream.suffix, len(filtered_detections))
+            m.count('keyframes')
+        m.gauge('tracks' + stream.suffix, len(tracks))
+        m.count('frames')
+
+    def filter_detections(self, boxes_data):
+        # YOLO rows [x1, y1, x2, y2, conf, cls] -> ([x1, y1, x2, y2, conf, class] for pedestrians and cars, bicycle boxes)
+        # Cyclists are removed here only without class resolution, otherwise the resolver handles them per track
         # Collect detections by class
         person_dets = []
         bicycle_boxes = []
         car_dets = []
 
-        for det in results.boxes.data:
-            x1, y1, x2, y2, conf, cls = det.tolist()
+        for x1, y1, x2, y2, conf, cls in boxes_data:
             cls = int(cls)
             if cls == self.wanted_classes['person']:
                 person_dets.append((x1, y1, x2, y2, conf))
@@ -75,11 +358,10 @@ class TrackerNode(Node):
                 car_dets.append((x1, y1, x2, y2, conf))
 
         # Filter out cyclists: if person overlaps bicycle above threshold, consider cyclist (discard as person)
-        pedestrian_dets = []
-        for px1, py1, px2, py2, pconf in person_dets:
-            is_cyclist = any(self.compute_iou((px1, py1, px2, py2), b) > 0.9 for b in bicycle_boxes)
-            if not is_cyclist:
-                pedestrian_dets.append((px1, py1, px2, py2, pconf))
+        pedestrian_dets = person_dets
+        if not self.class_resolution:
+            is_cyclist = cyclist_mask(person_dets, bicycle_boxes, self.cyclist_iou_thresh)                     # All person x bicycle IoUs in one call
+            pedestrian_dets = [det for det, cyclist in zip(person_dets, is_cyclist) if not cyclist]
 
         # Prepare filtered detections for BYTETracker input
         filtered_detections = []
@@ -89,31 +371,40 @@ class TrackerNode(Node):
         # Add cars (class 2 for car)
         for det in car_dets:
             filtered_detections.append([*det[:4], det[4], CLASS_CAR])
+        return filtered_detections, bicycle_boxes
 
-        dets_np = np.array([d[:5] for d in filtered_detections], dtype=np.float32) if filtered_detections else np.empty((0,5), dtype=np.float32)
-
-        img_h, img_w = self.image_shape
-        # BYTETracker expects (width, height)
-        tracks = self.tracker.update(dets_np, img_info=(img_w, img_h), img_size=(img_w, img_h))
+    def publish_tracks(self, stream, header, tracked_results):
+        if stream.pub_tracks is None:
+            return
+        out = Detection2DArray()
+        out.header = header                                                                                     # Keep the input stamp / frame_id
+        for tr in tracked_results:
+            x1, y1, x2, y2 = tr['bbox']
+            det = Detection2D()
+            det.header = header
+            det.id = str(tr['track_id'])
+            det.bbox.center.position.x = (x1 + x2) / 2.0
+            det.bbox.center.position.y = (y1 + y2) / 2.0
+            det.bbox.size_x = x2 - x1
+            det.bbox.size_y = y2 - y1
+            hyp = ObjectHypothesisWithPose()
+            hyp.hypothesis.class_id = self.id_to_name.get(tr['class_id'], 'unknown')
+            hyp.hypothesis.score = tr['score']
+            det.results.append(hyp)
+            out.detections.append(det)
+        stream.pub_tracks.publish(out)
 
-        tracked_results = []
-        for t in tracks:
-            track_box = [*t.tlbr]                                                                               # [x1, y1, x2, y2]
-            best_iou = 0.0
-            best_class = -1
-            for det in filtered_detections:
-                iou = self.compute_iou(track_box, det[:4])
-                if iou > best_iou:                                                                              # Find the det box that has the max iou with the tracker box
-                    best_iou = iou
-                    best_class = int(det[5])                                                                    # Standard greedy assignment
-            # If no good match, fallback class is car (2)
-            class_id = best_class if best_iou > 0.3 else 2                                                      # Fallback to car
-            tracked_results.append({
-                'track_id': t.track_id,
-                'class_id': class_id,
-                'bbox': track_box
-            })
+    def should_render(self, stream):
+        if not self.render_enabled or stream.pub_image.get_subscription_count() == 0:                          # Nobody watching (e.g. RViz closed)
+            return False
+        now = self.get_clock().now()
+        if self.render_max_fps > 0 and stream.last_render_time is not None and \
+                (now - stream.last_render_time).nanoseconds < 1e9 / self.render_max_fps:
+            return False
+        stream.last_render_time = now
+        return True
 
+    def render(self, stream, frame, header, tracked_results):
         # Visualization
         vis_frame = frame.copy()
         for tr in tracked_results:
@@ -131,12 +422,70 @@ class TrackerNode(Node):
         
         # Convert and publish as ROS Image
         out_msg = self.bridge.cv2_to_imgmsg(vis_frame, encoding='bgr8')
-        self.pub_image.publish(out_msg)                                                                         # Publish Visualization
+        out_msg.header = header                                                                                 # Keep the input stamp / frame_id
+        stream.pub_image.publish(out_msg)                                                                       # Publish Visualization
+
+    def record_latency(self, stream, header):
+        # Input-to-output latency from the publisher's header stamp, logged with drop counts every stats_every frames
+        stream.processed += 1
+        latency = (self.get_clock().now() - Time.from_msg(header.stamp)).nanoseconds / 1e9
+        if stream.processed == 1:
+            self.metrics.gauge('startup.first_frame_latency_s' + stream.suffix, round(latency, 4))
+            self.get_logger().info(f"[{stream.name}] First frame processed, latency {1000 * latency:.1f} ms")
+        if not self.metrics.enabled:
+            return
+        name = 'end_to_end' + stream.suffix
+        self.metrics.observe(name, latency)
+        if stream.processed % self.stats_every == 0:
+            e2e = self.metrics.stats[name].summary()
+            self.get_logger().info(f"[{stream.name}] Processed {stream.processed} frames, dropped {stream.frame_queue.dropped} | "
+                                   f"latency ms: p50 {e2e['p50_ms']:.1f}, p95 {e2e['p95_ms']:.1f}, p99 {e2e['p99_ms']:.1f}, max {e2e['max_ms']:.1f}")
+
+    def publish_diagnostics(self):
+        # Timer callback: stage percentiles, gauges and counters as one DiagnosticStatus on /diagnostics
+        snap = self.metrics.snapshot()
+        status = DiagnosticStatus()
+        status.level = DiagnosticStatus.OK
+        status.name = 'tracker_node: pipeline'
+        status.hardware_id = 'tracker_node'
+        status.message = f"{snap['counters'].get('frames', 0)} frames processed"
+        if self.worker_errors:
+            status.level = DiagnosticStatus.WARN
+            status.message += f", {self.worker_errors} batches failed (see log)"
+        for stage, s in snap['stages'].items():
+            if s['count']:
+                for key in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms'):
+                    status.values.append(KeyValue(key=f"{stage}.{key}", value=f"{s[key]:.2f}"))
+        for name, value in {**snap['gauges'], **snap['counters']}.items():
+            status.values.append(KeyValue(key=name, value=str(value)))
+
+        diag = DiagnosticArray()
+        diag.header.stamp = self.get_clock().now().to_msg()
+        diag.status.append(status)
+        self.pub_diag.publish(diag)
+        if self.exporter is not None:
+            self.exporter.maybe_export()
+
+    def evaluate_frame(self, stream, frame_idx, tracked_results):
+        # Feed this frame's tracks to the stream's online evaluator, log running metrics and the final summary
+        evaluator = stream.evaluator
+        if frame_idx > evaluator.last_gt_frame:
+            return                                                                                              # Past the labelled sequence (publisher restarted)
+        preds = [tr for tr in tracked_results if tr['class_id'] in self.eval_class_ids]
+        evaluated = evaluator.update_frame(frame_idx, [tr['track_id'] for tr in preds], [tr['bbox'] for tr in preds])
+
+        if evaluated and evaluator.num_frames % self.eval_report_every == 0:
+            m = evaluator.running_metrics()
+            self.get_logger().info(f"Frame {frame_idx}: MOTA {100 * m['mota']:.1f}% IDF1 {100 * m['idf1']:.1f}% "
+                                   f"IDs {m['ids']} FP {m['fp']} FN {m['fn']}")
+        if frame_idx == evaluator.last_gt_frame:
+            self.get_logger().info("Sequence evaluated:\n" + evaluator.render())
 
 def main(args=None):
     rclpy.init(args=args)
     node = TrackerNode()
     rclpy.spin(node)
+    node.stop()
     node.destroy_node()
     cv2.destroyAllWindows()
     rclpy.shutdown()
@@ -0,0 +1,168 @@
+# Per-stage benchmark: decode -> detect -> cyclist filter -> track -> write
+# This piece of code does the following:
+# Times every pipeline stage separately (per frame), on two workloads:
+# 1) Replay: the bundled sequence, with a stub detector replaying input/detection_file/filtered_0000.txt
+#    (or real YOLOv8 inference when use_yolo = True and image_dir is available).
+# 2) Synthetic: generated scenes with 10 ... 500 moving objects per frame, to see how each stage scales with detection density.
+# Writes a JSON baseline (p50 / p95 / mean / max ms per stage) and compares against a previous baseline to flag regressions.
+
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import numpy as np
+import cv2
+from types import SimpleNamespace
+from contextlib import contextmanager
+from byte_tracker import BYTETracker
+from box_ops import cyclist_mask
+from bytetrack_tracker import load_detections
+from class_resolver import CYCLIST_IOU_THRESH                                                           # Shared cyclist threshold
+
+# Config
+image_dir = "/content/drive/MyDrive/kitti_tracking/data_tracking_image_2/training/image_02/0000"      # Optional, used for decode / YOLO
+det_file = "../input/detection_file/filtered_0000.txt"                                                  # Stub detector source
+use_yolo = False                                                                                        # True = time real YOLOv8 inference
+model_path = "yolov8s.pt"
+detector_backend = "torch"                                                                              # 'torch', 'onnx' or 'onnx_int8' (see detector.py)
+num_threads = None
+conf_thresh = 0.6
+cyclist_iou_thresh = CYCLIST_IOU_THRESH
+img_hw = (375, 1242)                                                                                    # KITTI frame size
+densities = [10, 50, 100, 200, 500]                                                                     # Objects per synthetic frame
+synthetic_frames = 50
+seed = 0
+output_json = "benchmark_results.json"
+baseline_json = None                                                                                    # e.g. "benchmark_baseline.json", None = no comparison
+regression_tolerance = 0.2                                                                              # Flag stages whose p50 is > 20% slower than baseline
+tracker_args = SimpleNamespace(track_thresh=0.5, track_buffer=30, match_thresh=0.8, mot20=False, min_box_area=100)
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}                                                                               # { stage: [seconds, ...] }
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        yield
+        self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+
+    def summary(self):
+        out = {}
+        for stage, values in self.samples.items():
+            ms = np.array(values) * 1000.0
+            out[stage] = {"n": len(ms), "mean_ms": float(ms.mean()), "p50_ms": float(np.percentile(ms, 50)),
+                          "p95_ms": float(np.percentile(ms, 95)), "max_ms": float(ms.max())}
+        return out
+
+def split_by_class(dets):
+    # (N, 6) [x1, y1, x2, y2, conf, cls] -> persons, bicycles, cars
+    cls = dets[:, 5]
+    return dets[cls == 0], dets[cls == 1], dets[cls == 2]
+
+def run_stages(timer, frames_dets, h, w, images=None, model=None):
+    # Runs filter -> track -> serialize for every frame, optional decode / YOLO when images / model are given
+    tracker = BYTETracker(tracker_args, frame_rate=30)
+    lines = []
+    for frame_id, dets in enumerate(frames_dets):
+        if images is not None:
+            with timer.time("decode"):
+                img = cv2.imread(images[frame_id])
+            if model is not None:
+                with timer.time("detect"):
+                    dets = model.predict([img], conf_thresh)[0]
+        if model is None:
+            with timer.time("detect_stub"):
+                dets = np.asarray(dets, dtype=np.float32).reshape(-1, 6)                                # Replayed / synthetic detections
+
+        with timer.time("cyclist_filter"):
+            persons, bicycles, cars = split_by_class(dets)
+            persons = persons[~cyclist_mask(persons, bicycles, cyclist_iou_thresh)]
+            kept = np.concatenate([persons, cars])
+
+        with timer.time("track"):
+            tracks = tracker.update(kept.astype(np.float32), img_info=(h, w), img_size=(h, w))           # Class IDs are carried by the tracker
+
+        with timer.time("serialize"):
+            for t in tracks:
+                x1, y1, x2, y2 = t.tlbr
+                lines.append(f"{frame_id} {t.track_id} {t.cls} 0 0 -1 {x1:.2f} {y1:.2f} {x2:.2f} {y2:.2f} 0 0 0 0")
+    with timer.time("write"):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt") as f:
+            f.write("\n".join(lines))
+            f.flush()
+    return len(lines)
+
+def synthetic_scene(num_objects, num_frames, h, w, rng):
+    # Objects moving with constant velocity + detection jitter, ~10% of persons ride a bicycle (overlapping box)
+    size = rng.uniform([20, 40], [120, 160], size=(num_objects, 2))                                     # (width, height)
+    pos = rng.uniform([0, 0], [w - 120, h - 160], size=(num_objects, 2))
+    vel = rng.normal(0, 3, size=(num_objects, 2))
+    cls = rng.choice([0, 2], size=num_objects)
+    cyclist = (cls == 0) & (rng.random(num_objects) < 0.1)
+    frames = []
+    for _ in range(num_frames):
+        pos = np.clip(pos + vel, 0, [w - 120, h - 160])
+        boxes = np.concatenate([pos, pos + size], axis=1) + rng.normal(0, 1.0, size=(num_objects, 4))
+        conf = rng.uniform(0.5, 0.95, size=num_objects)
+        dets = np.column_stack([boxes, conf, cls])
+        bikes = dets[cyclist].copy()
+        bikes[:, 1] += 0.3 * size[cyclist, 1]                                                           # Bicycle = lower part of the rider box
+        bikes[:, 5] = 1
+        frames.append(np.concatenate([dets, bikes]).astype(np.float32))
+    return frames
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for workload, stages in results["workloads"].items():
+        for stage, stats in stages.items():
+            base = baseline.get("workloads", {}).get(workload, {}).get(stage)
+            if base and stats["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+                regressions.append(f"{workload}/{stage}: p50 {stats['p50_ms']:.3f} ms vs baseline {base['p50_ms']:.3f} ms")
+    return regressions
+
+if __name__ == "__main__":
+    h, w = img_hw
+    results = {"meta": {"python": platform.python_version(), "numpy": np.__version__, "cpu_count": os.cpu_count(),
+                        "platform": platform.platform(), "time": time.strftime("%Y-%m-%d %H:%M:%S")},
+               "workloads": {}}
+
+    # 1) Replay of the bundled sequence
+    frame_detections = load_detections(det_file, allowed_class_ids=(0, 1, 2))
+    num_frames = max(frame_detections) + 1
+    frames_dets = [frame_detections.get(i, []) for i in range(num_frames)]
+    images = None
+    model = None
+    if os.path.isdir(image_dir):
+        images = [os.path.join(image_dir, f) for f in sorted(os.listdir(image_dir)) if f.endswith(".png")][:num_frames]
+        if use_yolo:
+            from detector import load_detector
+            model = load_detector(detector_backend, model_path, num_threads=num_threads)
+    timer = StageTimer()
+    run_stages(timer, frames_dets, h, w, images=images, model=model)
+    results["workloads"]["replay_0000"] = timer.summary()
+
+    # 2) Synthetic scaling over detection density
+    rng = np.random.default_rng(seed)
+    for n in densities:
+        timer = StageTimer()
+        run_stages(timer, synthetic_scene(n, synthetic_frames, h, w, rng), h, w)
+        results["workloads"][f"synthetic_{n}"] = timer.summary()
+
+    for workload, stages in results["workloads"].items():
+        print(f"\n{workload}")
+        for stage, stats in stages.items():
+            print(f"  {stage:<15} p50 {stats['p50_ms']:8.3f} ms  p95 {stats['p95_ms']:8.3f} ms  mean {stats['mean_ms']:8.3f} ms")
+
+    with open(output_json, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved benchmark results to: {output_json}")
+
+    if baseline_json:
+        with open(baseline_json) as f:
+            regressions = compare(results, json.load(f), regression_tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,120 @@
+# Resolution / tiling benchmark: detector throughput vs recall per object size
+# This piece of code does the following:
+# Runs the detector over one sequence for every input setting: input long side (rectangular input with the frames' aspect
+# ratio, detector.input_size) x number of overlapping horizontal tiles (detector.TiledDetector, all tiles in one batch).
+# Matches the filtered detections (same conf / cyclist filter as yolov8_detect.py) one-to-one with the KITTI labels of the same
+# class (Car <-> car, Pedestrian <-> person, IoU >= match_iou) and reports recall per GT box height, overall recall / precision
+# and frames/sec. Prints one table, saves it as CSV and picks the cheapest (fastest) setting whose recall in target_bucket
+# meets recall_target.
+
+# Note:
+# Height buckets follow the KITTI difficulty levels (25 px = smallest 'hard' box, 40 px = smallest 'easy' box).
+# Other label classes (Van, Cyclist, DontCare, ...) are ignored, so detections on them count against precision.
+
+import cv2
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from box_ops import iou_matrix
+from box_store import load_records, KITTI_CLASS_TO_ID
+from detector import load_detector, input_size
+from yolov8_detect import list_frames, prefetch_batches, detect_sequence
+from bytetrack_tracker import parse_detection_lines
+from class_resolver import CYCLIST_IOU_THRESH
+
+# Config
+model_path = "yolov8s.pt"
+backend = "torch"                                                                                       # 'torch', 'onnx' or 'onnx_int8' (see detector.py)
+num_threads = None
+image_dir = "/content/drive/MyDrive/kitti_tracking/data_tracking_image_2/training/image_02/0000"
+gt_file = "../input/kitti_label/0000.txt"
+conf_thresh = 0.6
+cyclist_iou_thresh = CYCLIST_IOU_THRESH
+batch_size = 8                                                                                          # Frames per predict call (x tiles inputs)
+long_sides = [480, 640, 960, 1280]                                                                      # Model input long side
+tile_counts = [1, 2, 3]                                                                                 # Horizontal tiles per frame, 1 = whole frame
+tile_overlap = 0.2
+full_frame = False                                                                                      # Tiled settings also run the whole frame
+match_iou = 0.5
+gt_classes = {"Car": 2, "Pedestrian": 0}                                                                # KITTI label -> detection class
+height_bins = [0, 25, 40, 80, np.inf]                                                                   # GT box height buckets (px)
+bucket_names = ["<25", "25-40", "40-80", ">=80"]
+recall_target = 0.8
+target_bucket = "all"                                                                                   # 'all' or one of bucket_names
+output_csv = "resolution_benchmark.csv"
+
+def load_gt_frames(gt_file):
+    # KITTI labels -> { frame_id: ((N, 4) boxes, (N,) detection classes) } for the classes in gt_classes
+    records = load_records(gt_file, "kitti_labels")
+    to_det = {KITTI_CLASS_TO_ID[name]: cls for name, cls in gt_classes.items()}
+    records = records[np.isin(records["cls"], list(to_det))]
+    classes = np.array([to_det[c] for c in records["cls"]], dtype=np.int64)
+    frames = {}
+    for frame_id in np.unique(records["frame"]):
+        m = records["frame"] == frame_id
+        frames[int(frame_id)] = (np.asarray(records["box"][m], dtype=np.float64), classes[m])
+    return frames
+
+def match_frame(gt_boxes, gt_cls, dets, iou_thresh):
+    # One-to-one same-class matching (max total IoU) -> True for every GT box found by a detection
+    iou = iou_matrix(gt_boxes, dets)
+    iou[gt_cls[:, None] != dets[:, 5][None, :]] = 0.0                                                   # Only same-class pairs can match
+    found = np.zeros(len(gt_boxes), dtype=bool)
+    if iou.size:
+        rows, cols = linear_sum_assignment(iou, maximize=True)
+        found[rows[iou[rows, cols] >= iou_thresh]] = True
+    return found
+
+def recall_by_size(gt, frame_detections, num_frames):
+    heights, found, num_dets = [], [], 0
+    for frame_id in range(num_frames):
+        dets = np.array(frame_detections.get(frame_id, []), dtype=np.float64).reshape(-1, 6)
+        num_dets += len(dets)
+        if frame_id in gt:
+            boxes, classes = gt[frame_id]
+            heights.append(boxes[:, 3] - boxes[:, 1])
+            found.append(match_frame(boxes, classes, dets, match_iou))
+    heights, found = np.concatenate(heights), np.concatenate(found)
+    bucket = np.digitize(heights, height_bins[1:-1])
+    row = {"recall_all": found.mean(), "precision": found.sum() / num_dets if num_dets else 1.0}
+    for i, name in enumerate(bucket_names):
+        in_bucket = bucket == i
+        row[f"recall_{name}"] = found[in_bucket].mean() if in_bucket.any() else np.nan
+        row[f"gt_{name}"] = int(in_bucket.sum())
+    return row
+
+def run_setting(long_side, tiles, frame_paths, frame_hw, gt):
+    imgsz = input_size(frame_hw, long_side, tiles, tile_overlap)
+    detector = load_detector(backend, model_path, num_threads=num_threads, imgsz=imgsz, tiles=tiles, tile_overlap=tile_overlap,
+                             full_frame=full_frame)
+    detector.predict(next(prefetch_batches(frame_paths, batch_size, 1)), conf_thresh)                  # Warm-up, not timed
+    lines, fps = detect_sequence(detector, frame_paths, conf_thresh, cyclist_iou_thresh, batch_size=batch_size)
+    frame_detections = parse_detection_lines(lines)
+    return {"long_side": long_side, "tiles": tiles, "input": f"{imgsz[0]}x{imgsz[1]}", "fps": fps, "detections": len(lines),
+            **recall_by_size(gt, frame_detections, len(frame_paths))}
+
+if __name__ == "__main__":
+    frame_paths = list_frames(image_dir)
+    frame_hw = cv2.imread(frame_paths[0]).shape[:2]
+    gt = load_gt_frames(gt_file)
+
+    rows = []
+    for long_side in long_sides:
+        for tiles in tile_counts:
+            row = run_setting(long_side, tiles, frame_paths, frame_hw, gt)
+            rows.append(row)
+            print(f"long side {long_side}, {tiles} tile(s), input {row['input']}: {row['fps']:.1f} frames/sec, "
+                  f"recall {100 * row['recall_all']:.1f}%")
+
+    table = pd.DataFrame(rows).sort_values("fps", ascending=False)
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    table.to_csv(output_csv, index=False)
+    print(f"Saved benchmark to: {output_csv}")
+
+    meets = table[table[f"recall_{target_bucket}"] >= recall_target]
+    if len(meets):
+        best = meets.iloc[0]
+        print(f"Cheapest setting with recall_{target_bucket} >= {recall_target:.2f}: long side {best['long_side']}, "
+              f"{best['tiles']} tile(s) ({best['input']}), {best['fps']:.1f} frames/sec")
+    else:
+        print(f"WARNING no setting reaches recall_{target_bucket} >= {recall_target:.2f}")
@@ -0,0 +1,128 @@
+# Startup benchmark: import time and first-frame latency of the tracker node's startup path
+# This piece of code does the following:
+# Measures, each in a fresh Python process (cold caches, nothing imported yet) and as the median of 'repeats' runs:
+# 1) Import time of every module tracker_node.py imports at load, of all of them together, and of the heavy libraries
+#    that are only imported on demand (detector backends, motmetrics for online evaluation).
+# 2) Detector cold start: model load, the first inference on a fresh model (what the first real frame would pay
+#    without warm-up), detector.warm_up() and the inference right after it (what the first frame pays with warm-up).
+# Writes a JSON baseline and compares against a previous one to flag regressions (same layout as benchmark_pipeline.py).
+
+# Note:
+# Modules that are not installed (e.g. rclpy / cv_bridge outside a ROS 2 environment) are reported as null and skipped.
+# The detector part needs the configured backend (torch / ultralytics or onnxruntime) and model.
+
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import numpy as np
+
+# Config
+model_path = "yolov8s.pt"
+detector_backend = "torch"                                                                              # 'torch', 'onnx' or 'onnx_int8' (see detector.py)
+num_threads = None
+conf_thresh = 0.6
+frame_shape = (375, 1242, 3)                                                                            # KITTI frame size
+warmup_runs = 2                                                                                         # Same as TrackerNode.warmup_runs
+node_imports = ["numpy", "cv2", "scipy.optimize", "byte_tracker", "detector", "detection_scheduler", "box_ops",
+                "frame_queue", "instrumentation", "rclpy", "cv_bridge"]                                 # Imported when tracker_node.py loads
+lazy_imports = ["mot_eval", "torch", "ultralytics", "onnxruntime"]                                      # Imported on demand
+repeats = 3                                                                                             # Fresh processes per measurement
+output_json = "startup_results.json"
+baseline_json = None                                                                                    # e.g. "startup_baseline.json", None = no comparison
+regression_tolerance = 0.2                                                                              # Flag timings > 20% slower than baseline
+
+IMPORT_CODE = """
+import time, json, importlib
+start = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module(name)
+print(json.dumps({{"import_s": time.perf_counter() - start}}))
+"""
+
+DETECTOR_CODE = """
+import time, json
+import numpy as np
+start = time.perf_counter()
+from detector import load_detector, warm_up
+detector = load_detector({backend!r}, {model_path!r}, num_threads={num_threads!r})
+out = {{"model_load_s": time.perf_counter() - start}}
+frame = np.full({frame_shape!r}, 114, dtype=np.uint8)
+start = time.perf_counter()
+detector.predict([frame], {conf!r})
+out["first_inference_s"] = time.perf_counter() - start
+detector = load_detector({backend!r}, {model_path!r}, num_threads={num_threads!r})                   # Fresh model, as the node warms it up
+start = time.perf_counter()
+warm_up(detector, {frame_shape!r}, runs={warmup_runs!r}, conf={conf!r})
+out["warmup_s"] = time.perf_counter() - start
+start = time.perf_counter()
+detector.predict([frame], {conf!r})
+out["first_frame_after_warmup_s"] = time.perf_counter() - start
+print(json.dumps(out))
+"""
+
+def run_fresh(code):
+    # Runs code in a new interpreter (in scripts/), returns its JSON output or None if it failed
+    proc = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def median_fresh(code, repeats):
+    # { key: median seconds } over 'repeats' fresh processes, None if the code can't run here
+    runs = [run_fresh(code) for _ in range(repeats)]
+    if any(r is None for r in runs):
+        return None
+    return {key: float(np.median([r[key] for r in runs])) for key in runs[0]}
+
+def import_time(modules, repeats):
+    result = median_fresh(IMPORT_CODE.format(modules=list(modules)), repeats)
+    return None if result is None else result["import_s"]
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for section in ("imports", "startup"):
+        for name, value in results[section].items():
+            base = baseline.get(section, {}).get(name)
+            if value is not None and base and value > base * (1 + tolerance):
+                regressions.append(f"{section}/{name}: {1000 * value:.1f} ms vs baseline {1000 * base:.1f} ms")
+    return regressions
+
+if __name__ == "__main__":
+    results = {"meta": {"python": platform.python_version(), "cpu_count": os.cpu_count(), "platform": platform.platform(),
+                        "backend": detector_backend, "time": time.strftime("%Y-%m-%d %H:%M:%S")},
+               "imports": {}, "startup": {}}
+
+    # 1) Import times
+    for name in node_imports + lazy_imports:
+        results["imports"][name] = import_time([name], repeats)
+    available = [name for name in node_imports if results["imports"][name] is not None]
+    results["imports"]["node_total"] = import_time(available, repeats)                                  # Everything tracker_node.py loads eagerly
+
+    # 2) Detector cold start and first-frame latency
+    code = DETECTOR_CODE.format(backend=detector_backend, model_path=model_path, num_threads=num_threads, conf=conf_thresh,
+                                frame_shape=tuple(frame_shape), warmup_runs=warmup_runs)
+    startup = median_fresh(code, repeats)
+    if startup is None:
+        print(f"WARNING detector backend '{detector_backend}' could not run here, startup section skipped")
+    else:
+        startup["cold_start_s"] = results["imports"]["node_total"] + startup["model_load_s"] + startup["warmup_s"]
+        results["startup"] = startup
+
+    for section in ("imports", "startup"):
+        print(f"\n{section}")
+        for name, value in results[section].items():
+            print(f"  {name:<28} {'n/a' if value is None else f'{1000 * value:9.1f} ms'}")
+
+    with open(output_json, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved startup results to: {output_json}")
+
+    if baseline_json:
+        with open(baseline_json) as f:
+            regressions = compare(results, json.load(f), regression_tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r}")
+        sys.exit(1 if regressions else 0)
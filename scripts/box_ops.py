@@ -0,0 +1,51 @@
+# Shared box operations (vectorized with NumPy)
+# This module does the following:
+# Computes the full N x M IoU matrix between two sets of boxes in one batched call (no per-pair Python loop).
+# Flags persons that overlap a bicycle above a threshold (cyclist filter).
+#
+# All boxes are [x1, y1, x2, y2] (top-left, bottom-right), extra columns (conf, cls) are ignored.
+# Used by yolov8_detect.py, bytetrack_tracker.py and deployment_with_ROS2/tracker_node.py.
+
+import numpy as np
+
+CLASS_PEDESTRIAN = 0                                                                                    # COCO person
+CLASS_BICYCLE = 1                                                                                       # COCO bicycle (only used for the cyclist filter)
+CLASS_CAR = 2                                                                                           # COCO car
+
+def as_boxes(boxes):
+    # Any list / tuple / array of boxes -> float64 array of shape (N, 4)
+    arr = np.asarray(boxes, dtype=np.float64)
+    if arr.size == 0:
+        return np.empty((0, 4), dtype=np.float64)
+    return arr.reshape(len(arr), -1)[:, :4]
+
+def box_area(boxes, pixel_offset=0.0):
+    boxes = as_boxes(boxes)
+    return (boxes[:, 2] - boxes[:, 0] + pixel_offset) * (boxes[:, 3] - boxes[:, 1] + pixel_offset)      # (x2-x1) * (y2-y1)
+
+def iou_matrix(boxes_a, boxes_b, pixel_offset=0.0):
+    # Returns iou[i][j] = IoU between boxes_a[i] and boxes_b[j], shape (N, M)
+    # pixel_offset=1.0 counts both edges as pixels (width = x2 - x1 + 1), like cython_bbox used by BYTETrack
+    a = as_boxes(boxes_a)
+    b = as_boxes(boxes_b)
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float64)
+
+    # Broadcast (N, 1) against (1, M): max for x1, y1 and min for x2, y2
+    xi1 = np.maximum(a[:, None, 0], b[None, :, 0])                                                      # Top-left of intersection
+    yi1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    xi2 = np.minimum(a[:, None, 2], b[None, :, 2])                                                      # Bottom-right of intersection
+    yi2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(xi2 - xi1 + pixel_offset, 0, None) * np.clip(yi2 - yi1 + pixel_offset, 0, None)     # Width x height, 0 if no overlap
+
+    union = box_area(a, pixel_offset)[:, None] + box_area(b, pixel_offset)[None, :] - inter
+    iou = np.zeros_like(inter)
+    np.divide(inter, union, out=iou, where=union > 0)                                                   # IoU = 0 where union is degenerate
+    return iou
+
+def cyclist_mask(person_boxes, bicycle_boxes, iou_thresh):
+    # True for every person whose IoU with any bicycle is above iou_thresh (cyclist, discard as pedestrian)
+    iou = iou_matrix(person_boxes, bicycle_boxes)
+    if iou.shape[1] == 0:
+        return np.zeros(iou.shape[0], dtype=bool)
+    return (iou > iou_thresh).any(axis=1)
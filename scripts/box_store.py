@@ -0,0 +1,183 @@
+# Binary columnar storage for detections, tracks and KITTI labels
+# This piece of code does the following:
+# Stores boxes as a NumPy structured array (one record per box, sorted by frame) in a '.npy' file.
+# A frame-offset index ('.idx.npy') gives the records of frame f as records[offsets[f]:offsets[f + 1]].
+# Both files are memory-mapped on load, so one frame's boxes are a zero-copy slice (no text parsing, no Python lists).
+# Converts to / from the current text formats (BYTETrack detections, tracker output, KITTI labels).
+
+# Record layout:
+# BOX_DTYPE (detections, tracks):  frame, track_id (-1 for detections), cls (COCO ID), conf, box [x1, y1, x2, y2] (float32)
+# LABEL_DTYPE (KITTI labels):      frame, track_id, cls (index in KITTI_CLASSES), trunc, occ, alpha, box, dims, loc, rot_y (float64,
+#                                  so the 6-decimal text round-trips exactly)
+
+# Example:
+# store = BoxStore("tracks_0000.npy")
+# store.boxes(12)           -> (N, 4) view of frame 12's boxes
+# store.frame(12)["track_id"] -> (N,) view of its track IDs
+
+import os
+import numpy as np
+
+# Config (used when run as a script: converts the bundled text files)
+input_dir = "../input"
+conversions = [                                                                                         # (text file, format, output .npy)
+    ("detection_file/filtered_0000.txt", "detections", "detection_file/filtered_0000.npy"),
+    ("tracker_file/0000.txt", "tracks", "tracker_file/0000.npy"),
+    ("kitti_label/0000.txt", "kitti_labels", "kitti_label/0000.npy"),
+]
+
+KITTI_CLASSES = ["Car", "Van", "Truck", "Pedestrian", "Person_sitting", "Cyclist", "Tram", "Misc", "DontCare"]
+KITTI_CLASS_TO_ID = {name: i for i, name in enumerate(KITTI_CLASSES)}
+
+BOX_DTYPE = np.dtype([
+    ("frame", np.int32),
+    ("track_id", np.int32),
+    ("cls", np.int16),
+    ("conf", np.float32),
+    ("box", np.float32, (4,)),                                                                          # x1, y1, x2, y2
+])
+
+LABEL_DTYPE = np.dtype([
+    ("frame", np.int32),
+    ("track_id", np.int32),
+    ("cls", np.int16),
+    ("trunc", np.int16),
+    ("occ", np.int16),
+    ("alpha", np.float64),
+    ("box", np.float64, (4,)),                                                                          # left, top, right, bottom
+    ("dims", np.float64, (3,)),                                                                         # height, width, length
+    ("loc", np.float64, (3,)),                                                                          # x, y, z (camera coordinates)
+    ("rot_y", np.float64),
+])
+
+def index_path(path):
+    return path[:-len(".npy")] + ".idx.npy"
+
+def build_frame_offsets(frames, num_frames=None):
+    # frames must be sorted. offsets[f]..offsets[f + 1] = records of frame f (empty range if no boxes)
+    if num_frames is None:
+        num_frames = int(frames[-1]) + 1 if len(frames) else 0
+    return np.searchsorted(frames, np.arange(num_frames + 1), side="left").astype(np.int64)
+
+def save_store(path, records, num_frames=None):
+    order = np.argsort(records["frame"], kind="stable")                                                 # Keep per-frame order of the source
+    records = records[order]
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.save(path, records)
+    np.save(index_path(path), build_frame_offsets(records["frame"], num_frames))
+
+class BoxStore:
+    def __init__(self, path, mmap=True):
+        mode = "r" if mmap else None
+        self.records = np.load(path, mmap_mode=mode)
+        self.offsets = np.load(index_path(path), mmap_mode=mode)
+
+    @property
+    def num_frames(self):
+        return len(self.offsets) - 1
+
+    def __len__(self):
+        return len(self.records)
+
+    def frame(self, frame_id):
+        # Structured records of one frame (zero-copy slice), empty for frames outside the index
+        if frame_id < 0 or frame_id >= self.num_frames:
+            return self.records[:0]
+        return self.records[self.offsets[frame_id]:self.offsets[frame_id + 1]]
+
+    def boxes(self, frame_id):
+        return self.frame(frame_id)["box"]                                                              # (N, 4) view
+
+    def frames(self):
+        # Yields (frame_id, records) for every frame in order, including empty ones
+        for frame_id in range(self.num_frames):
+            yield frame_id, self.frame(frame_id)
+
+# Text -> records
+def detections_to_records(lines):
+    # BYTETrack detection lines: frame_id,-1,x1,y1,x2,y2,score,class_id
+    rows = [line.strip().split(',') for line in lines if line.strip()]
+    records = np.zeros(len(rows), dtype=BOX_DTYPE)
+    if rows:
+        cols = np.array(rows, dtype=np.float64)
+        records["frame"] = cols[:, 0]
+        records["track_id"] = cols[:, 1]
+        records["box"] = cols[:, 2:6]
+        records["conf"] = cols[:, 6]
+        records["cls"] = cols[:, 7]
+    return records
+
+def tracks_to_records(lines):
+    # Tracker output lines: frame_id track_id class_id 0 0 -1 x1 y1 x2 y2 0 0 0 0
+    rows = [line.split() for line in lines if line.strip()]
+    records = np.zeros(len(rows), dtype=BOX_DTYPE)
+    if rows:
+        cols = np.array([r[:10] for r in rows], dtype=np.float64)
+        records["frame"] = cols[:, 0]
+        records["track_id"] = cols[:, 1]
+        records["cls"] = cols[:, 2]
+        records["conf"] = 1.0                                                                           # Tracker output has no score
+        records["box"] = cols[:, 6:10]
+    return records
+
+def kitti_labels_to_records(lines):
+    # KITTI label lines: frame track_id type trunc occ alpha left top right bottom h w l x y z rot_y
+    rows = [line.split() for line in lines if line.strip()]
+    records = np.zeros(len(rows), dtype=LABEL_DTYPE)
+    if rows:
+        records["cls"] = [KITTI_CLASS_TO_ID[r[2]] for r in rows]
+        cols = np.array([r[:2] + r[3:17] for r in rows], dtype=np.float64)
+        records["frame"] = cols[:, 0]
+        records["track_id"] = cols[:, 1]
+        records["trunc"] = cols[:, 2]
+        records["occ"] = cols[:, 3]
+        records["alpha"] = cols[:, 4]
+        records["box"] = cols[:, 5:9]
+        records["dims"] = cols[:, 9:12]
+        records["loc"] = cols[:, 12:15]
+        records["rot_y"] = cols[:, 15]
+    return records
+
+# Records -> text (same formatting as yolov8_detect.py / bytetrack_tracker.py / KITTI)
+def records_to_detection_lines(records):
+    return [f"{r['frame']},-1,{r['box'][0]:.2f},{r['box'][1]:.2f},{r['box'][2]:.2f},{r['box'][3]:.2f},{r['conf']:.2f},{r['cls']}\n"
+            for r in records]
+
+def records_to_track_lines(records):
+    return [f"{r['frame']} {r['track_id']} {r['cls']} 0 0 -1 {r['box'][0]:.2f} {r['box'][1]:.2f} {r['box'][2]:.2f} {r['box'][3]:.2f} 0 0 0 0"
+            for r in records]
+
+def records_to_kitti_label_lines(records):
+    lines = []
+    for r in records:
+        floats = [r["alpha"], *r["box"], *r["dims"], *r["loc"], r["rot_y"]]
+        lines.append(f"{r['frame']} {r['track_id']} {KITTI_CLASSES[r['cls']]} {r['trunc']} {r['occ']} "
+                     + " ".join(f"{v:.6f}" for v in floats) + "\n")
+    return lines
+
+TEXT_TO_RECORDS = {"detections": detections_to_records, "tracks": tracks_to_records, "kitti_labels": kitti_labels_to_records}
+
+def convert_text_file(text_path, fmt, npy_path):
+    with open(text_path, "r") as f:
+        records = TEXT_TO_RECORDS[fmt](f)
+    save_store(npy_path, records)
+    return records
+
+def frame_array(records, fields):
+    # One frame's records (e.g. BoxStore.frame) -> (N, k) float64 array of the given fields ('box' = 4 columns), rows in
+    # the same layout as the text readers' lists, built column by column without per-box Python objects
+    return np.column_stack([records[name].reshape(len(records), -1) for name in fields]).astype(np.float64, copy=False)
+
+def load_records(path, fmt):
+    # Whole file as records, from '.npy' (memory-mapped) or from the text format
+    if path.endswith(".npy"):
+        return BoxStore(path).records
+    with open(path, "r") as f:
+        return TEXT_TO_RECORDS[fmt](f)
+
+if __name__ == "__main__":
+    for text_name, fmt, npy_name in conversions:
+        text_path = os.path.join(input_dir, text_name)
+        npy_path = os.path.join(input_dir, npy_name)
+        records = convert_text_file(text_path, fmt, npy_path)
+        print(f"{text_path} -> {npy_path} ({len(records)} records, {os.path.getsize(text_path)} -> {os.path.getsize(npy_path)} bytes)")
@@ -0,0 +1,307 @@
+# Array-backed BYTETrack (drop-in for yolox.tracker.byte_tracker.BYTETracker)
+# This module does the following:
+# Keeps all track state in struct-of-arrays NumPy buffers (one row per track) instead of one STrack object per track.
+# Runs the Kalman predict for all tracks, and the Kalman update for all matched tracks, as one batched operation per frame.
+# Carries the class label of the matched detection through association, so no post-hoc IoU class re-matching is needed.
+# Same association steps as BYTETrack: high-score matching (score-fused IoU), low-score rescue, unconfirmed tracks,
+# new tracks, lost-track buffer and duplicate removal. IDs start at 1 for every tracker instance.
+# coast() advances tracks on frames where detection was skipped (keyframe scheduling, see detection_scheduler.py).
+# Needs only NumPy + SciPy (no yolox, cython_bbox, lap or np.float patch).
+
+# Note:
+# 1) Input rows are [x1, y1, x2, y2, score] or [x1, y1, x2, y2, score, cls] (yolox reads a 6th column as an objectness factor,
+#    here it is the class label). Without a class column, tracks get cls = -1.
+# 2) Rows are ordered [tracked tracks..., lost tracks...] in the same order as yolox's tracked_stracks / lost_stracks lists,
+#    so assignment ties, output order and IDs match yolox (checked against input/tracker_file/0000.txt, see __main__).
+# 3) yolox quirks are kept on purpose for ID equivalence:
+#    IoU counts box edges as pixels (+1, cython_bbox), a timed-out lost track stays matchable for one more frame,
+#    and a track that was ever removed is dropped (not kept as lost) the next time it gets lost.
+
+import numpy as np
+from collections import namedtuple
+from scipy.optimize import linear_sum_assignment                                                        # Replaces lap.lapjv
+from box_ops import iou_matrix
+
+TRACKED, LOST, REMOVED = 1, 2, 3
+TrackView = namedtuple("TrackView", ["track_id", "tlbr", "score", "cls"])                                # What update() returns per track
+
+# Kalman filter on (center x, center y, aspect ratio, height) + velocities, constant velocity model (same noise as yolox)
+STD_WEIGHT_POSITION = 1.0 / 20
+STD_WEIGHT_VELOCITY = 1.0 / 160
+MOTION_MAT = np.eye(8)
+MOTION_MAT[:4, 4:] = np.eye(4)                                                                          # x += vx (dt = 1 frame)
+
+def kalman_initiate(xyah):
+    # (N, 4) measurements -> (N, 8) means, (N, 8, 8) covariances
+    h = xyah[:, 3]
+    mean = np.concatenate([xyah, np.zeros_like(xyah)], axis=1)
+    std = np.stack([2 * STD_WEIGHT_POSITION * h, 2 * STD_WEIGHT_POSITION * h, np.full_like(h, 1e-2), 2 * STD_WEIGHT_POSITION * h,
+                    10 * STD_WEIGHT_VELOCITY * h, 10 * STD_WEIGHT_VELOCITY * h, np.full_like(h, 1e-5), 10 * STD_WEIGHT_VELOCITY * h], axis=1)
+    return mean, _diag(std ** 2)
+
+def kalman_predict(mean, cov):
+    h = mean[:, 3]
+    std = np.stack([STD_WEIGHT_POSITION * h, STD_WEIGHT_POSITION * h, np.full_like(h, 1e-2), STD_WEIGHT_POSITION * h,
+                    STD_WEIGHT_VELOCITY * h, STD_WEIGHT_VELOCITY * h, np.full_like(h, 1e-5), STD_WEIGHT_VELOCITY * h], axis=1)
+    mean = mean @ MOTION_MAT.T
+    cov = MOTION_MAT @ cov @ MOTION_MAT.T + _diag(std ** 2)
+    return mean, cov
+
+def kalman_update(mean, cov, xyah):
+    # Batched correction with (N, 4) measurements, the measurement matrix just picks the first 4 state entries
+    h = mean[:, 3]
+    std = np.stack([STD_WEIGHT_POSITION * h, STD_WEIGHT_POSITION * h, np.full_like(h, 1e-1), STD_WEIGHT_POSITION * h], axis=1)
+    projected_cov = cov[:, :4, :4] + _diag(std ** 2)
+    gain = np.linalg.solve(projected_cov, cov[:, :4, :]).transpose(0, 2, 1)                            # K = P H^T S^-1, S is symmetric
+    innovation = xyah - mean[:, :4]
+    mean = mean + np.einsum("nij,nj->ni", gain, innovation)
+    cov = cov - gain @ projected_cov @ gain.transpose(0, 2, 1)
+    return mean, cov
+
+def _diag(values):
+    out = np.zeros(values.shape + values.shape[-1:], dtype=values.dtype)
+    idx = np.arange(values.shape[-1])
+    out[:, idx, idx] = values
+    return out
+
+def tlwh_to_xyah(tlwh):
+    xyah = tlwh.copy()
+    xyah[:, :2] += xyah[:, 2:] / 2
+    xyah[:, 2] /= xyah[:, 3]
+    return xyah
+
+def mean_to_tlbr(mean):
+    tlbr = mean[:, :4].copy()
+    tlbr[:, 2] *= tlbr[:, 3]                                                                            # a * h = w
+    tlbr[:, :2] -= tlbr[:, 2:] / 2
+    tlbr[:, 2:] += tlbr[:, :2]
+    return tlbr
+
+def iou_distance(boxes_a, boxes_b):
+    return 1.0 - iou_matrix(boxes_a, boxes_b, pixel_offset=1.0)
+
+def linear_assignment(cost, thresh):
+    # Optimal matching where only pairs with cost < thresh may match (same optimum as lap.lapjv(extend_cost, cost_limit))
+    # Returns matches (K, 2), unmatched rows, unmatched columns
+    rows, cols = cost.shape
+    if cost.size == 0:
+        return np.empty((0, 2), dtype=np.int64), np.arange(rows), np.arange(cols)
+    row_idx, col_idx = linear_sum_assignment(np.minimum(cost - thresh, 0.0))                            # A pair gains (thresh - cost), never < 0
+    keep = cost[row_idx, col_idx] < thresh
+    matches = np.stack([row_idx[keep], col_idx[keep]], axis=1)
+    return matches, np.setdiff1d(np.arange(rows), matches[:, 0]), np.setdiff1d(np.arange(cols), matches[:, 1])
+
+class BYTETracker:
+    FIELDS = ("mean", "cov", "track_id", "state", "activated", "score", "cls", "last_frame", "start_frame", "was_removed")
+
+    def __init__(self, args, frame_rate=30):
+        self.args = args
+        self.det_thresh = args.track_thresh + 0.1                                                       # Min score to start a new track
+        self.max_time_lost = int(frame_rate / 30.0 * args.track_buffer)
+        self.frame_id = 0
+        self.next_id = 1
+        self.num_tracked = 0                                                                            # Rows [:num_tracked] are tracked, the rest lost
+        self.mean = np.empty((0, 8))
+        self.cov = np.empty((0, 8, 8))
+        self.track_id = np.empty(0, dtype=np.int64)
+        self.state = np.empty(0, dtype=np.int8)
+        self.activated = np.empty(0, dtype=bool)                                                        # False = unconfirmed (seen in one frame only)
+        self.score = np.empty(0, dtype=np.float32)
+        self.cls = np.empty(0, dtype=np.int64)
+        self.last_frame = np.empty(0, dtype=np.int64)                                                   # Frame of the last matched detection
+        self.start_frame = np.empty(0, dtype=np.int64)
+        self.was_removed = np.empty(0, dtype=bool)                                                      # Timed out once (yolox removed_stracks)
+
+    def __len__(self):
+        return len(self.track_id)
+
+    def _append(self, mean, cov, track_id, score, cls, activated):
+        n = len(track_id)
+        self.mean = np.concatenate([self.mean, mean])
+        self.cov = np.concatenate([self.cov, cov])
+        self.track_id = np.concatenate([self.track_id, track_id])
+        self.state = np.concatenate([self.state, np.full(n, TRACKED, dtype=np.int8)])
+        self.activated = np.concatenate([self.activated, np.full(n, activated)])
+        self.score = np.concatenate([self.score, score.astype(np.float32)])
+        self.cls = np.concatenate([self.cls, cls])
+        self.last_frame = np.concatenate([self.last_frame, np.full(n, self.frame_id, dtype=np.int64)])
+        self.start_frame = np.concatenate([self.start_frame, np.full(n, self.frame_id, dtype=np.int64)])
+        self.was_removed = np.concatenate([self.was_removed, np.zeros(n, dtype=bool)])
+
+    def _take(self, rows):
+        for name in self.FIELDS:
+            setattr(self, name, getattr(self, name)[rows])
+
+    def update(self, output_results, img_info, img_size):
+        # yolox-compatible call: (N, 5 or 6) array, (img_h, img_w), (input_h, input_w) -> list of TrackView
+        output_results = np.asarray(output_results)
+        scale = min(img_size[0] / float(img_info[0]), img_size[1] / float(img_info[1]))
+        boxes = output_results[:, :4] / scale
+        cls = output_results[:, 5].astype(np.int64) if output_results.shape[1] > 5 else None
+        ids, tlbr, scores, classes = self.update_arrays(boxes, output_results[:, 4], cls)
+        return [TrackView(int(i), b, float(s), int(c)) for i, b, s, c in zip(ids, tlbr, scores, classes)]
+
+    def update_arrays(self, boxes, scores, cls=None):
+        # One frame: (N, 4) [x1, y1, x2, y2], (N,) scores, optional (N,) class labels
+        # Returns the confirmed tracks of this frame as arrays: track IDs, (K, 4) boxes, scores, classes
+        self.frame_id += 1
+        args = self.args
+        boxes = np.asarray(boxes).reshape(-1, 4)
+        scores = np.asarray(scores).reshape(-1)
+        cls = np.full(len(scores), -1, dtype=np.int64) if cls is None else np.asarray(cls, dtype=np.int64).reshape(-1)
+        tlwh = boxes.copy()
+        tlwh[:, 2:] -= tlwh[:, :2]
+        tlwh = tlwh.astype(np.float64)                                                                  # Input precision first, like STrack
+        det_tlbr = tlwh.copy()
+        det_tlbr[:, 2:] += det_tlbr[:, :2]
+
+        high = np.flatnonzero(scores > args.track_thresh)
+        low = np.flatnonzero((scores > 0.1) & (scores < args.track_thresh))
+
+        # Rows of the tracked / lost lists at the start of the frame
+        tracked_rows = np.arange(self.num_tracked)
+        lost_rows = np.arange(self.num_tracked, len(self))
+        unconfirmed = tracked_rows[~self.activated[tracked_rows]]
+        pool = np.concatenate([tracked_rows[self.activated[tracked_rows]], lost_rows])
+
+        # Batched Kalman predict of confirmed + lost tracks (lost tracks don't grow / shrink)
+        if len(pool):
+            mean = self.mean[pool]
+            mean[self.state[pool] != TRACKED, 7] = 0
+            self.mean[pool], self.cov[pool] = kalman_predict(mean, self.cov[pool])
+        track_tlbr = mean_to_tlbr(self.mean)
+
+        matched_rows, matched_dets, refind = [], [], []
+
+        # First association: high score detections, IoU fused with detection score
+        dists = iou_distance(track_tlbr[pool], det_tlbr[high])
+        if not args.mot20 and dists.size:
+            dists = 1.0 - (1.0 - dists) * scores[high][None, :]
+        matches, u_track, u_det = linear_assignment(dists, args.match_thresh)
+        rows = pool[matches[:, 0]]
+        matched_rows.append(rows)
+        matched_dets.append(high[matches[:, 1]])
+        refind.append(rows[self.state[rows] != TRACKED])                                                # Lost tracks found again
+
+        # Second association: remaining tracked tracks with low score detections
+        r_tracked = pool[u_track]
+        r_tracked = r_tracked[self.state[r_tracked] == TRACKED]
+        matches, u_track, _ = linear_assignment(iou_distance(track_tlbr[r_tracked], det_tlbr[low]), 0.5)
+        matched_rows.append(r_tracked[matches[:, 0]])
+        matched_dets.append(low[matches[:, 1]])
+        new_lost = r_tracked[u_track]
+
+        # Unconfirmed tracks (one frame old) with the remaining high score detections
+        left = high[u_det]
+        dists = iou_distance(track_tlbr[unconfirmed], det_tlbr[left])
+        if not args.mot20 and dists.size:
+            dists = 1.0 - (1.0 - dists) * scores[left][None, :]
+        matches, u_unconfirmed, u_det = linear_assignment(dists, 0.7)
+        matched_rows.append(unconfirmed[matches[:, 0]])
+        matched_dets.append(left[matches[:, 1]])
+
+        # Batched Kalman update of every matched track, class label follows the detection
+        rows = np.concatenate(matched_rows)
+        dets = np.concatenate(matched_dets)
+        if len(rows):
+            self.mean[rows], self.cov[rows] = kalman_update(self.mean[rows], self.cov[rows], tlwh_to_xyah(tlwh[dets]))
+            self.state[rows] = TRACKED
+            self.activated[rows] = True
+            self.score[rows] = scores[dets]
+            self.cls[rows] = cls[dets]
+            self.last_frame[rows] = self.frame_id
+        self.state[new_lost] = LOST
+        self.state[unconfirmed[u_unconfirmed]] = REMOVED
+
+        # New tracks from unmatched high score detections
+        new = left[u_det]
+        new = new[scores[new] >= self.det_thresh]
+        first_new = len(self)
+        if len(new):
+            mean, cov = kalman_initiate(tlwh_to_xyah(tlwh[new]))
+            self._append(mean, cov, np.arange(self.next_id, self.next_id + len(new)), scores[new], cls[new], self.frame_id == 1)
+            self.next_id += len(new)
+        new_rows = np.arange(first_new, len(self))
+
+        # Lost tracks past the buffer are removed (they stay matchable for one more frame, like yolox)
+        timed_out = lost_rows[self.frame_id - self.last_frame[lost_rows] > self.max_time_lost]
+        self.state[timed_out] = REMOVED
+
+        # New tracked / lost lists, in yolox order
+        tracked = np.concatenate([tracked_rows[self.state[tracked_rows] == TRACKED], new_rows, np.concatenate(refind)])
+        lost = np.concatenate([lost_rows[self.state[lost_rows] != TRACKED], new_lost])
+        lost = lost[~self.was_removed[lost]]
+        self.was_removed[timed_out] = True
+        tracked, lost = self._remove_duplicates(tracked, lost)
+
+        self.num_tracked = len(tracked)
+        self._take(np.concatenate([tracked, lost]))
+        out = np.flatnonzero(self.activated[:self.num_tracked])
+        return self.track_id[out], mean_to_tlbr(self.mean[out]), self.score[out], self.cls[out]
+
+    def coast(self):
+        # Frame without detections (detection skipped, see detection_scheduler.py) -> list of TrackView at the predicted boxes
+        ids, tlbr, scores, classes = self.coast_arrays()
+        return [TrackView(int(i), b, float(s), int(c)) for i, b, s, c in zip(ids, tlbr, scores, classes)]
+
+    def coast_arrays(self):
+        # Advances every track by one Kalman predict, without matching: states, scores, classes and lost timers are unchanged
+        # (timeouts are applied by the next update). Tracks are predicted exactly as in update(), so a keyframe after
+        # k coasted frames associates with boxes predicted k + 1 steps ahead of the last match.
+        # Returns the confirmed tracked tracks, same arrays as update_arrays()
+        self.frame_id += 1
+        tracked_rows = np.arange(self.num_tracked)
+        pool = np.concatenate([tracked_rows[self.activated[tracked_rows]], np.arange(self.num_tracked, len(self))])
+        if len(pool):
+            mean = self.mean[pool]
+            mean[self.state[pool] != TRACKED, 7] = 0
+            self.mean[pool], self.cov[pool] = kalman_predict(mean, self.cov[pool])
+        out = np.flatnonzero(self.activated[:self.num_tracked])
+        return self.track_id[out], mean_to_tlbr(self.mean[out]), self.score[out], self.cls[out]
+
+    def motion(self):
+        # Speed of every confirmed tracked track in box heights per frame (Kalman velocity of the center / height)
+        out = np.flatnonzero(self.activated[:self.num_tracked])
+        mean = self.mean[out]
+        return np.hypot(mean[:, 4], mean[:, 5]) / np.maximum(mean[:, 3], 1.0)
+
+    def _remove_duplicates(self, tracked, lost):
+        # A tracked and a lost track on the same object (IoU > 0.85): keep the one that has been alive longer
+        tlbr = mean_to_tlbr(self.mean)
+        dist = iou_distance(tlbr[tracked], tlbr[lost])
+        drop_tracked, drop_lost = set(), set()
+        for p, q in zip(*np.nonzero(dist < 0.15)):
+            age_p = self.last_frame[tracked[p]] - self.start_frame[tracked[p]]
+            age_q = self.last_frame[lost[q]] - self.start_frame[lost[q]]
+            if age_p > age_q:
+                drop_lost.add(q)
+            else:
+                drop_tracked.add(p)
+        if drop_tracked:
+            tracked = np.delete(tracked, list(drop_tracked))
+        if drop_lost:
+            lost = np.delete(lost, list(drop_lost))
+        return tracked, lost
+
+if __name__ == "__main__":
+    # ID-equivalence check: re-track the bundled detections and compare with the bundled yolox output
+    # (input/tracker_file/0000.txt was produced from filtered_0000.txt with frame_rate 30 and the args below)
+    from types import SimpleNamespace
+    from bytetrack_tracker import load_detections, track_sequence
+
+    det_file = "../input/detection_file/filtered_0000.txt"
+    ref_file = "../input/tracker_file/0000.txt"
+    args = SimpleNamespace(track_thresh=0.5, track_buffer=30, match_thresh=0.8, mot20=False, min_box_area=100)
+    frame_detections = load_detections(det_file)
+    lines = track_sequence(frame_detections, max(frame_detections) + 1, (375, 1242), args, frame_rate=30)
+    with open(ref_file) as f:
+        ref_lines = [line.strip() for line in f if line.strip()]
+
+    ids = {tuple(line.split()[:2]) for line in lines}                                                   # (frame, track_id)
+    ref_ids = {tuple(line.split()[:2]) for line in ref_lines}
+    same_lines = sum(a == b for a, b in zip(lines, ref_lines))
+    print(f"Tracks: {len(lines)} (reference: {len(ref_lines)})")
+    print(f"(frame, track ID) pairs only here: {len(ids - ref_ids)}, only in reference: {len(ref_ids - ids)}")
+    print(f"Identical lines (ID, class, box): {same_lines} / {len(ref_lines)}")
+    if ids != ref_ids:
+        raise SystemExit("Track IDs differ from the reference")
@@ -2,27 +2,31 @@
 # This function does the following:
 # Updates tracker for detection done by YOLOv8 for specific classes 
 # YOLO gives detections, BYTETrack uses detections + history to match or create tracks.
-# Computes best IoU between track box & all detections to assign class.
-# If best IoU > 0.3, consider that detection's class ID, else fallback.
+# The class ID of each detection is carried through association (byte_tracker.py), every output track takes the class
+# of the detection it was matched with in that frame.
 # Writes results in KITTI format for evaluation.
 
-# Helper: Compute IoU
-# Problem: BYTETrack doesn't store the class information
-# Solution: Match 'track_box' from BYTETrack to a detection box from YOLO with the highest IoU overlap 
-# and grab its cls_id if IoU> 0.3.
-
 # Note: 
 # 1) Low-confidence secondary queue logic can be added for further stability, especially in occlusion scenarios
-# 2) Fallback is considered ('car') for class assignment when IoU for best match < 0.3.
-# A class-aware tracker or fused re-ID may improve the fallback scenario. 
-# Reason: In KITTI, most false unmatched tracks are likely cars. 
-# It is a design tradeoff to avoid losing potentially valuable tracklets, though it may impact evaluation.
+# 2) Earlier versions used yolox's class-agnostic BYTETracker and re-matched every track box to the best-IoU detection
+#    afterwards (IoU > 0.3, else fallback 'car'). byte_tracker.py gives the same IDs and boxes without that step
+#    (see python byte_tracker.py for the check against input/tracker_file/0000.txt).
+# 3) With a DetectionScheduler, only keyframe detections are used (see detection_scheduler.py / sweep.py).
+# 4) The script streams: detections are read one frame at a time (iter_detections) and each frame's tracks are appended
+#    to the output file right away (iter_tracks + TrackWriter), so memory stays flat for any sequence length.
+#    track_sequence() keeps the in-memory API (dict in, list of lines out) for the sweep / comparison tools.
+# 5) With a ClassResolver (class_resolution = True), every track's class comes from its vote history and cyclist tracks are
+#    hidden (class_resolver.py). Bicycle rows (class 1) of the detections go to the resolver, not to the tracker.
 
 import os
+import time
 import cv2
 import numpy as np
 from types import SimpleNamespace
-from yolox.tracker.byte_tracker import BYTETracker
+from byte_tracker import BYTETracker                                                            # Array-backed BYTETrack, carries class IDs
+from frame_stream import iter_frames, iter_store_frames, merge_frames, TrackWriter              # Frame-by-frame reading / writing
+from class_resolver import ClassResolver                                                        # Per-track class / cyclist votes
+from box_ops import CLASS_BICYCLE
 
 # Config (Object-style config)
 args = SimpleNamespace(                                                         # Quick way to create an object with attributes instead of a dictionary
@@ -35,79 +39,99 @@ args = SimpleNamespace(
 image_dir = "/content/drive/MyDrive/kitti_tracking/data_tracking_image_2/training/image_02/0000"
 det_file = "/content/0000.txt"
 output_txt = "/content/drive/MyDrive/kitti_tracking/tracks_bytetrack/0000.txt"
-
-# Setup
-tracker = BYTETracker(args, frame_rate=30)
-image_files = sorted(os.listdir(image_dir))
+class_resolution = False                                                        # True = temporal class / cyclist resolution (needs bicycle rows for cyclists)
 
 # Load detections
-frame_detections = dict()                                                       # Grouping detections by frame_id
-with open(det_file, "r") as f:
-    for line in f:
+def detection_rows(lines, allowed_class_ids=(0, 2)):
+    # One (frame_id, [x1, y1, x2, y2, conf, cls_id]) per kept line, in file order
+    for line in lines:
         parts = line.strip().split(',')
+        if len(parts) < 8:
+            continue                                                            # Skip blank lines
         frame_id = int(parts[0])
         x1, y1, x2, y2 = map(float, parts[2:6])
         conf = float(parts[6])
         cls_id = int(parts[7])
-        if cls_id in [0, 2]:                                                    # 2-class filtering happens again for person & car (COCO IDs)  
-            det = [x1, y1, x2, y2, conf, cls_id]
-            frame_detections.setdefault(frame_id, []).append(det)               # If frame_id doesn’t exist, create it with an empty list. Else frame_detections[frame_id].append(det)
-  
-            # Example: frame_detections
-            # { 0: [ [100.0, 150.0, 200.0, 300.0, 0.90, 2] # car,  [50.0, 100.0, 80.0, 180.0, 0.85, 0] # person]}
-
-# Compute IoU between track box and det box
-def compute_iou(box1, box2):
-    # x1 y1 x2 y2 i.e., 0, 1, 2, 3. max for x1, y1 and min for x2, y2 between box1 and box2
-    xi1, yi1 = max(box1[0], box2[0]), max(box1[1], box2[1])                     # Top-left of intersection (max)
-    xi2, yi2 = min(box1[2], box2[2]), min(box1[3], box2[3])                     # Bottom-right of intersection (min)
-    inter_area = max(0, xi2 - xi1) * max(0, yi2 - yi1)                          # Width × height
-
-    box1_area = (box1[2] - box1[0]) * (box1[3] - box1[1])                       # x2-x1 * y2-y1
-    box2_area = (box2[2] - box2[0]) * (box2[3] - box2[1])
-    union_area = box1_area + box2_area - inter_area
-
-    return inter_area / union_area if union_area > 0 else 0
+        if cls_id in allowed_class_ids:                                         # 2-class filtering happens again for person & car (COCO IDs)
+            yield frame_id, [x1, y1, x2, y2, conf, cls_id]
+
+def parse_detection_lines(lines, allowed_class_ids=(0, 2)):
+    frame_detections = dict()                                                   # Grouping detections by frame_id
+    for frame_id, det in detection_rows(lines, allowed_class_ids):
+        frame_detections.setdefault(frame_id, []).append(det)                   # If frame_id doesn’t exist, create it with an empty list. Else frame_detections[frame_id].append(det)
+
+        # Example: frame_detections
+        # { 0: [ [100.0, 150.0, 200.0, 300.0, 0.90, 2] # car,  [50.0, 100.0, 80.0, 180.0, 0.85, 0] # person]}
+    return frame_detections
+
+def load_detections(det_file, allowed_class_ids=(0, 2)):
+    if det_file.endswith(".npy"):
+        return dict(iter_detections(det_file, allowed_class_ids))                # { frame_id: (N, 6) array } per-frame slices
+    with open(det_file, "r") as f:
+        return parse_detection_lines(f, allowed_class_ids)
+
+def iter_detections(det_file, allowed_class_ids=(0, 2)):
+    # Streaming version of load_detections: (frame_id, detections) one frame at a time, file must be sorted by frame
+    if det_file.endswith(".npy"):
+        yield from iter_store_frames(det_file, ["box", "conf", "cls"], keep=lambda r: np.isin(r["cls"], allowed_class_ids))
+        return
+    with open(det_file, "r") as f:
+        yield from iter_frames(detection_rows(f, allowed_class_ids))
 
 # Tracking loop
-output_lines = []
-
-for frame_id in range(len(image_files)):
-    img_path = os.path.join(image_dir, image_files[frame_id])
-    img = cv2.imread(img_path)
-    h, w = img.shape[:2]
-
-    dets = frame_detections.get(frame_id, [])                                   # If no detecions, return empty
-    if len(dets) > 0:
-        dets_np = np.array([[*d[:4], d[4]] for d in dets], dtype=np.float32)    # cls_id is removed. ** is used for dictionaries. * is used for lists or tuples
-    else:
-        dets_np = np.empty((0, 5), dtype=np.float32)                            # cls_id is removed 
-
-    tracks = tracker.update(dets_np, img_info=(h, w), img_size=(h, w))          # (original_h, original_w), (resized_h, resized_w)
-
+def iter_tracks(det_frames, num_frames, img_hw, args, frame_rate=30, scheduler=None, resolver=None):
+    # Runs BYTETrack over one sequence, yields (frame_id, KITTI format lines) for every frame. img_hw = (h, w) of the sequence frames
+    # det_frames: frame-ordered (frame_id, detections) pairs, e.g. iter_detections() (frames without detections may be missing)
+    # scheduler: optional DetectionScheduler (detection_scheduler.py), detections of non-keyframes are ignored and the
+    # tracks coast on their Kalman prediction instead (simulates skipping the detector on those frames)
+    # resolver: optional ClassResolver (class_resolver.py), resolves each track's class over time and hides cyclist tracks
+    tracker = BYTETracker(args, frame_rate=frame_rate)                          # Track IDs start from 1 for every tracker
+    h, w = img_hw
+
+    # Every frame of the sequence, dets = [] if no detecions
+    for frame_id, dets in merge_frames(det_frames, frame_range=(0, num_frames)):
+        start = time.perf_counter()
+        bicycles = None
+        if scheduler is not None and not scheduler.is_keyframe():
+            tracks = tracker.coast()
+        else:
+            dets_np = np.array(dets, dtype=np.float32).reshape(-1, 6)           # [x1, y1, x2, y2, conf, cls_id]
+            if resolver is not None:
+                is_bicycle = dets_np[:, 5] == CLASS_BICYCLE
+                dets_np, bicycles = dets_np[~is_bicycle], dets_np[is_bicycle]
+
+            tracks = tracker.update(dets_np, img_info=(h, w), img_size=(h, w))  # (original_h, original_w), (resized_h, resized_w)
+        if resolver is not None:
+            tracks = resolver.resolve(tracks, bicycles)
+        yield frame_id, format_tracks(frame_id, tracks)
+        if scheduler is not None:
+            scheduler.observe_tracks(tracker.motion())
+            scheduler.observe_latency(frame_s=time.perf_counter() - start)
+
+def track_sequence(frame_detections, num_frames, img_hw, args, frame_rate=30, scheduler=None, resolver=None):
+    # In-memory version: { frame_id: detections } -> list of KITTI format lines for the whole sequence
+    det_frames = sorted(frame_detections.items())
+    return [line for _, lines in iter_tracks(det_frames, num_frames, img_hw, args, frame_rate, scheduler, resolver) for line in lines]
+
+def format_tracks(frame_id, tracks):
+    # Tracks of one frame -> KITTI format lines
+    lines = []
     for t in tracks:
         x1, y1, x2, y2 = t.tlbr
-        track_box = [x1, y1, x2, y2]
-        track_id = t.track_id
-
-        # Match track to original detection by IoU
-        best_iou = 0
-        best_cls_id = -1
-        for det in dets:                                                        # dets = YOLO detections for this frame, cls_id is present
-            iou = compute_iou(track_box, det[:4])                               # Matching tracked box (no class info) with detection box (has class info)
-            if iou > best_iou:
-                best_iou = iou
-                best_cls_id = int(det[5])                                       # get class ID of best-matching YOLO box
-
-        # Fallback if no good match
-        class_id = best_cls_id if best_iou > 0.3 else 2                         # 2 = car default
-
-        line = f"{frame_id} {track_id} {class_id} 0 0 -1 {x1:.2f} {y1:.2f} {x2:.2f} {y2:.2f} 0 0 0 0"
-        output_lines.append(line)
-
-# Save output
-os.makedirs(os.path.dirname(output_txt), exist_ok=True)
-with open(output_txt, 'w') as f:
-    f.write('\n'.join(output_lines))
-
-print(f" Saved tracking results to: {output_txt}")
+        lines.append(f"{frame_id} {t.track_id} {t.cls} 0 0 -1 {x1:.2f} {y1:.2f} {x2:.2f} {y2:.2f} 0 0 0 0")
+    return lines
+
+if __name__ == "__main__":
+    image_files = sorted(os.listdir(image_dir))
+    h, w = cv2.imread(os.path.join(image_dir, image_files[0])).shape[:2]       # KITTI frames of one sequence share the same size
+
+    # Track and save frame by frame
+    os.makedirs(os.path.dirname(output_txt), exist_ok=True)
+    with open(output_txt, 'w') as f:
+        writer = TrackWriter(f)                                                 # Same file as '\n'.join over all lines
+        allowed = (0, CLASS_BICYCLE, 2) if class_resolution else (0, 2)        # Bicycles only feed the resolver
+        resolver = ClassResolver() if class_resolution else None
+        for frame_id, lines in iter_tracks(iter_detections(det_file, allowed), len(image_files), (h, w), args, frame_rate=30, resolver=resolver):
+            writer.write(lines)
+
+    print(f" Saved tracking results to: {output_txt}")
@@ -0,0 +1,127 @@
+# Temporal class resolution: per-track class / cyclist votes after tracking
+# This piece of code does the following:
+# Resolves the output class of every track from its history instead of from the current frame alone:
+# 1) Class votes: each track keeps one decayed vote per class (votes = decay * votes, + score for the class it was matched
+#    with this frame). Its label only switches when another class leads by switch_margin of the total, so a track doesn't
+#    flicker between 'person' and 'car' when single detections are misclassified.
+# 2) Cyclist votes: a pedestrian track keeps a moving average of "overlaps a bicycle this frame" (person-bicycle IoU above
+#    cyclist_iou_thresh), tracks above cyclist_ratio are cyclists and left out of the output (KITTI has no cyclist class here).
+#    The first check decides on its own (same result as the per-frame filter), a track is settled after settle_frames
+#    checks and never compared with bicycles again.
+# Per frame this is O(tracks): the only pairwise IoU left is unsettled pedestrian tracks x bicycles of that frame.
+# The thresholds below are the single shared config for the per-frame cyclist filter (yolov8_detect.py and the scripts
+# built on it) and for tracker_node.py.
+# Used by bytetrack_tracker.iter_tracks (resolver=...), sweep.py and deployment_with_ROS2/tracker_node.py.
+
+# Note:
+# 1) Cyclist resolution needs the bicycle detections, i.e. detections before the per-frame cyclist filter (raw detector
+#    output or the detection cache). On filtered files only the class votes have an effect.
+# 2) Suppressed cyclist tracks keep their ID inside the tracker, they are only hidden from the output.
+# 3) State is kept per track ID in flat arrays, tracks not seen for max_age frames are dropped.
+
+import numpy as np
+from box_ops import cyclist_mask, CLASS_PEDESTRIAN
+
+# Shared class / cyclist config
+CYCLIST_IOU_THRESH = 0.4                                                                                # person-bicycle IoU above this = cyclist (this frame)
+CYCLIST_RATIO = 0.5                                                                                     # Track is a cyclist when its cyclist average is above this
+VOTE_DECAY = 0.8                                                                                        # Weight of the history per frame (0 = current frame only)
+SWITCH_MARGIN = 0.25                                                                                    # Lead (fraction of all votes) needed to change a label
+SETTLE_FRAMES = 10                                                                                      # Cyclist checks before a track's cyclist flag is final
+MAX_AGE = 60                                                                                            # Frames without the track before its state is dropped
+
+class ClassResolver:
+    def __init__(self, cyclist_iou_thresh=CYCLIST_IOU_THRESH, cyclist_ratio=CYCLIST_RATIO, decay=VOTE_DECAY,
+                 switch_margin=SWITCH_MARGIN, settle_frames=SETTLE_FRAMES, max_age=MAX_AGE, num_classes=3):
+        self.cyclist_iou_thresh = cyclist_iou_thresh
+        self.cyclist_ratio = cyclist_ratio
+        self.decay = decay
+        self.switch_margin = switch_margin
+        self.settle_frames = settle_frames
+        self.max_age = max_age
+        self.frame = 0
+        self.rows = {}                                                                                  # { track_id: row }
+        self.votes = np.zeros((0, num_classes))                                                         # Decayed score per class
+        self.label = np.zeros(0, dtype=np.int64)                                                        # Resolved class
+        self.cyclist = np.zeros(0)                                                                      # Moving average of bicycle overlaps
+        self.checks = np.zeros(0, dtype=np.int64)                                                       # Cyclist checks so far
+        self.last_seen = np.zeros(0, dtype=np.int64)
+        self.switches = 0                                                                               # Label changes of existing tracks
+        self.suppressed = 0                                                                             # Track outputs hidden as cyclists
+
+    def update(self, ids, boxes, scores, classes, bicycles=None):
+        # One frame's tracks: IDs, (N, 4) [x1, y1, x2, y2], scores, classes (as carried by the tracker)
+        # bicycles: (B, 4+) bicycle boxes of this frame, None = no detection this frame (no cyclist check)
+        # Returns (labels, keep): resolved class per track, False for cyclist tracks
+        self.frame += 1
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        classes = np.asarray(classes, dtype=np.int64).reshape(-1)
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        rows = self.lookup(ids, classes)
+        self.last_seen[rows] = self.frame
+
+        # Class votes, label changes only with a clear lead
+        votes = self.votes[rows] * self.decay
+        votes[np.arange(len(rows)), classes] += scores
+        self.votes[rows] = votes
+        best = votes.argmax(axis=1)
+        current = self.label[rows]
+        lead = votes[np.arange(len(rows)), best] - votes[np.arange(len(rows)), current]
+        switch = lead > self.switch_margin * votes.sum(axis=1)
+        self.label[rows[switch]] = best[switch]
+        self.switches += int(switch.sum())
+
+        # Cyclist votes, only for pedestrian tracks that aren't settled yet
+        labels = self.label[rows]
+        if bicycles is not None:
+            check = (labels == CLASS_PEDESTRIAN) & (self.checks[rows] < self.settle_frames)
+            if check.any():
+                r = rows[check]
+                overlap = cyclist_mask(np.asarray(boxes).reshape(-1, 4)[check], bicycles, self.cyclist_iou_thresh).astype(np.float64)
+                first = self.checks[r] == 0
+                self.cyclist[r] = np.where(first, overlap, self.decay * self.cyclist[r] + (1 - self.decay) * overlap)
+                self.checks[r] += 1
+        keep = ~((labels == CLASS_PEDESTRIAN) & (self.cyclist[rows] > self.cyclist_ratio))
+        self.suppressed += int((~keep).sum())
+
+        if self.frame % self.max_age == 0:
+            self.prune()
+        return labels, keep
+
+    def lookup(self, ids, classes):
+        # Rows of the given track IDs, new tracks get a row labelled with their current class
+        rows = np.empty(len(ids), dtype=np.int64)
+        new = []
+        for i, track_id in enumerate(ids.tolist()):
+            row = self.rows.get(track_id)
+            if row is None:
+                row = self.rows[track_id] = len(self.label) + len(new)
+                new.append(i)
+            rows[i] = row
+        if new:
+            n = len(new)
+            self.votes = np.concatenate([self.votes, np.zeros((n, self.votes.shape[1]))])
+            self.label = np.concatenate([self.label, classes[new]])
+            self.cyclist = np.concatenate([self.cyclist, np.zeros(n)])
+            self.checks = np.concatenate([self.checks, np.zeros(n, dtype=np.int64)])
+            self.last_seen = np.concatenate([self.last_seen, np.zeros(n, dtype=np.int64)])
+        return rows
+
+    def prune(self):
+        # Drops tracks not seen for max_age frames (removed by the tracker long ago)
+        alive = self.frame - self.last_seen < self.max_age
+        if alive.all():
+            return
+        new_row = np.cumsum(alive) - 1
+        self.rows = {track_id: int(new_row[row]) for track_id, row in self.rows.items() if alive[row]}
+        self.votes, self.label, self.cyclist = self.votes[alive], self.label[alive], self.cyclist[alive]
+        self.checks, self.last_seen = self.checks[alive], self.last_seen[alive]
+
+    def resolve(self, tracks, bicycles=None):
+        # TrackView list (byte_tracker.py) -> kept tracks with their resolved class
+        if not tracks:
+            self.update([], np.empty((0, 4)), [], [], bicycles)
+            return []
+        labels, keep = self.update([t.track_id for t in tracks], np.array([t.tlbr for t in tracks]),
+                                   [t.score for t in tracks], [t.cls for t in tracks], bicycles)
+        return [t._replace(cls=int(c)) for t, c, k in zip(tracks, labels, keep) if k]
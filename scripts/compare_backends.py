@@ -0,0 +1,96 @@
+# Detector backend comparison: accuracy vs CPU throughput
+# This piece of code does the following:
+# Runs every configured backend (detector.py) on one sequence, with the same conf / cyclist filter as yolov8_detect.py.
+# Compares each backend's filtered detections with the PyTorch baseline, frame by frame
+# (same-class boxes matched one-to-one by IoU: recall / precision vs baseline, mean IoU and confidence difference of matches).
+# Tracks the detections with BYTETrack and evaluates MOTA / IDF1 against the KITTI labels (same numbers as evaluation.py).
+# Prints one table (frames/sec, detection agreement, MOTA / IDF1 and the drop vs baseline), saves it as CSV,
+# and flags backends whose MOTA drop is larger than max_mota_drop.
+
+import cv2
+import numpy as np
+import pandas as pd
+from types import SimpleNamespace
+from scipy.optimize import linear_sum_assignment
+from box_ops import iou_matrix
+from box_store import tracks_to_records
+from detector import load_detector
+from yolov8_detect import list_frames, prefetch_batches, detect_sequence
+from bytetrack_tracker import parse_detection_lines, track_sequence
+from mot_eval import load_gt_arrays, sort_by_frame, evaluate_arrays, ALLOWED_CLASS_IDS
+from class_resolver import CYCLIST_IOU_THRESH                                                           # Shared cyclist threshold
+
+# Config
+model_path = "yolov8s.pt"
+image_dir = "/content/drive/MyDrive/kitti_tracking/data_tracking_image_2/training/image_02/0000"
+gt_file = "/content/drive/MyDrive/kitti_tracking/data_tracking_label_2/training/label_02/0000.txt"
+backends = ["torch", "onnx", "onnx_int8"]                                                               # First one is the baseline
+num_threads = 4                                                                                         # Same thread budget for every backend
+conf_thresh = 0.6
+cyclist_iou_thresh = CYCLIST_IOU_THRESH
+batch_size = 8
+match_iou = 0.5                                                                                         # Detection agreement: same class + IoU >= this
+max_mota_drop = 0.01                                                                                    # Accepted MOTA loss vs baseline (absolute, 0.01 = 1 point)
+output_csv = "backend_comparison.csv"
+tracker_args = SimpleNamespace(track_thresh=0.5, track_buffer=30, match_thresh=0.8, mot20=False, min_box_area=100)
+
+def compare_detections(base, other, iou_thresh=0.5):
+    # base / other: { frame_id: [[x1, y1, x2, y2, conf, cls], ...] } -> agreement stats of 'other' vs 'base'
+    matched, n_base, n_other, ious, conf_diffs = 0, 0, 0, [], []
+    for frame_id in set(base) | set(other):
+        b = np.array(base.get(frame_id, []), dtype=np.float64).reshape(-1, 6)
+        o = np.array(other.get(frame_id, []), dtype=np.float64).reshape(-1, 6)
+        n_base += len(b)
+        n_other += len(o)
+        iou = iou_matrix(b, o)
+        iou[b[:, 5][:, None] != o[:, 5][None, :]] = 0.0                                                 # Only same-class pairs can match
+        if iou.size == 0:
+            continue
+        rows, cols = linear_sum_assignment(iou, maximize=True)
+        ok = iou[rows, cols] >= iou_thresh
+        matched += int(ok.sum())
+        ious.extend(iou[rows[ok], cols[ok]])
+        conf_diffs.extend(np.abs(b[rows[ok], 4] - o[cols[ok], 4]))
+    return {"det_recall": matched / n_base if n_base else 1.0,
+            "det_precision": matched / n_other if n_other else 1.0,
+            "mean_iou": float(np.mean(ious)) if ious else 0.0,
+            "mean_conf_diff": float(np.mean(conf_diffs)) if conf_diffs else 0.0}
+
+def evaluate_lines(gt, track_lines):
+    records = tracks_to_records(track_lines)
+    records = records[np.isin(records["cls"], ALLOWED_CLASS_IDS)]
+    s = evaluate_arrays(gt, sort_by_frame(records)).running_metrics()
+    return {"mota": s["mota"], "idf1": s["idf1"], "ids": s["ids"], "fp": s["fp"], "fn": s["fn"]}
+
+def run_backend(backend, frame_paths, img_hw, gt):
+    detector = load_detector(backend, model_path, num_threads=num_threads)
+    detector.predict(next(prefetch_batches(frame_paths, batch_size, 1)), conf_thresh)                  # Warm-up, not timed
+    lines, fps = detect_sequence(detector, frame_paths, conf_thresh, cyclist_iou_thresh, batch_size=batch_size)
+    frame_detections = parse_detection_lines(lines)
+    track_lines = track_sequence(frame_detections, len(frame_paths), img_hw, tracker_args, frame_rate=30)
+    return frame_detections, {"backend": backend, "fps": fps, "detections": len(lines), **evaluate_lines(gt, track_lines)}
+
+if __name__ == "__main__":
+    frame_paths = list_frames(image_dir)
+    img_hw = cv2.imread(frame_paths[0]).shape[:2]
+    gt = load_gt_arrays(gt_file)
+
+    rows = []
+    baseline = None
+    for backend in backends:
+        frame_detections, row = run_backend(backend, frame_paths, img_hw, gt)
+        if baseline is None:
+            baseline = (frame_detections, row)
+        row.update(compare_detections(baseline[0], frame_detections, match_iou))
+        row["speedup"] = row["fps"] / baseline[1]["fps"]
+        row["mota_drop"] = baseline[1]["mota"] - row["mota"]
+        rows.append(row)
+        print(f"{backend}: {row['fps']:.1f} frames/sec, MOTA {100 * row['mota']:.1f}%")
+
+    table = pd.DataFrame(rows).set_index("backend")
+    print(table.to_string(float_format=lambda v: f"{v:.3f}"))
+    table.to_csv(output_csv)
+    print(f"Saved comparison to: {output_csv}")
+    for backend, row in table.iterrows():
+        if row["mota_drop"] > max_mota_drop:
+            print(f"WARNING {backend}: MOTA drop {100 * row['mota_drop']:.1f} points > {100 * max_mota_drop:.1f}")
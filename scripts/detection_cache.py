@@ -0,0 +1,174 @@
+# Persistent detection cache (for confidence / cyclist threshold sweeps)
+# This piece of code does the following:
+# Runs YOLOv8 once per image at a low base confidence and stores the raw detections (before conf / cyclist filtering) on disk.
+# Inference goes through detector.load_detector, so every backend ('torch', 'onnx', 'onnx_int8') can fill the cache.
+# Cache key = hash of image file content + backend + model weights + preprocessing settings (imgsz, NMS IoU, base conf).
+# Any conf >= base conf and any cyclist IoU threshold is then served by filtering the cached rows, no re-inference.
+# Cache size is bounded, least recently used entries are evicted first. Hits / misses / evictions are reported.
+
+# Note:
+# YOLO (and the ONNX backends) keep boxes with score > conf, and NMS only lets a higher score box suppress a lower one.
+# So detections at a higher conf are exactly the cached rows with score > conf (up to the max_det limit per image).
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from yolov8_detect import list_frames, prefetch_batches, filter_detections
+from detector import load_detector                                                                      # Ultralytics / ONNX Runtime backends
+from class_resolver import CYCLIST_IOU_THRESH                                                           # Shared cyclist threshold
+
+# Config
+model_path = "yolov8s.pt"
+backend = "torch"                                                                                       # 'torch', 'onnx' or 'onnx_int8' (part of the key)
+num_threads = None                                                                                      # CPU threads for inference, None = library default
+input_folder = "/content/drive/MyDrive/kitti_tracking/data_tracking_image_2/training/image_02/0000"
+output_dir = "/content"                                                                                 # filtered_0000_conf<c>.txt per threshold
+cache_dir = "/content/det_cache"
+cache_max_bytes = 512 * 1024 ** 2                                                                       # 512 MB
+base_conf = 0.1                                                                                         # Lowest conf that can be served from the cache
+predict_settings = {"imgsz": 640, "iou": 0.7}                                                           # load_detector preprocessing / NMS settings (part of the key)
+conf_thresholds = [0.3, 0.4, 0.5, 0.6, 0.7]
+cyclist_iou_thresh = CYCLIST_IOU_THRESH
+batch_size = 8
+num_workers = 4
+
+def file_sha1(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+class DetectionCache:
+    def __init__(self, cache_dir, model_id, settings, max_bytes=cache_max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # Everything except the image content that changes the raw detections
+        self.prefix = hashlib.sha1(f"{model_id}|{json.dumps(settings, sort_keys=True)}".encode()).hexdigest()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.entries = {}                                                                               # { file_path: (last_used, size_bytes) }
+        for name in os.listdir(cache_dir):
+            if name.endswith(".npy"):
+                path = os.path.join(cache_dir, name)
+                st = os.stat(path)
+                self.entries[path] = (st.st_mtime, st.st_size)
+        self.total_bytes = sum(size for _, size in self.entries.values())
+
+    def key(self, image_path):
+        return hashlib.sha1(f"{self.prefix}|{file_sha1(image_path)}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def get(self, key):
+        path = self._path(key)
+        if path not in self.entries:
+            self.misses += 1
+            return None
+        try:
+            now = time.time()
+            os.utime(path, (now, now))                                                                  # mtime = last use, survives restarts
+            dets = np.load(path)
+        except (OSError, ValueError):                                                                   # Evicted by another process or unreadable = miss
+            self._forget(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries[path] = (now, self.entries[path][1])
+        return dets
+
+    def put(self, key, dets):
+        # Written to a temp file and renamed, so an interrupted run or a parallel worker never leaves a truncated entry
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.asarray(dets, dtype=np.float32).reshape(-1, 6))                          # [x1, y1, x2, y2, conf, cls]
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._forget(path)
+        size = os.path.getsize(path)
+        self.entries[path] = (time.time(), size)
+        self.total_bytes += size
+        self._evict()
+
+    def _forget(self, path):
+        if path in self.entries:
+            self.total_bytes -= self.entries.pop(path)[1]
+
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+        for path, (_, size) in sorted(self.entries.items(), key=lambda kv: kv[1][0]):                  # Oldest use first
+            if self.total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:                                                                   # Already evicted by another process
+                pass
+            del self.entries[path]
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def report(self):
+        total = self.hits + self.misses
+        hit_rate = 100.0 * self.hits / total if total else 0.0
+        return (f"Detection cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hit rate), "
+                f"{self.evictions} evictions, {len(self.entries)} entries, {self.total_bytes / 1024 ** 2:.1f} MB")
+
+def model_id(model_path, backend="torch"):
+    weights = file_sha1(model_path) if os.path.isfile(model_path) else model_path                       # Weights content, or the name if not downloaded yet
+    return f"{backend}|{weights}"                                                                       # Backends differ numerically (INT8 most)
+
+def detect_raw_cached(detector, frame_paths, cache, base_conf, batch_size=8, num_workers=4):
+    # Returns one (N, 6) array of raw detections per frame, running the detector (detector.load_detector) only for cache misses
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        keys = list(pool.map(cache.key, frame_paths))                                                   # Hash files in parallel
+    raw = [cache.get(k) for k in keys]
+
+    missing = [i for i, dets in enumerate(raw) if dets is None]
+    pos = 0
+    for frames in prefetch_batches([frame_paths[i] for i in missing], batch_size, num_workers):
+        for dets in detector.predict(frames, base_conf):
+            i = missing[pos]
+            raw[i] = np.asarray(dets, dtype=np.float32).reshape(-1, 6)
+            cache.put(keys[i], raw[i])
+            pos += 1
+    return raw
+
+def filter_cached(raw, conf_thresh, cyclist_iou_thresh):
+    # Serves one conf / cyclist threshold from cached raw detections -> BYTETrack format lines
+    lines = []
+    for frame_id, dets in enumerate(raw):
+        kept = dets[dets[:, 4] > conf_thresh]                                                           # Same strict '>' as YOLO's conf filter
+        lines.extend(filter_detections(kept.tolist(), frame_id, cyclist_iou_thresh))
+    return lines
+
+if __name__ == "__main__":
+    detector = load_detector(backend, model_path, num_threads=num_threads, **predict_settings)
+    settings = dict(predict_settings, base_conf=base_conf)
+    cache = DetectionCache(cache_dir, model_id(model_path, backend), settings, max_bytes=cache_max_bytes)
+
+    frame_paths = list_frames(input_folder)
+    raw = detect_raw_cached(detector, frame_paths, cache, base_conf, batch_size=batch_size, num_workers=num_workers)
+
+    os.makedirs(output_dir, exist_ok=True)
+    seq = os.path.basename(os.path.normpath(input_folder))
+    for conf in conf_thresholds:
+        if conf < base_conf:
+            raise ValueError(f"conf={conf} is below the cached base_conf={base_conf}")
+        out_path = os.path.join(output_dir, f"filtered_{seq}_conf{conf}.txt")
+        with open(out_path, "w") as f:
+            f.writelines(filter_cached(raw, conf, cyclist_iou_thresh))
+        print(f"conf={conf}: saved {out_path}")
+    print(cache.report())
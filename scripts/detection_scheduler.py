@@ -0,0 +1,73 @@
+# Adaptive keyframe scheduling: run the detector on keyframes only, coast the tracks in between
+# This piece of code does the following:
+# Decides for every frame (in order) whether YOLO runs (keyframe) or the tracker only advances its tracks with the
+# Kalman prediction (BYTETracker.coast()). The keyframe interval is recomputed after every frame from:
+# 1) Latency budget: with a detector call of detect_s and a per-frame cost of frame_s (tracking, publishing, ...),
+#    interval k costs (detect_s + k * frame_s) / k per frame, so k >= detect_s / (budget - frame_s) keeps the average in budget.
+# 2) Motion: a track moving v box heights per frame drifts v * k between detections, k <= max_shift / v for the fastest track.
+# 3) Track count: above crowd_tracks tracks the interval shrinks in proportion (more crossings = more ID switch risk).
+# interval = clip(max(latency interval, dynamics interval), min_interval, max_interval): the budget wins over the dynamics.
+# Used by stream_pipeline.py, bytetrack_tracker.track_sequence (sweep.py) and deployment_with_ROS2/tracker_node.py.
+
+# Note:
+# 1) min_interval = max_interval = 1 is the original detect-every-frame behaviour (same tracks).
+# 2) New objects can only start a track on a keyframe, so a long max_interval delays their first appearance.
+# 3) Latencies are smoothed with an exponential moving average (ema weight of the newest sample).
+
+import math
+import numpy as np
+
+class DetectionScheduler:
+    def __init__(self, min_interval=1, max_interval=4, latency_budget_s=None, max_shift=0.25, crowd_tracks=20, ema=0.2):
+        if not 1 <= min_interval <= max_interval:
+            raise ValueError("Expected 1 <= min_interval <= max_interval")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.latency_budget_s = latency_budget_s                                                        # Average per-frame budget, None = dynamics only
+        self.max_shift = max_shift                                                                      # Max drift between detections, in box heights
+        self.crowd_tracks = crowd_tracks
+        self.ema = ema
+        self.interval = min_interval
+        self.since_keyframe = None                                                                      # Frames since the last keyframe, None = none yet
+        self.detect_s = None                                                                            # Smoothed latency of one detector call
+        self.frame_s = 0.0                                                                              # Smoothed per-frame cost besides detection
+        self.num_tracks = 0
+        self.speed = 0.0                                                                                # Fastest track, box heights per frame
+        self.frames = 0
+        self.keyframes = 0
+
+    def is_keyframe(self):
+        # Call once per frame, in frame order
+        key = self.since_keyframe is None or self.since_keyframe + 1 >= self.interval
+        self.since_keyframe = 0 if key else self.since_keyframe + 1
+        self.frames += 1
+        self.keyframes += key
+        return key
+
+    def observe_latency(self, detect_s=None, frame_s=None):
+        if detect_s is not None:
+            self.detect_s = detect_s if self.detect_s is None else (1 - self.ema) * self.detect_s + self.ema * detect_s
+        if frame_s is not None:
+            self.frame_s = (1 - self.ema) * self.frame_s + self.ema * frame_s
+        self.interval = self.next_interval()
+
+    def observe_tracks(self, speeds):
+        # speeds: BYTETracker.motion() after this frame (one entry per confirmed tracked track)
+        self.num_tracks = len(speeds)
+        self.speed = float(np.max(speeds)) if len(speeds) else 0.0
+        self.interval = self.next_interval()
+
+    def next_interval(self):
+        dynamics = self.max_interval
+        if self.speed > 0:
+            dynamics = min(dynamics, math.floor(self.max_shift / self.speed))
+        if self.num_tracks > self.crowd_tracks:
+            dynamics = min(dynamics, self.max_interval * self.crowd_tracks // self.num_tracks)
+        latency = self.min_interval
+        if self.latency_budget_s is not None and self.detect_s is not None:
+            spare = self.latency_budget_s - self.frame_s
+            latency = math.ceil(self.detect_s / spare) if spare > 0 else self.max_interval
+        return int(min(max(latency, dynamics, self.min_interval), self.max_interval))
+
+    def keyframe_ratio(self):
+        return self.keyframes / self.frames if self.frames else 1.0
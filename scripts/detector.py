@@ -0,0 +1,279 @@
+# Pluggable YOLOv8 detector backends for CPU inference
+# This module does the following:
+# Wraps every backend behind the same call: detector.predict(frames, conf) -> one (N, 6) array [x1, y1, x2, y2, conf, cls] per frame.
+# Backends:
+# 'torch':     Ultralytics / PyTorch (the original YOLO("yolov8s.pt") path), also loads any format Ultralytics can (e.g. OpenVINO folders).
+# 'onnx':      ONNX Runtime on an exported .onnx model (exported from the .pt on first use), own letterbox + NMS in NumPy.
+# 'onnx_int8': same, on a dynamically INT8-quantized copy of the .onnx model (weights in 8 bit, built on first use).
+# num_threads sets the CPU threads of the backend (None = library default).
+# Used by yolov8_detect.py, run_sequences.py, stream_pipeline.py and deployment_with_ROS2/tracker_node.py.
+# compare_backends.py checks detections and MOTA of every backend against the PyTorch baseline on one sequence.
+# Input size / tiling (benchmark_resolution.py picks the cheapest setting that meets a recall target):
+# input_size() gives a rectangular (h, w) input with the frame's aspect ratio (KITTI 375 x 1242 at long side 640 -> 224 x 640)
+# instead of a square imgsz, so no compute goes into letterbox padding, and the long side sets the resolution.
+# tiles > 1 (TiledDetector): every frame is split into overlapping horizontal tiles (full height), all tiles of all frames go
+# through one predict call, and the boxes are shifted back and merged across tiles (class-aware NMS for duplicates in the overlap,
+# a box cut at a tile edge is joined with its other part from the tile beyond that seam). Small distant objects get more pixels
+# at the same input size.
+
+# Note:
+# Pre / post-processing of the ONNX backends follows Ultralytics (letterbox with gray padding, class-aware NMS, max_det),
+# so with the same weights the detections match the 'torch' backend up to numerical differences.
+# Heavy libraries (torch / ultralytics, onnxruntime) are only imported by the backend that needs them.
+# warm_up() runs dummy frames through a freshly loaded detector, so lazy framework initialization is not paid by the first real frame.
+
+import os
+import math
+import time
+import cv2
+import numpy as np
+
+BACKENDS = ("torch", "onnx", "onnx_int8")
+
+class UltralyticsDetector:
+    def __init__(self, model_path, num_threads=None, imgsz=640, iou=0.7):
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+        self.imgsz = imgsz
+        self.iou = iou
+
+    def predict(self, frames, conf):
+        results = self.model.predict(source=frames, conf=conf, iou=self.iou, imgsz=self.imgsz, verbose=False)
+        return [r.boxes.data.cpu().numpy() for r in results]
+
+class OnnxDetector:
+    def __init__(self, onnx_path, num_threads=None, imgsz=640, iou=0.7, max_det=300):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.fixed_batch = isinstance(model_input.shape[0], int)                                        # Static batch (1) = one run per frame
+        self.stride = None if all(isinstance(d, int) for d in model_input.shape[2:]) else 32            # Dynamic H, W = minimal padding like PyTorch
+        self.imgsz = (imgsz, imgsz) if isinstance(imgsz, int) else tuple(imgsz)                         # (h, w)
+        self.iou = iou
+        self.max_det = max_det
+
+    def predict(self, frames, conf):
+        blobs, metas = zip(*(letterbox(frame, self.imgsz, self.stride) for frame in frames))
+        batch = np.stack(blobs)
+        if self.fixed_batch:
+            outputs = np.concatenate([self.session.run(None, {self.input_name: batch[i:i + 1]})[0] for i in range(len(batch))])
+        else:
+            outputs = self.session.run(None, {self.input_name: batch})[0]
+        return [postprocess(out, meta, conf, self.iou, self.max_det) for out, meta in zip(outputs, metas)]
+
+def letterbox(frame, imgsz, stride=None):
+    # BGR frame -> (3, H, W) float32 RGB blob in [0, 1], resized keeping the aspect ratio and padded with gray (114)
+    # stride: pad only up to a multiple of stride (e.g. 375 x 1242 KITTI -> 224 x 640) instead of the full imgsz
+    h, w = frame.shape[:2]
+    gain = min(imgsz[0] / h, imgsz[1] / w)
+    new_w, new_h = int(round(w * gain)), int(round(h * gain))
+    dw, dh = imgsz[1] - new_w, imgsz[0] - new_h
+    if stride:
+        dw, dh = dw % stride, dh % stride
+    dw, dh = dw / 2, dh / 2
+    if (new_w, new_h) != (w, h):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    frame = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    blob = frame[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return np.ascontiguousarray(blob), (gain, left, top, h, w)
+
+def postprocess(output, meta, conf, iou, max_det):
+    # One YOLOv8 output (4 + num_classes, num_anchors) -> (N, 6) [x1, y1, x2, y2, conf, cls] in original image pixels
+    gain, pad_x, pad_y, h, w = meta
+    output = output.T
+    scores = output[:, 4:]
+    cls = scores.argmax(axis=1)
+    best = scores[np.arange(len(scores)), cls]
+    keep = best > conf
+    xywh, best, cls = output[keep, :4], best[keep], cls[keep]
+    boxes = np.concatenate([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], axis=1)
+    keep = nms(boxes + cls[:, None] * 7680.0, best, iou)[:max_det]                                     # Class offset = per-class NMS
+    boxes, best, cls = boxes[keep], best[keep], cls[keep]
+    boxes -= [pad_x, pad_y, pad_x, pad_y]
+    boxes /= gain
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+    return np.column_stack([boxes, best, cls]).astype(np.float32)
+
+def nms(boxes, scores, iou_thresh):
+    # Greedy NMS, returns kept indices by descending score
+    order = scores.argsort()[::-1]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while len(order):
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        xx1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        order = rest[inter / (areas[i] + areas[rest] - inter + 1e-7) <= iou_thresh]
+    return np.array(keep, dtype=np.int64)
+
+class TiledDetector:
+    # Same predict() as the backends: frames -> tiles -> one inner predict call -> boxes in frame pixels, merged across tiles
+    # full_frame = True adds the whole frame (downscaled to the tile input size) in a second call, for objects wider than a tile
+    def __init__(self, detector, tiles=2, overlap=0.2, iou=0.7, seam_iou=0.6, full_frame=False):
+        self.detector = detector
+        self.tiles = tiles
+        self.overlap = overlap
+        self.iou = iou
+        self.seam_iou = seam_iou                                                                        # Vertical IoU above this = parts of one object at a seam
+        self.full_frame = full_frame
+
+    def predict(self, frames, conf):
+        layouts = [tile_offsets(frame.shape[1], self.tiles, self.overlap) for frame in frames]
+        crops = [frame[:, x:x + tile_w] for frame, (offsets, tile_w) in zip(frames, layouts) for x in offsets]
+        outputs = iter(self.detector.predict(crops, conf))
+        full = iter(self.detector.predict(frames, conf)) if self.full_frame else None
+        results = []
+        for frame, (offsets, tile_w) in zip(frames, layouts):
+            width = frame.shape[1]
+            dets, tile_ids, edges = [], [], []
+            for tile, x in enumerate(offsets):
+                out = np.array(next(outputs), dtype=np.float32).reshape(-1, 6)
+                out[:, [0, 2]] += x
+                dets.append(out)
+                tile_ids.append(np.full(len(out), tile))
+                cut_left = np.where((x > 0) & (out[:, 0] <= x + 1), x, np.nan)                          # Touches an inner tile edge
+                cut_right = np.where((x + tile_w < width) & (out[:, 2] >= x + tile_w - 1), x + tile_w, np.nan)
+                edges.append(np.column_stack([cut_left, cut_right]))
+            if full is not None:
+                out = np.array(next(full), dtype=np.float32).reshape(-1, 6)
+                dets.append(out)
+                tile_ids.append(np.full(len(out), -1))
+                edges.append(np.full((len(out), 2), np.nan))
+            results.append(merge_tiles(np.concatenate(dets), np.concatenate(tile_ids), np.concatenate(edges), self.iou, self.seam_iou))
+        return results
+
+def tile_offsets(width, tiles, overlap):
+    # x offsets and width of 'tiles' equal horizontal tiles covering width, neighbours share 'overlap' of a tile
+    if tiles <= 1:
+        return [0], width
+    tile_w = min(width, int(math.ceil(width / (tiles - (tiles - 1) * overlap))))
+    step = (width - tile_w) / (tiles - 1)
+    return [int(round(i * step)) for i in range(tiles)], tile_w
+
+def merge_tiles(dets, tile_ids, edges, iou_thresh, seam_iou):
+    # (N, 6) detections of one frame from all tiles -> merged detections by descending score
+    # tile_ids: tile index (left to right, -1 = full frame), edges: (N, 2) x of the inner tile edge a box is cut at on its
+    # [left, right] side (NaN = not cut). Among boxes of the same class, a lower-score box is
+    # 1) dropped when it overlaps the kept box by IoU > iou_thresh (same object seen twice in the overlap), or
+    # 2) joined into the kept box (union) when the two are parts of one object at a seam (seam_join) and their vertical
+    #    extents match (1D IoU > seam_iou)
+    dets, edges = dets.copy(), edges.copy()
+    order = dets[:, 4].argsort()[::-1]
+    keep = []
+    while len(order):
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        same = dets[rest, 5] == dets[i, 5]
+        joined = np.zeros(len(rest), dtype=bool)
+        while True:                                                                                     # Repeated: a wide object spans several seams
+            _, y_iou = box_overlaps(dets, i, rest)
+            seam = same & ~joined & (y_iou > seam_iou) & (seam_join(dets, tile_ids, edges, i, rest) |
+                                                          seam_join(dets, tile_ids, edges, rest, i))
+            if not seam.any():
+                break
+            joined |= seam
+            parts = np.append(rest[seam], i)
+            left, right = parts[dets[parts, 0].argmin()], parts[dets[parts, 2].argmax()]
+            edges[i] = edges[left, 0], edges[right, 1]                                                  # The union is cut only where its outer parts are
+            dets[i, :2] = dets[parts, :2].min(axis=0)
+            dets[i, 2:4] = dets[parts, 2:4].max(axis=0)
+        iou, _ = box_overlaps(dets, i, rest)
+        order = rest[~(joined | (same & (iou > iou_thresh)))]
+    return dets[keep]
+
+def box_overlaps(dets, i, rest):
+    # IoU and vertical 1D IoU of box i with the boxes rest
+    xx1 = np.maximum(dets[i, 0], dets[rest, 0])
+    yy1 = np.maximum(dets[i, 1], dets[rest, 1])
+    xx2 = np.minimum(dets[i, 2], dets[rest, 2])
+    yy2 = np.minimum(dets[i, 3], dets[rest, 3])
+    inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+    area_i = (dets[i, 2] - dets[i, 0]) * (dets[i, 3] - dets[i, 1])
+    areas = (dets[rest, 2] - dets[rest, 0]) * (dets[rest, 3] - dets[rest, 1])
+    y_union = np.maximum(dets[i, 3], dets[rest, 3]) - np.minimum(dets[i, 1], dets[rest, 1])
+    return inter / (area_i + areas - inter + 1e-7), np.clip(yy2 - yy1, 0, None) / (y_union + 1e-7)
+
+def seam_join(dets, tile_ids, edges, a, b, cover=0.6):
+    # True where box a is cut at a tile edge and box b is the rest of the same object on the far side of that seam:
+    # b comes from the tile beyond the edge (or the full frame) and reaches past the edge, and either
+    # - b is cut too, at its own tile's edge inside a's part: the seam is the overlap of the two tiles, a lies left / right
+    #   of it and b on the other side, or
+    # - b is not cut and covers at least 'cover' of a's part (b saw the whole object)
+    # Adjacent objects fail both: a neighbour starts beyond the cut part (or is cut at another seam).
+    ax1, ax2, bx1, bx2 = dets[a, 0], dets[a, 2], dets[b, 0], dets[b, 2]
+    a_left, a_right, b_left, b_right = edges[a, 0], edges[a, 1], edges[b, 0], edges[b, 1]             # NaN compares False
+    whole = np.isnan(b_left) & np.isnan(b_right)
+    beyond_right = (tile_ids[b] > tile_ids[a]) | (tile_ids[b] < 0)
+    beyond_left = tile_ids[b] < tile_ids[a]                                                             # Full frame (-1) included
+    via_right = beyond_right & (bx2 > a_right) & (((b_left < a_right) & (ax1 < b_left)) |
+                                                  (whole & (bx1 <= ax1 + (1 - cover) * (a_right - ax1))))
+    via_left = beyond_left & (bx1 < a_left) & (((b_right > a_left) & (ax2 > b_right)) |
+                                               (whole & (bx2 >= ax2 - (1 - cover) * (ax2 - a_left))))
+    return via_right | via_left
+
+def input_size(frame_hw, long_side=640, tiles=1, overlap=0.2, stride=32):
+    # Rectangular model input (h, w) for frames (or tiles of frames) of size frame_hw: the long side is long_side,
+    # the other keeps the aspect ratio, both rounded up to a multiple of stride
+    h, w = frame_hw
+    w = tile_offsets(w, tiles, overlap)[1]
+    scale = long_side / max(h, w)
+    return tuple(int(math.ceil(d * scale / stride)) * stride for d in (h, w))
+
+def export_onnx(model_path, imgsz=640):
+    # .pt -> .onnx next to it (dynamic batch), skipped if it already exists
+    onnx_path = os.path.splitext(model_path)[0] + ".onnx"
+    if not os.path.exists(onnx_path):
+        from ultralytics import YOLO
+        YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    return onnx_path
+
+def quantize_int8(onnx_path):
+    # .onnx -> _int8.onnx with dynamically quantized (8-bit) weights, skipped if it already exists
+    int8_path = os.path.splitext(onnx_path)[0] + "_int8.onnx"
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
+    return int8_path
+
+def warm_up(detector, frame_shape=(375, 1242, 3), batch_size=1, runs=2, conf=0.25):
+    # Gray dummy frames (KITTI size by default) through the detector, returns the seconds of every run (first = cold inference)
+    frames = [np.full(frame_shape, 114, dtype=np.uint8)] * batch_size
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        detector.predict(frames, conf)
+        times.append(time.perf_counter() - start)
+    return times
+
+def load_detector(backend, model_path, num_threads=None, imgsz=640, iou=0.7, tiles=1, tile_overlap=0.2, full_frame=False):
+    # model_path: .pt weights (exported / quantized on demand) or an existing .onnx for the ONNX backends
+    # imgsz: int (square) or (h, w), e.g. input_size(frame_hw, long_side, tiles, tile_overlap). tiles > 1 = TiledDetector
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown detector backend '{backend}', expected one of {BACKENDS}")
+    if backend == "torch":
+        detector = UltralyticsDetector(model_path, num_threads=num_threads, imgsz=imgsz, iou=iou)
+    else:
+        onnx_path = model_path if model_path.endswith(".onnx") else export_onnx(model_path, imgsz)
+        if backend == "onnx_int8":
+            onnx_path = quantize_int8(onnx_path)
+        detector = OnnxDetector(onnx_path, num_threads=num_threads, imgsz=imgsz, iou=iou)
+    if tiles > 1:
+        return TiledDetector(detector, tiles=tiles, overlap=tile_overlap, iou=iou, full_frame=full_frame)
+    return detector
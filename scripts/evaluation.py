@@ -9,83 +9,140 @@
 # Computes pairwise IoU distance matrix between GT and pred boxes.
 # Update accumulator using this distance for track IDs of GT and pred boxes.
 # Print the metrics.
+# The script streams both files frame by frame (iter_kitti_gt_file / iter_tracker_file merged by frame_stream.merge_frames),
+# so only one frame of GT and predictions is in memory. The dict loaders (read_*) stay for callers that reuse parsed data.
 
 import motmetrics as mm
 import os
 import numpy as np
-
-# Patch for NumPy 2.0+
-if not hasattr(np, 'asfarray'):
-    np.asfarray = lambda a: np.asarray(a, dtype=np.float64)
-
-ALLOWED_CLASSES = ["Car", "Pedestrian"]                                                                 # For KITTI ground truth file
-ALLOWED_CLASS_IDS = [0, 2]                                                                              # For BYTETrack output file, 0 = person (Pedestrian), 2 = car 
+from box_store import KITTI_CLASS_TO_ID                                                                 # Binary (.npy) label class IDs
+from mot_eval import distance_matrix                                                                    # Vectorized IoU distances (no NumPy 2.0 asfarray patch needed)
+from frame_stream import iter_frames, iter_store_frames, merge_frames                                   # Frame-by-frame reading
+from mot_eval import ALLOWED_CLASSES, ALLOWED_CLASS_IDS                                                 # ["Car", "Pedestrian"] for KITTI GT, [0, 2] (person, car) for BYTETrack output
+
+def kitti_gt_rows(lines, allowed_classes):
+    # One (frame_id, [track_id, x1, y1, x2, y2]) per kept label line, in file order
+    for line in lines:
+        fields = line.strip().split()
+        if len(fields) < 10:
+            continue                                                                                    # Skip blank lines
+        frame_id = int(fields[0])
+        track_id = int(fields[1])
+        obj_type = fields[2]
+        if obj_type not in allowed_classes:
+            continue
+        bbox = list(map(float, fields[6:10]))                                                           # [x1, y1, x2, y2]
+        yield frame_id, [track_id] + bbox
 
 def read_kitti_gt_file(file_path, allowed_classes):
+    if file_path.endswith('.npy'):                                                                      # Binary labels: { frame_id: (N, 5) array } per-frame slices
+        return dict(iter_kitti_gt_file(file_path, allowed_classes))
     data = {}
     with open(file_path, 'r') as f:
-        for line in f:
-            fields = line.strip().split()
-            frame_id = int(fields[0])
-            track_id = int(fields[1])
-            obj_type = fields[2]
-            if obj_type not in allowed_classes:
-                continue
-            bbox = list(map(float, fields[6:10]))                                                       # [x1, y1, x2, y2]
-            if frame_id not in data:
-                data[frame_id] = []
-            data[frame_id].append([track_id] + bbox)                                                    # { frame_id: [ [track_id, x1, y1, x2, y2], ... ] } 
+        for frame_id, obj in kitti_gt_rows(f, allowed_classes):
+            data.setdefault(frame_id, []).append(obj)                                                   # { frame_id: [ [track_id, x1, y1, x2, y2], ... ] }
     return data
 
-def read_tracker_file(file_path, allowed_classes_id):                                                   
+def iter_kitti_gt_file(file_path, allowed_classes):
+    # Streaming version of read_kitti_gt_file: (frame_id, objects) one frame at a time, frames without objects are skipped
+    if file_path.endswith('.npy'):
+        class_ids = [KITTI_CLASS_TO_ID[c] for c in allowed_classes]
+        yield from iter_store_frames(file_path, ['track_id', 'box'], keep=lambda r: np.isin(r['cls'], class_ids))
+        return
+    with open(file_path, 'r') as f:
+        yield from iter_frames(kitti_gt_rows(f, allowed_classes))
+
+def tracker_rows(lines, allowed_classes_id):
+    # One (frame_id, [track_id, x1, y1, x2, y2]) per kept tracker line, in file order
+    for line in lines:
+        fields = line.strip().split(',')
+        if len(fields) < 7:
+            fields = line.strip().split()                                                               # Support space-separated
+        if len(fields) < 10:
+            continue                                                                                    # Skip blank lines
+        frame_id = int(fields[0])
+        track_id = int(fields[1])
+        class_id = int(fields[2])
+
+        if class_id not in allowed_classes_id:
+            continue                                                                                    # Discard bicycles or misclassed detections
+
+        bbox = list(map(float, fields[6:10]))                                                           # [x1, y1, x2, y2]
+        yield frame_id, [track_id] + bbox
+
+def parse_tracker_lines(lines, allowed_classes_id):
     data = {}
+    for frame_id, obj in tracker_rows(lines, allowed_classes_id):
+        data.setdefault(frame_id, []).append(obj)                                                       # { frame_id: [ [track_id, x1, y1, x2, y2], ... ] }
+    return data
+
+def read_tracker_file(file_path, allowed_classes_id):
+    if file_path.endswith('.npy'):
+        return dict(iter_tracker_file(file_path, allowed_classes_id))
     with open(file_path, 'r') as f:
-        for line in f:
-            fields = line.strip().split(',')
-            if len(fields) < 7:
-                fields = line.strip().split()                                                           # Support space-separated
-            frame_id = int(fields[0])
-            track_id = int(fields[1])
-            class_id = int(fields[2])
-            
-            if class_id not in allowed_classes_id:
-                continue                                                                                # Discard bicycles or misclassed detections
-                
-            bbox = list(map(float, fields[6:10]))                                                       # [x1, y1, x2, y2]
-            if frame_id not in data:
-                data[frame_id] = []
-            data[frame_id].append([track_id] + bbox)                                                    # { frame_id: [ [track_id, x1, y1, x2, y2], ... ] }  
+        return parse_tracker_lines(f, allowed_classes_id)
 
-    return data
+def iter_tracker_file(file_path, allowed_classes_id):
+    # Streaming version of read_tracker_file: (frame_id, tracks) one frame at a time
+    if file_path.endswith('.npy'):
+        yield from iter_store_frames(file_path, ['track_id', 'box'], keep=lambda r: np.isin(r['cls'], allowed_classes_id))
+        return
+    with open(file_path, 'r') as f:
+        yield from iter_frames(tracker_rows(f, allowed_classes_id))
 
-def evaluate_mot(gt_data, pred_data):
-    acc = mm.MOTAccumulator(auto_id=True)                                                               # Automatically assign internal IDs to detections that aren't explicitly matched, tracks matches frame-by-frame
-    for frame_id in sorted(gt_data.keys()):
-        gt_objs = gt_data.get(frame_id, [])                                                             # GT for this frame
-        pred_objs = pred_data.get(frame_id, [])                                                         # Tracker output
+def build_accumulator(gt_data, pred_data):
+    # Whole-sequence dicts, evaluated on the frames that have GT
+    return accumulate_frames((frame_id, gt_data[frame_id], pred_data.get(frame_id, [])) for frame_id in sorted(gt_data.keys()))
 
-        gt_ids = [obj[0] for obj in gt_objs]
-        gt_boxes = [obj[1:] for obj in gt_objs]
+def stream_accumulator(gt_file, pred_file):
+    # Same accumulator as build_accumulator(read_kitti_gt_file(...), read_tracker_file(...)), reading both files frame by frame
+    frames = merge_frames(iter_kitti_gt_file(gt_file, ALLOWED_CLASSES), iter_tracker_file(pred_file, ALLOWED_CLASS_IDS))
+    return accumulate_frames(frame for frame in frames if len(frame[1]))                                # Only frames with GT
 
-        pred_ids = [obj[0] for obj in pred_objs]
-        pred_boxes = [obj[1:] for obj in pred_objs]
+def accumulate_frames(frames):
+    # frames: (frame_id, GT objects, predicted objects) in frame order
+    acc = mm.MOTAccumulator(auto_id=True)                                                               # Automatically assign internal IDs to detections that aren't explicitly matched, tracks matches frame-by-frame
+    for frame_id, gt_objs, pred_objs in frames:                                                         # GT / tracker output for this frame
+        gt_objs = np.asarray(gt_objs, dtype=np.float64).reshape(-1, 5)                                  # Lists (text) or arrays (.npy) of [track_id, x1, y1, x2, y2]
+        gt_ids = gt_objs[:, 0].astype(np.int64)
+        gt_boxes = gt_objs[:, 1:]
+
+        pred_objs = np.asarray(pred_objs, dtype=np.float64).reshape(-1, 5)
+        pred_ids = pred_objs[:, 0].astype(np.int64)
+        pred_boxes = pred_objs[:, 1:]
 
         # Compute pairwise IoU distance matrix (inverted IoU = 1 - IoU), the better the overlap (higher IoU), the lower the distance
-        distances = mm.distances.iou_matrix(gt_boxes, pred_boxes, max_iou=0.5)
+        # (same values as mm.distances.iou_matrix(gt_boxes, pred_boxes, max_iou=0.5), see mot_eval.py)
+        distances = distance_matrix(gt_boxes, pred_boxes, max_iou=0.5)
 
         # Update accumulator with this frame's GT <-> prediction matches
         # Does matching for that frame using the Hungarian algorithm, then stores those matches to accumulate metrics over all frames.
         acc.update(gt_ids, pred_ids, distances)                                                         # distance[i][j] = 1 - IoU between GT i and Pred j
 
+    return acc
+
+def summarize(acc, name='summary'):
+    mh = mm.metrics.create()
+    return mh.compute(acc, metrics=mm.metrics.motchallenge_metrics, name=name)                          # One-row DataFrame (motchallenge metrics)
+
+def compute_mot_summary(gt_data, pred_data, name='summary'):
+    return summarize(build_accumulator(gt_data, pred_data), name=name)
+
+def print_summary(summary):
     mh = mm.metrics.create()
-    summary = mh.compute(acc, metrics=mm.metrics.motchallenge_metrics, name='summary')
     print(mm.io.render_summary(summary, formatters=mh.formatters, namemap=mm.io.motchallenge_metric_names))
+    return summary
+
+def evaluate_mot(gt_data, pred_data):
+    return print_summary(compute_mot_summary(gt_data, pred_data))
 
-# Paths
-gt_file = '/content/drive/MyDrive/kitti_tracking/data_tracking_label_2/training/label_02/0000.txt'
-pred_file = '/content/drive/MyDrive/kitti_tracking/tracks_bytetrack/0000.txt'
+def evaluate_mot_files(gt_file, pred_file):
+    # Streaming evaluation of a GT and a tracker file (KITTI text or .npy)
+    return print_summary(summarize(stream_accumulator(gt_file, pred_file)))
 
-gt_data = read_kitti_gt_file(gt_file, allowed_classes=ALLOWED_CLASSES)
-pred_data = read_tracker_file(pred_file, allowed_classes_id=ALLOWED_CLASS_IDS)
+if __name__ == "__main__":
+    # Paths
+    gt_file = '/content/drive/MyDrive/kitti_tracking/data_tracking_label_2/training/label_02/0000.txt'
+    pred_file = '/content/drive/MyDrive/kitti_tracking/tracks_bytetrack/0000.txt'
 
-evaluate_mot(gt_data, pred_data)
+    evaluate_mot_files(gt_file, pred_file)
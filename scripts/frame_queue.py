@@ -0,0 +1,66 @@
+# Bounded frame queue with drop policies
+# This piece of code does the following:
+# Hands frames from a producer (e.g. a ROS subscription callback) to a worker thread without ever blocking the producer.
+# When the queue is full, one frame is dropped according to the policy and counted:
+# 'drop_oldest': the oldest queued frame is dropped (with maxsize=1 this is latest-frame-wins, the worker always gets the newest frame)
+# 'drop_newest': the incoming frame is dropped (keeps order, the worker finishes what is already queued)
+# 'block':       the producer waits for space (no drops, for offline pipelines where every frame matters)
+
+import threading
+from collections import deque
+
+DROP_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+class FrameQueue:
+    def __init__(self, maxsize=1, drop_policy="drop_oldest"):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy '{drop_policy}', expected one of {DROP_POLICIES}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.drop_policy = drop_policy
+        self.items = deque()
+        self.dropped = 0
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def put(self, item):
+        # Returns False if the item was dropped (or the queue is closed)
+        with self.cond:
+            if self.drop_policy == "block":
+                while len(self.items) >= self.maxsize and not self.closed:
+                    self.cond.wait()
+            if self.closed:
+                return False
+            accepted = True
+            if len(self.items) >= self.maxsize:
+                self.dropped += 1
+                if self.drop_policy == "drop_oldest":
+                    self.items.popleft()
+                else:
+                    accepted = False
+            if accepted:
+                self.items.append(item)
+            self.cond.notify_all()
+            return accepted
+
+    def get(self, timeout=None):
+        # Next item, or None on timeout / when closed and empty
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self.cond.notify_all()
+            return item
+
+    def close(self):
+        # Wake up everyone waiting, remaining items can still be read
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def __len__(self):
+        with self.cond:
+            return len(self.items)
@@ -0,0 +1,81 @@
+# Frame-ordered streaming readers / writer
+# This module does the following:
+# Reads result files one frame at a time instead of loading the whole file into a dict of lists:
+# iter_frames() groups consecutive (frame_id, row) pairs of a frame-sorted file into (frame_id, [rows]), one frame in memory.
+# iter_store_frames() does the same for binary (.npy) files, slicing one frame at a time from the memory-mapped BoxStore.
+# merge_frames() walks several frame-ordered streams together (e.g. GT + predictions) and yields (frame_id, rows_a, rows_b, ...),
+# with [] where a stream has nothing for that frame. With frame_range it yields every frame of the range, also empty ones.
+# TrackWriter appends tracker output frame by frame, with the same layout as '\n'.join over the whole sequence.
+# Used by bytetrack_tracker.py, evaluation.py, visualize_results.py, run_sequences.py and stream_pipeline.py.
+
+# Note:
+# Inputs must be sorted by frame (KITTI labels and every file written by this repo are). A frame going backwards raises
+# ValueError instead of silently splitting a frame in two.
+
+from box_store import BoxStore, frame_array
+
+def iter_frames(rows):
+    # rows: (frame_id, row) pairs in file order, None entries (filtered lines) are skipped -> (frame_id, [rows])
+    frame_id, group = None, []
+    for item in rows:
+        if item is None:
+            continue
+        f, row = item
+        if f != frame_id:
+            if frame_id is not None and f < frame_id:
+                raise ValueError(f"Input is not sorted by frame (frame {f} after {frame_id})")
+            if group:
+                yield frame_id, group
+            frame_id, group = f, []
+        group.append(row)
+    if group:
+        yield frame_id, group
+
+def iter_store_frames(path, fields, keep=None):
+    # BoxStore (.npy) -> (frame_id, (N, k) array of the fields) for frames with rows, keep(records) -> optional boolean mask
+    # (e.g. class filter). Rows stay NumPy arrays, callers that need Python lists convert at their end
+    for frame_id, records in BoxStore(path).frames():
+        if keep is not None:
+            records = records[keep(records)]
+        if len(records):
+            yield frame_id, frame_array(records, fields)
+
+def merge_frames(*streams, frame_range=None):
+    # Frame-ordered streams of (frame_id, rows) -> (frame_id, rows of stream 1, rows of stream 2, ...)
+    # frame_range = None: every frame present in any stream. (start, end): every frame in [start, end), rows outside are skipped
+    iters = [iter(s) for s in streams]
+    heads = [next(it, None) for it in iters]
+
+    def take(frame_id):
+        out = []
+        for i, head in enumerate(heads):
+            while head is not None and head[0] < frame_id:                                              # Outside the range
+                head = next(iters[i], None)
+            if head is not None and head[0] == frame_id:
+                out.append(head[1])
+                head = next(iters[i], None)
+            else:
+                out.append([])
+            heads[i] = head
+        return (frame_id, *out)
+
+    if frame_range is not None:
+        for frame_id in range(*frame_range):
+            yield take(frame_id)
+        return
+    while True:
+        pending = [head[0] for head in heads if head is not None]
+        if not pending:
+            return
+        yield take(min(pending))
+
+class TrackWriter:
+    # Appends each frame's lines to an open text file, output identical to f.write('\n'.join(all lines))
+    def __init__(self, f):
+        self.f = f
+        self.empty = True
+
+    def write(self, lines):
+        if lines:
+            self.f.write(("" if self.empty else "\n") + "\n".join(lines))
+            self.empty = False
@@ -0,0 +1,122 @@
+# Runtime instrumentation: per-stage timers, rolling latency percentiles, gauges and counters
+# This piece of code does the following:
+# Times hot-path stages with 'with metrics.stage("detect"):' and keeps the last 'window' samples per stage in a ring buffer.
+# Reports p50 / p95 / p99 / mean / max latency per stage, plus gauges (e.g. track count) and counters (e.g. dropped frames).
+# Snapshots can be rendered as text / JSON, or written periodically to a file by JsonFileExporter.
+# When disabled, stage() returns one shared no-op context and observe / gauge / count return immediately (near-zero overhead).
+# ROS-free, the tracker node publishes the same snapshot on /diagnostics.
+
+import os
+import json
+import time
+import threading
+import numpy as np
+from contextlib import nullcontext
+
+_NO_OP = nullcontext()
+
+class RollingStat:
+    # Fixed-size ring buffer of the latest samples (seconds)
+    def __init__(self, window):
+        self.values = np.zeros(window, dtype=np.float64)
+        self.count = 0                                                                                  # Total samples ever observed
+
+    def add(self, value):
+        self.values[self.count % len(self.values)] = value
+        self.count += 1
+
+    def summary(self):
+        ms = self.values[:min(self.count, len(self.values))] * 1000.0
+        if len(ms) == 0:
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        return {"count": self.count, "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+                "mean_ms": float(ms.mean()), "max_ms": float(ms.max())}
+
+class _StageTimer:
+    __slots__ = ("stat", "start")
+
+    def __init__(self, stat):
+        self.stat = stat
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stat.add(time.perf_counter() - self.start)
+        return False
+
+class Metrics:
+    def __init__(self, enabled=True, window=1000):
+        self.enabled = enabled
+        self.window = window
+        self.stats = {}                                                                                 # { stage: RollingStat }
+        self.gauges = {}                                                                                # { name: last value }
+        self.counters = {}                                                                              # { name: total }
+        self.lock = threading.Lock()                                                                    # Only guards creating new stats / snapshots
+
+    def _stat(self, name):
+        stat = self.stats.get(name)
+        if stat is None:
+            with self.lock:
+                stat = self.stats.setdefault(name, RollingStat(self.window))
+        return stat
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NO_OP
+        return _StageTimer(self._stat(name))
+
+    def observe(self, name, seconds):
+        if self.enabled:
+            self._stat(name).add(seconds)
+
+    def gauge(self, name, value):
+        if self.enabled:
+            self.gauges[name] = value
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+        return {"time": time.time(),
+                "stages": {name: stat.summary() for name, stat in stats.items()},
+                "gauges": dict(self.gauges),
+                "counters": dict(self.counters)}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_text(self):
+        snap = self.snapshot()
+        lines = []
+        for name, s in snap["stages"].items():
+            if s["count"]:
+                lines.append(f"{name:<16} n={s['count']:<7} p50 {s['p50_ms']:8.2f} ms  p95 {s['p95_ms']:8.2f} ms  "
+                             f"p99 {s['p99_ms']:8.2f} ms  max {s['max_ms']:8.2f} ms")
+        lines += [f"{name:<16} {value}" for name, value in {**snap["gauges"], **snap["counters"]}.items()]
+        return "\n".join(lines)
+
+class JsonFileExporter:
+    # Writes metrics snapshots to a local file (JSON, or text if the path ends with .txt), at most every 'period_s' seconds
+    def __init__(self, metrics, path, period_s=5.0):
+        self.metrics = metrics
+        self.path = path
+        self.period_s = period_s
+        self.last_export = 0.0
+
+    def maybe_export(self):
+        now = time.monotonic()
+        if now - self.last_export < self.period_s:
+            return False
+        self.last_export = now
+        text = self.metrics.to_text() if self.path.endswith(".txt") else self.metrics.to_json()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, self.path)                                                                 # Readers never see a half-written file
+        return True
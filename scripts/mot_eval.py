@@ -0,0 +1,118 @@
+# Vectorized, streaming MOT evaluation
+# This piece of code does the following:
+# Loads GT and tracker output as whole-sequence arrays (frame, track_id, box), sorted and grouped by frame (text or .npy inputs).
+# Filters classes with one vectorized mask and slices each frame's boxes with frame offsets (no per-frame Python lists).
+# Computes each frame's GT x prediction IoU distance matrix in one NumPy call (box_ops.iou_matrix), no np.asfarray patch needed.
+# Feeds the motmetrics accumulator frame by frame (same Hungarian matching, same metrics as evaluation.py).
+# OnlineMOTEvaluator takes one frame at a time, so a running tracker (TrackerNode) can report MOTA / IDF1 while it runs.
+
+# Note:
+# evaluation.py passes [x1, y1, x2, y2] boxes to mm.distances.iou_matrix, which reads them as (x, y, w, h).
+# legacy_xywh=True (default) reproduces that, so numbers match evaluation.py and the README table.
+# legacy_xywh=False computes the true corner-format IoU.
+# Like evaluation.py, only frames that have GT (of the allowed classes) are evaluated.
+
+import numpy as np
+import motmetrics as mm
+from box_ops import iou_matrix
+from box_store import load_records, KITTI_CLASS_TO_ID
+
+# Config
+gt_file = '/content/drive/MyDrive/kitti_tracking/data_tracking_label_2/training/label_02/0000.txt'
+pred_file = '/content/drive/MyDrive/kitti_tracking/tracks_bytetrack/0000.txt'
+ALLOWED_CLASSES = ["Car", "Pedestrian"]                                                                 # For KITTI ground truth file
+ALLOWED_CLASS_IDS = [0, 2]                                                                              # For tracker output, 0 = person, 2 = car
+MAX_IOU_DISTANCE = 0.5                                                                                  # Pairs with 1 - IoU above this can't match
+
+def load_gt_arrays(file_path, allowed_classes=ALLOWED_CLASSES):
+    # KITTI labels (text or .npy) -> (frames, track_ids, boxes), sorted by frame
+    records = load_records(file_path, "kitti_labels")
+    records = records[np.isin(records["cls"], [KITTI_CLASS_TO_ID[c] for c in allowed_classes])]
+    return sort_by_frame(records)
+
+def load_pred_arrays(file_path, allowed_class_ids=ALLOWED_CLASS_IDS):
+    # Tracker output (text or .npy) -> (frames, track_ids, boxes), sorted by frame
+    records = load_records(file_path, "tracks")
+    records = records[np.isin(records["cls"], allowed_class_ids)]
+    return sort_by_frame(records)
+
+def sort_by_frame(records):
+    order = np.argsort(records["frame"], kind="stable")
+    return (np.asarray(records["frame"][order], dtype=np.int64),
+            np.asarray(records["track_id"][order], dtype=np.int64),
+            np.asarray(records["box"][order], dtype=np.float64))
+
+def frame_slices(frames):
+    # { frame_id: slice } for sorted frame IDs
+    unique, starts = np.unique(frames, return_index=True)
+    ends = np.append(starts[1:], len(frames))
+    return {int(f): slice(int(s), int(e)) for f, s, e in zip(unique, starts, ends)}
+
+def distance_matrix(gt_boxes, pred_boxes, max_iou=MAX_IOU_DISTANCE, legacy_xywh=True):
+    # 1 - IoU for all GT x prediction pairs, NaN where the pair is not allowed to match
+    gt_boxes = np.asarray(gt_boxes, dtype=np.float64).reshape(-1, 4)
+    pred_boxes = np.asarray(pred_boxes, dtype=np.float64).reshape(-1, 4)
+    if legacy_xywh:                                                                                     # Read (x1, y1, x2, y2) as (x, y, w, h), see note above
+        gt_boxes = np.concatenate([gt_boxes[:, :2], gt_boxes[:, :2] + gt_boxes[:, 2:]], axis=1)
+        pred_boxes = np.concatenate([pred_boxes[:, :2], pred_boxes[:, :2] + pred_boxes[:, 2:]], axis=1)
+    dist = 1.0 - iou_matrix(gt_boxes, pred_boxes)
+    dist[dist > max_iou] = np.nan
+    return dist
+
+class OnlineMOTEvaluator:
+    def __init__(self, gt=None, max_iou=MAX_IOU_DISTANCE, legacy_xywh=True):
+        # gt: optional (frames, track_ids, boxes) arrays, needed for update_frame()
+        self.acc = mm.MOTAccumulator(auto_id=True)
+        self.mh = mm.metrics.create()
+        self.max_iou = max_iou
+        self.legacy_xywh = legacy_xywh
+        self.num_frames = 0
+        self.gt = gt
+        self.gt_slices = frame_slices(gt[0]) if gt is not None else {}
+
+    def update(self, gt_ids, gt_boxes, pred_ids, pred_boxes):
+        # One frame: GT and predictions as arrays / lists
+        dists = distance_matrix(gt_boxes, pred_boxes, self.max_iou, self.legacy_xywh)
+        self.acc.update(np.asarray(gt_ids), np.asarray(pred_ids), dists)                                # Hungarian matching for this frame
+        self.num_frames += 1
+
+    def update_frame(self, frame_id, pred_ids, pred_boxes):
+        # One frame against the preloaded GT, returns False if the frame has no GT (not evaluated)
+        s = self.gt_slices.get(frame_id)
+        if s is None:
+            return False
+        self.update(self.gt[1][s], self.gt[2][s], pred_ids, pred_boxes)
+        return True
+
+    @property
+    def last_gt_frame(self):
+        return max(self.gt_slices) if self.gt_slices else -1
+
+    def summary(self, metrics=mm.metrics.motchallenge_metrics, name='summary'):
+        return self.mh.compute(self.acc, metrics=metrics, name=name)                                    # One-row DataFrame
+
+    def running_metrics(self):
+        # Small set of metrics for periodic logging
+        s = self.summary(metrics=['mota', 'idf1', 'num_switches', 'num_false_positives', 'num_misses']).iloc[0]
+        return {'frames': self.num_frames, 'mota': float(s['mota']), 'idf1': float(s['idf1']), 'ids': int(s['num_switches']),
+                'fp': int(s['num_false_positives']), 'fn': int(s['num_misses'])}
+
+    def render(self, name='summary'):
+        return mm.io.render_summary(self.summary(name=name), formatters=self.mh.formatters, namemap=mm.io.motchallenge_metric_names)
+
+def evaluate_arrays(gt, pred, max_iou=MAX_IOU_DISTANCE, legacy_xywh=True):
+    # Whole-sequence evaluation: gt / pred = (frames, track_ids, boxes) arrays
+    evaluator = OnlineMOTEvaluator(gt, max_iou=max_iou, legacy_xywh=legacy_xywh)
+    pred_slices = frame_slices(pred[0])
+    empty = slice(0, 0)
+    for frame_id in sorted(evaluator.gt_slices):
+        s = pred_slices.get(frame_id, empty)
+        evaluator.update_frame(frame_id, pred[1][s], pred[2][s])
+    return evaluator
+
+def evaluate_files(gt_file, pred_file, max_iou=MAX_IOU_DISTANCE, legacy_xywh=True):
+    return evaluate_arrays(load_gt_arrays(gt_file), load_pred_arrays(pred_file), max_iou=max_iou, legacy_xywh=legacy_xywh)
+
+if __name__ == "__main__":
+    evaluator = evaluate_files(gt_file, pred_file)
+    print(evaluator.render())
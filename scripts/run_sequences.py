@@ -0,0 +1,139 @@
+# Multi-sequence pipeline runner (full KITTI tracking set)
+# This piece of code does the following:
+# Discovers all sequences under the KITTI image folder (0000, 0001, ...).
+# Runs detection -> tracking -> evaluation per sequence, spread over process pools.
+# Detection uses its own pool of 'max_models' processes, each loads YOLOv8 once, so at most 'max_models' models are in memory.
+# Tracking + evaluation run in a second pool as soon as a sequence's detections are ready (one BYTETracker per sequence).
+# Aggregates MOT metrics over all sequences (per-sequence rows + OVERALL, like motmetrics' compute_many).
+# Sequences whose outputs already exist are skipped on re-run (files are written atomically, so partial outputs never count as done).
+
+import os
+import time
+import cv2
+from contextlib import contextmanager
+import motmetrics as mm
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from detector import load_detector
+from yolov8_detect import list_frames, detect_sequence
+from bytetrack_tracker import iter_detections, iter_tracks
+from evaluation import stream_accumulator
+from frame_stream import TrackWriter
+from class_resolver import CYCLIST_IOU_THRESH                                                           # Shared cyclist threshold
+
+# Config
+kitti_root = "/content/drive/MyDrive/kitti_tracking"
+image_root = os.path.join(kitti_root, "data_tracking_image_2/training/image_02")
+label_root = os.path.join(kitti_root, "data_tracking_label_2/training/label_02")
+output_root = os.path.join(kitti_root, "pipeline_output")                                               # detections/<seq>.txt, tracks/<seq>.txt
+sequences = None                                                                                        # None = all discovered sequences, or e.g. ["0000", "0001"]
+
+model_path = "yolov8s.pt"
+detector_backend = "torch"                                                                              # 'torch', 'onnx' or 'onnx_int8' (see detector.py)
+detector_threads = None                                                                                 # CPU threads per detection process, None = library default
+conf_thresh = 0.6
+cyclist_iou_thresh = CYCLIST_IOU_THRESH
+batch_size = 8
+max_models = 1                                                                                          # Concurrent YOLO model instances (detection processes)
+num_workers = os.cpu_count()                                                                            # Tracking + evaluation processes
+tracker_args = SimpleNamespace(track_thresh=0.5, track_buffer=30, match_thresh=0.8, mot20=False, min_box_area=100)
+frame_rate = 30
+
+def discover_sequences(image_root):
+    return sorted(d for d in os.listdir(image_root) if os.path.isdir(os.path.join(image_root, d)))
+
+@contextmanager
+def atomic_open(path):
+    # Write to a temp file first, then rename, so a crash never leaves a half-written "finished" output
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        yield f
+    os.replace(tmp_path, path)
+
+def write_atomic(path, text):
+    with atomic_open(path) as f:
+        f.write(text)
+
+# Detection processes: one model per process, loaded once
+_detector = None
+
+def _init_detector(backend, model_path, num_threads):
+    global _detector
+    _detector = load_detector(backend, model_path, num_threads=num_threads)
+
+def detect_job(seq, image_dir, det_path):
+    frame_paths = list_frames(image_dir)
+    lines, fps = detect_sequence(_detector, frame_paths, conf_thresh, cyclist_iou_thresh, batch_size=batch_size)
+    write_atomic(det_path, "".join(lines))
+    return seq, fps
+
+def track_eval_job(seq, image_dir, det_path, track_path, gt_path):
+    # Tracking (skipped if done) + evaluation for one sequence, returns its motmetrics accumulator
+    # Both stream frame by frame: detections are read and tracks written one frame at a time, GT and tracks are merged by frame
+    if not os.path.exists(track_path):
+        frame_paths = list_frames(image_dir)
+        h, w = cv2.imread(frame_paths[0]).shape[:2]
+        with atomic_open(track_path) as f:
+            writer = TrackWriter(f)
+            for _, lines in iter_tracks(iter_detections(det_path), len(frame_paths), (h, w), tracker_args, frame_rate=frame_rate):
+                writer.write(lines)
+
+    if not os.path.exists(gt_path):
+        return seq, None                                                                                # Testing split has no labels
+    return seq, stream_accumulator(gt_path, track_path)
+
+def run_pipeline(seqs):
+    paths = {seq: dict(image_dir=os.path.join(image_root, seq),
+                       det_path=os.path.join(output_root, "detections", f"{seq}.txt"),
+                       track_path=os.path.join(output_root, "tracks", f"{seq}.txt"),
+                       gt_path=os.path.join(label_root, f"{seq}.txt")) for seq in seqs}
+    accs = {}
+
+    with ProcessPoolExecutor(max_workers=max_models, initializer=_init_detector,
+                             initargs=(detector_backend, model_path, detector_threads)) as det_pool, \
+         ProcessPoolExecutor(max_workers=num_workers) as track_pool:
+
+        def submit_tracking(seq):
+            p = paths[seq]
+            return track_pool.submit(track_eval_job, seq, p["image_dir"], p["det_path"], p["track_path"], p["gt_path"])
+
+        track_futures = []
+        det_futures = []
+        for seq in seqs:
+            p = paths[seq]
+            if os.path.exists(p["track_path"]) or os.path.exists(p["det_path"]):
+                print(f"[{seq}] detections found, skipping detection")
+                track_futures.append(submit_tracking(seq))
+            else:
+                det_futures.append(det_pool.submit(detect_job, seq, p["image_dir"], p["det_path"]))
+
+        for fut in as_completed(det_futures):                                                           # Start tracking as soon as each sequence is detected
+            seq, fps = fut.result()
+            print(f"[{seq}] detection done ({fps:.1f} frames/sec)")
+            track_futures.append(submit_tracking(seq))
+
+        for fut in as_completed(track_futures):
+            seq, acc = fut.result()
+            print(f"[{seq}] tracking + evaluation done")
+            if acc is not None:
+                accs[seq] = acc
+    return accs
+
+def summarize(accs):
+    # Per-sequence rows + OVERALL row computed over all frames of all sequences
+    names = sorted(accs)
+    mh = mm.metrics.create()
+    summary = mh.compute_many([accs[n] for n in names], names=names, metrics=mm.metrics.motchallenge_metrics, generate_overall=True)
+    print(mm.io.render_summary(summary, formatters=mh.formatters, namemap=mm.io.motchallenge_metric_names))
+    return summary
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    seqs = sequences or discover_sequences(image_root)
+    print(f"Running {len(seqs)} sequences with {max_models} model(s) and {num_workers} tracking workers")
+    accs = run_pipeline(seqs)
+    if accs:
+        summary = summarize(accs)
+        summary.to_csv(os.path.join(output_root, "summary.csv"))
+    print(f"Finished in {time.perf_counter() - start:.1f}s, outputs in: {output_root}")
@@ -0,0 +1,185 @@
+# Single-process streaming pipeline: decode -> detect -> filter -> track -> write -> (optional) evaluate
+# This piece of code does the following:
+# Runs the whole offline pipeline for one sequence in one process, without handing off through intermediate files.
+# Stages run in threads connected by bounded queues (FrameQueue, 'block' policy: no frame is dropped, a fast stage waits):
+# 1) Decode thread: reads each image once, the frame size for the tracker is taken from the decoded image.
+# 2) Detect thread: batched YOLOv8 + cyclist filter, the image is released right after detection.
+# 3) Main thread: BYTETrack, appends each frame's tracks to the output file, and feeds the online evaluator if a GT file is set.
+# Memory stays constant regardless of sequence length (at most 'queue_size' frames in flight, outputs are written as they come).
+# Writing the detection file (same format as yolov8_detect.py) is optional.
+# Optional keyframe scheduling (detection_scheduler.py): YOLO only runs on keyframes, the other frames skip the detect thread's
+# model call and the tracker coasts its tracks on the Kalman prediction. The scheduler adapts the interval from the measured
+# detection / tracking latency (vs latency_budget_s) and the tracker's motion and track count.
+
+# Note:
+# Detections go through the same text formatting as the detection file (2 decimals), so tracks and metrics are identical
+# to running yolov8_detect.py -> bytetrack_tracker.py -> evaluation.py one after the other.
+# Only the optional evaluator grows with sequence length (motmetrics keeps one event list per evaluated frame).
+# With scheduling, the interval reacts to the tracks of frames already tracked (up to batch_size + queue_size frames behind),
+# use batch_size = 1 for the fastest reaction.
+
+import os
+import time
+import threading
+import numpy as np
+from types import SimpleNamespace
+from yolov8_detect import list_frames, load_frame, filter_detections
+from detector import load_detector
+from detection_scheduler import DetectionScheduler
+from bytetrack_tracker import parse_detection_lines, format_tracks
+from frame_stream import TrackWriter
+from byte_tracker import BYTETracker
+from frame_queue import FrameQueue
+from mot_eval import OnlineMOTEvaluator, load_gt_arrays, ALLOWED_CLASS_IDS
+from instrumentation import Metrics
+from class_resolver import CYCLIST_IOU_THRESH                                                           # Shared cyclist threshold
+
+# Config
+model_path = "yolov8s.pt"
+backend = "torch"                                                                                       # 'torch', 'onnx' or 'onnx_int8' (see detector.py)
+num_threads = None
+image_dir = "/content/drive/MyDrive/kitti_tracking/data_tracking_image_2/training/image_02/0000"
+gt_file = "/content/drive/MyDrive/kitti_tracking/data_tracking_label_2/training/label_02/0000.txt"      # None = no evaluation
+output_track_file = "/content/drive/MyDrive/kitti_tracking/tracks_bytetrack/0000.txt"
+output_det_file = None                                                                                  # e.g. "/content/filtered_0000.txt", None = don't write
+conf_thresh = 0.6
+cyclist_iou_thresh = CYCLIST_IOU_THRESH
+batch_size = 8                                                                                          # Frames per model.predict call
+queue_size = 16                                                                                         # Max frames waiting between two stages
+tracker_args = SimpleNamespace(track_thresh=0.5, track_buffer=30, match_thresh=0.8, mot20=False, min_box_area=100)
+frame_rate = 30
+scheduling = False                                                                                      # True = detect on keyframes only (detection_scheduler.py)
+scheduler_args = dict(min_interval=1, max_interval=4, latency_budget_s=None, max_shift=0.25, crowd_tracks=20)
+
+def decode_stage(frame_paths, out_queue, metrics):
+    try:
+        for frame_id, path in enumerate(frame_paths):
+            with metrics.stage("decode"):
+                frame = load_frame(path)
+            if not out_queue.put((frame_id, frame)):
+                return                                                                                  # Downstream stopped
+    finally:
+        out_queue.close()
+
+def detect_stage(detector, in_queue, out_queue, batch_size, conf_thresh, cyclist_iou_thresh, metrics, scheduler=None):
+    # Output items: (frame_id, (h, w), BYTETrack detection lines), lines = None for frames skipped by the scheduler
+    try:
+        batch, num_keyframes = [], 0
+        while True:
+            item = in_queue.get(timeout=0.5)
+            if item is not None:
+                frame_id, frame = item
+                key = scheduler is None or scheduler.is_keyframe()
+                batch.append((frame_id, frame if key else None, frame.shape[:2]))                       # Skipped frames are released here
+                num_keyframes += key
+            finished = item is None and in_queue.closed and len(in_queue) == 0
+            if batch and (num_keyframes == batch_size or finished):
+                rows = iter(())
+                if num_keyframes:
+                    start = time.perf_counter()
+                    rows = iter(detector.predict([frame for _, frame, _ in batch if frame is not None], conf_thresh))
+                    elapsed = time.perf_counter() - start
+                    metrics.observe("detect", elapsed / num_keyframes)                                  # Per frame
+                    if scheduler is not None:
+                        scheduler.observe_latency(detect_s=elapsed / num_keyframes)
+                for frame_id, frame, hw in batch:
+                    lines = None
+                    if frame is not None:
+                        with metrics.stage("filter"):
+                            lines = filter_detections(next(rows), frame_id, cyclist_iou_thresh)
+                    if not out_queue.put((frame_id, hw, lines)):
+                        return
+                batch, num_keyframes = [], 0
+            if finished:
+                return
+    finally:
+        out_queue.close()
+
+def run_stream(frame_paths, detector, output_track_file, output_det_file=None, gt_file=None, batch_size=8, queue_size=16,
+               conf_thresh=0.6, cyclist_iou_thresh=CYCLIST_IOU_THRESH, args=tracker_args, frame_rate=30, metrics=None, scheduler=None):
+    # Runs all stages for one sequence, returns (frames processed, evaluator or None, metrics)
+    # scheduler: optional DetectionScheduler, shared by the detect thread (keyframe decisions) and the tracker (feedback)
+    metrics = metrics or Metrics(window=1000)
+    decoded = FrameQueue(queue_size, "block")
+    detected = FrameQueue(queue_size, "block")
+    errors = []
+
+    def guarded(target, *stage_args):
+        try:
+            target(*stage_args)
+        except BaseException as e:                                                                      # Re-raised in the main thread
+            errors.append(e)
+
+    threads = [threading.Thread(target=guarded, args=(decode_stage, frame_paths, decoded, metrics), daemon=True),
+               threading.Thread(target=guarded, args=(detect_stage, detector, decoded, detected, batch_size, conf_thresh, cyclist_iou_thresh, metrics, scheduler), daemon=True)]
+    for t in threads:
+        t.start()
+
+    tracker = BYTETracker(args, frame_rate=frame_rate)
+    evaluator = OnlineMOTEvaluator(load_gt_arrays(gt_file)) if gt_file else None
+    os.makedirs(os.path.dirname(output_track_file) or ".", exist_ok=True)
+    det_f = open(output_det_file, "w") if output_det_file else None
+    num_frames = 0
+    try:
+        with open(output_track_file, "w") as track_f:
+            writer = TrackWriter(track_f)                                                               # Same layout as '\n'.join over the sequence
+            while True:
+                item = detected.get(timeout=0.5)
+                if item is None:
+                    if detected.closed and len(detected) == 0:
+                        break
+                    continue
+                frame_id, (h, w), det_lines = item
+
+                start = time.perf_counter()
+                with metrics.stage("track"):
+                    if det_lines is None:
+                        tracks = tracker.coast()                                                        # Not a keyframe
+                    else:
+                        dets = parse_detection_lines(det_lines).get(frame_id, [])
+                        dets_np = np.array(dets, dtype=np.float32).reshape(-1, 6)
+                        tracks = tracker.update(dets_np, img_info=(h, w), img_size=(h, w))
+                if scheduler is not None:
+                    scheduler.observe_tracks(tracker.motion())
+                    scheduler.observe_latency(frame_s=time.perf_counter() - start)
+                    metrics.gauge("keyframe_interval", scheduler.interval)
+
+                with metrics.stage("write"):
+                    if det_f is not None and det_lines is not None:
+                        det_f.writelines(det_lines)
+                    writer.write(format_tracks(frame_id, tracks))
+
+                if evaluator is not None:
+                    with metrics.stage("evaluate"):
+                        keep = [t for t in tracks if t.cls in ALLOWED_CLASS_IDS]
+                        boxes = np.round([t.tlbr for t in keep], 2).astype(np.float32)                  # As read back from the track file
+                        evaluator.update_frame(frame_id, [t.track_id for t in keep], boxes)
+                num_frames += 1
+    finally:
+        decoded.close()                                                                                 # Unblocks upstream stages on early exit
+        detected.close()
+        if det_f is not None:
+            det_f.close()
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+    return num_frames, evaluator, metrics
+
+if __name__ == "__main__":
+    frame_paths = list_frames(image_dir)
+    detector = load_detector(backend, model_path, num_threads=num_threads)
+    scheduler = DetectionScheduler(**scheduler_args) if scheduling else None
+    start = time.perf_counter()
+    num_frames, evaluator, metrics = run_stream(frame_paths, detector, output_track_file, output_det_file=output_det_file,
+                                                gt_file=gt_file, batch_size=batch_size, queue_size=queue_size,
+                                                conf_thresh=conf_thresh, cyclist_iou_thresh=cyclist_iou_thresh, args=tracker_args, frame_rate=frame_rate,
+                                                scheduler=scheduler)
+    elapsed = time.perf_counter() - start
+    print(f"Processed {num_frames} frames in {elapsed:.1f}s ({num_frames / elapsed:.1f} frames/sec)")
+    if scheduler is not None:
+        print(f"Keyframes: {scheduler.keyframes} / {scheduler.frames} ({100 * scheduler.keyframe_ratio():.0f}%)")
+    print(metrics.to_text())
+    print(f"Saved tracking results to: {output_track_file}")
+    if evaluator is not None:
+        print(evaluator.render())
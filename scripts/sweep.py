@@ -0,0 +1,185 @@
+# Hyperparameter sweep: detection + BYTETrack + evaluation
+# This piece of code does the following:
+# Builds a grid (or random) search over detector params (conf, cyclist IoU) and tracker params (track_thresh, track_buffer, match_thresh).
+# Loads GT and raw detections once, then shares them with every worker process (no re-parsing / re-inference per run).
+# Runs tracking + evaluate_mot for each configuration in a process pool.
+# Prints one consolidated MOTA / IDF1 / IDs table (same layout as the README) and saves it as CSV.
+# Keyframe scheduling (detection_scheduler.py) is part of the grid: max_interval, latency_budget_ms and max_shift.
+# For each config the table adds the share of keyframes and a modelled throughput,
+# frames / (keyframes * detect_ms + measured tracking time), i.e. the MOTA-vs-throughput trade-off of skipping detections.
+# class_resolution compares the per-frame cyclist filter (False) with per-track class / cyclist votes after tracking
+# (True, class_resolver.py): detections keep their bicycles and the resolver decides per track. Needs det_source 'cache'
+# (a detection file has no bicycles left), the 'file' source rejects it.
+
+# Detection source:
+# 'cache': raw YOLO detections from detection_cache.py (one inference pass at base_conf with any detector backend, then filtered
+#          per config).
+# 'file':  an existing BYTETrack detection file (e.g. input/detection_file/filtered_0000.txt). Its scores are already thresholded
+#          and rounded to 2 decimals, so rows are kept with score >= conf - file_conf_tol (a 0.60 row passed conf 0.6), and a conf
+#          below the file's lowest score is rejected (it would only repeat that run). The cyclist filter was already applied.
+# Only the 'cache' source needs the detector (and its libraries), they are imported when it is used.
+
+import os
+import time
+import random
+import itertools
+import cv2
+import numpy as np
+import pandas as pd
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor
+from yolov8_detect import filter_detections
+from detection_scheduler import DetectionScheduler
+from bytetrack_tracker import load_detections, parse_detection_lines, track_sequence
+from evaluation import read_kitti_gt_file, parse_tracker_lines, compute_mot_summary, ALLOWED_CLASSES, ALLOWED_CLASS_IDS
+from class_resolver import ClassResolver, CYCLIST_IOU_THRESH                                            # Shared cyclist threshold
+
+# Config
+det_source = "file"                                                                                     # 'cache' or 'file'
+model_path = "yolov8s.pt"
+backend = "torch"                                                                                       # Detector backend for det_source = 'cache'
+num_threads = None
+image_dir = "/content/drive/MyDrive/kitti_tracking/data_tracking_image_2/training/image_02/0000"
+det_file = "../input/detection_file/filtered_0000.txt"
+gt_file = "../input/kitti_label/0000.txt"
+output_csv = "/content/sweep_0000.csv"
+img_hw = (375, 1242)                                                                                    # KITTI frame size, only used when det_source = 'file'
+frame_rate = 30
+detect_ms = 120.0                                                                                       # One detector call on CPU (e.g. 'detect' p50 of benchmark_pipeline.py)
+file_conf_tol = 0.005                                                                                   # Half the rounding step of the file's scores
+
+search = "grid"                                                                                         # 'grid' or 'random'
+num_random = 20                                                                                         # Number of configs for random search
+seed = 0
+num_workers = os.cpu_count()
+param_grid = {
+    "conf": [0.6, 0.7],                                                                                 # 'file': >= the file's conf, 'cache': >= base_conf
+    "cyclist_iou_thresh": [CYCLIST_IOU_THRESH],
+    "track_thresh": [0.5],
+    "track_buffer": [30],
+    "match_thresh": [0.8],
+    "max_interval": [1, 2, 3, 4],                                                                       # Keyframe scheduling, 1 = detect every frame
+    "latency_budget_ms": [None],                                                                        # Average per-frame budget, None = motion / track count only
+    "max_shift": [0.25],                                                                                # Max drift between detections (box heights)
+    "class_resolution": [False],                                                                        # True = temporal class / cyclist votes (needs det_source 'cache')
+}
+
+# Shared by every worker process (set once by the pool initializer)
+_gt_data = None
+_raw = None
+_num_frames = None
+_img_hw = None
+_det_source = None
+
+def _init_worker(gt_data, raw, num_frames, img_hw, det_source):
+    global _gt_data, _raw, _num_frames, _img_hw, _det_source
+    _gt_data, _raw, _num_frames, _img_hw, _det_source = gt_data, raw, num_frames, img_hw, det_source
+
+def make_configs(param_grid, search="grid", num_random=20, seed=0):
+    keys = list(param_grid.keys())
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(param_grid[k] for k in keys))]
+    if search == "grid":
+        return grid
+    if search == "random":
+        return random.Random(seed).sample(grid, min(num_random, len(grid)))                            # Sample without replacement from the grid
+    raise ValueError(f"Unknown search '{search}', expected 'grid' or 'random'")
+
+def load_raw_from_file(det_file):
+    # BYTETrack detection file -> one (N, 6) array per frame, same layout as the detection cache
+    frame_detections = load_detections(det_file, allowed_class_ids=(0, 1, 2))
+    num_frames = max(frame_detections) + 1 if frame_detections else 0
+    return [np.array(frame_detections.get(i, []), dtype=np.float32).reshape(-1, 6) for i in range(num_frames)]
+
+def select_detections(dets, conf):
+    # Rows of one frame at this conf: YOLO's strict '>' on raw cached scores, rounding-tolerant '>=' on the file's scores
+    if _det_source == "file":
+        return dets[dets[:, 4] >= conf - file_conf_tol]
+    return dets[dets[:, 4] > conf]
+
+def check_file_confs(raw, configs):
+    # conf below the file's threshold keeps every row, i.e. repeats the run at the file's own conf
+    scores = np.concatenate([dets[:, 4] for dets in raw])
+    file_conf = float(scores.min()) if len(scores) else 0.0
+    low = sorted({c["conf"] for c in configs if c["conf"] < file_conf - file_conf_tol})
+    if low:
+        raise ValueError(f"conf {low} below the detection file's threshold ({file_conf:.2f}), use det_source 'cache' for lower conf")
+
+def run_config(config):
+    # One sweep point: filter cached detections -> track -> evaluate
+    resolver = None
+    if config.get("class_resolution"):
+        frame_detections = {i: select_detections(dets[np.isin(dets[:, 5], (0, 1, 2))], config["conf"]).tolist()   # Bicycles kept for the resolver
+                            for i, dets in enumerate(_raw)}
+        resolver = ClassResolver(cyclist_iou_thresh=config["cyclist_iou_thresh"])
+    else:
+        det_lines = []
+        for frame_id, dets in enumerate(_raw):
+            det_lines.extend(filter_detections(select_detections(dets, config["conf"]).tolist(), frame_id, config["cyclist_iou_thresh"]))
+        frame_detections = parse_detection_lines(det_lines)
+    tracker_args = SimpleNamespace(track_thresh=config["track_thresh"], track_buffer=config["track_buffer"],
+                                   match_thresh=config["match_thresh"], mot20=False, min_box_area=100)
+    budget_ms = config.get("latency_budget_ms")
+    scheduler = DetectionScheduler(max_interval=config.get("max_interval", 1), max_shift=config.get("max_shift", 0.25),
+                                   latency_budget_s=None if budget_ms is None else budget_ms / 1000)
+    scheduler.observe_latency(detect_s=detect_ms / 1000)
+    start = time.perf_counter()
+    track_lines = track_sequence(frame_detections, _num_frames, _img_hw, tracker_args, frame_rate=frame_rate, scheduler=scheduler,
+                                 resolver=resolver)
+    track_s = time.perf_counter() - start
+    pred_data = parse_tracker_lines(track_lines, ALLOWED_CLASS_IDS)
+    summary = compute_mot_summary(_gt_data, pred_data)
+    throughput = {"keyframes": scheduler.keyframe_ratio(), "fps": _num_frames / (scheduler.keyframes * detect_ms / 1000 + track_s)}
+    return dict(config, **throughput, **summary.iloc[0].to_dict())
+
+def render_table(results, param_names):
+    # Markdown table in the README layout (params first, then metrics)
+    header = [*param_names, "Keyframes", "FPS", "MOTA", "IDF1", "IDP", "IDR", "FP", "FN", "IDs", "GT MT/PT/ML"]
+    rows = []
+    for r in results:
+        rows.append([*(str(r[p]) for p in param_names), f"{100 * r['keyframes']:.0f}%", f"{r['fps']:.1f}",
+                     f"{100 * r['mota']:.1f}%", f"{100 * r['idf1']:.1f}%", f"{100 * r['idp']:.1f}%", f"{100 * r['idr']:.1f}%",
+                     str(int(r['num_false_positives'])), str(int(r['num_misses'])), str(int(r['num_switches'])),
+                     f"{int(r['num_unique_objects'])} ({int(r['mostly_tracked'])} MT, {int(r['partially_tracked'])} PT, {int(r['mostly_lost'])} ML)"])
+    widths = [max(len(h), *(len(row[i]) for row in rows)) for i, h in enumerate(header)]
+    lines = ["| " + " | ".join(h.ljust(w) for h, w in zip(header, widths)) + " |",
+             "| " + " | ".join("-" * w for w in widths) + " |"]
+    lines += ["| " + " | ".join(c.ljust(w) for c, w in zip(row, widths)) + " |" for row in rows]
+    return "\n".join(lines)
+
+def run_sweep(configs, gt_data, raw, num_frames, img_hw, num_workers, det_source="file"):
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                             initargs=(gt_data, raw, num_frames, img_hw, det_source)) as pool:
+        return list(pool.map(run_config, configs))                                                     # Results keep the config order
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    gt_data = read_kitti_gt_file(gt_file, allowed_classes=ALLOWED_CLASSES)                              # Parsed once for all runs
+
+    configs = make_configs(param_grid, search=search, num_random=num_random, seed=seed)
+    if det_source == "cache":
+        from detector import load_detector                                                              # Only the cache source runs the detector
+        from yolov8_detect import list_frames
+        from detection_cache import DetectionCache, model_id, detect_raw_cached, base_conf, predict_settings, cache_dir
+        frame_paths = list_frames(image_dir)
+        settings = dict(predict_settings, base_conf=base_conf)
+        cache = DetectionCache(cache_dir, model_id(model_path, backend), settings)
+        detector = load_detector(backend, model_path, num_threads=num_threads, **predict_settings)
+        raw = detect_raw_cached(detector, frame_paths, cache, base_conf)                                # One inference pass (or none if cached)
+        img_hw = cv2.imread(frame_paths[0]).shape[:2]
+        print(cache.report())
+    elif det_source == "file":
+        raw = load_raw_from_file(det_file)
+        check_file_confs(raw, configs)
+        if any(c.get("class_resolution") for c in configs):                                             # No bicycles left for the cyclist votes
+            raise ValueError("class_resolution needs unfiltered detections (bicycles), the detection file is already cyclist-filtered: "
+                             "use det_source 'cache'")
+    else:
+        raise ValueError(f"Unknown det_source '{det_source}', expected 'cache' or 'file'")
+    num_frames = max(len(raw), max(gt_data) + 1)
+
+    results = run_sweep(configs, gt_data, raw, num_frames, img_hw, num_workers, det_source)
+
+    print(render_table(results, list(param_grid.keys())))
+    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
+    pd.DataFrame(results).to_csv(output_csv, index=False)
+    print(f"{len(configs)} configs in {time.perf_counter() - start:.1f}s with {num_workers} workers, saved to: {output_csv}")
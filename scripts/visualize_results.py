@@ -4,51 +4,106 @@
 # Save these frames into an output video file.
 # Convert the video to a GIF for easy preview.
 
+# Rendering pipeline:
+# Frames are decoded and drawn in a process pool, an ordered writer (pool.imap keeps frame order) appends them to the MP4.
+# The same rendered frames are downscaled in the workers and written as the GIF preview, so the MP4 is never decoded again.
+# Optionally only a frame range and / or a set of track IDs is rendered.
+# GT and predictions are streamed frame by frame (iter_kitti_labels / iter_predictions merged by frame_stream.merge_frames),
+# tasks are built lazily and at most 'max_in_flight' frames are queued for the workers, so memory stays flat for any length.
+
 import os
+import time
+import itertools
+import threading
 import cv2
+from PIL import Image                                                                                 # Writes the GIF preview
+from multiprocessing import Pool
 from collections import defaultdict                                                                   # Automatically initializes an empty list for new keys (similar to setDefault xyz.setdefault(abc, []).append(d)).
-from moviepy.editor import VideoFileClip                                                              # Converts the output video into a GIF
+from box_store import BoxStore, KITTI_CLASSES                                                         # Binary (.npy) inputs
+from frame_stream import iter_frames, merge_frames                                                    # Frame-by-frame reading
 
 # Config
 image_dir = '/content/drive/MyDrive/kitti_tracking/data_tracking_image_2/training/image_02/0000'
 gt_file = '/content/drive/MyDrive/kitti_tracking/data_tracking_label_2/training/label_02/0000.txt'
 pred_file = '/content/drive/MyDrive/kitti_tracking/tracks_bytetrack/0000.txt'
 output_video_path = '/content/kitti_tracking_output.mp4'
+gif_path = '/content/kitti_tracking_output.gif'                                                       # None = no GIF
+fps = 10.0
+gif_scale = 0.5                                                                                       # Resize to avoid large GIFs
+gif_max_seconds = 10                                                                                  # GIF covers the first N seconds of the rendered range
+frame_range = None                                                                                    # (start, end) frame indices, end exclusive, None = all
+pred_track_ids = None                                                                                 # e.g. {1, 2}, None = all predicted tracks
+gt_track_ids = None                                                                                   # e.g. {0}, None = all GT tracks
+num_workers = os.cpu_count()
+max_in_flight = 8 * num_workers                                                                       # Frames handed to the pool but not written yet
 
 # Class ID to Name Mapping (YOLO format)
 class_id_to_name = {0: "Pedestrian", 2: "Car"}
 allowed_classes = list(class_id_to_name.values())
 
-# Load GT boxes
-def load_kitti_labels(file_path, allowed_classes):
-    data = defaultdict(list)
+# GT boxes: one (frame, (track_id, label, bbox)) per kept object, in file order
+def kitti_label_rows(file_path, allowed_classes):
+    if file_path.endswith('.npy'):
+        for frame_id, records in BoxStore(file_path).frames():                                        # One memory-mapped frame at a time
+            for track_id, cls, bbox in zip(records['track_id'].tolist(), records['cls'].tolist(), records['box'].tolist()):
+                label = KITTI_CLASSES[cls]
+                if label in allowed_classes:
+                    yield frame_id, (track_id, label, bbox)
+        return
     with open(file_path, 'r') as f:
         for line in f:
             fields = line.strip().split()
+            if len(fields) < 10:
+                continue                                                                              # Skip blank lines
             frame = int(fields[0])
             track_id = int(fields[1])
             label = fields[2]
             if label not in allowed_classes:
                 continue
             bbox = list(map(float, fields[6:10]))                                                     # [left, top, right, bottom]
-            data[frame].append((track_id, label, bbox))                                               # Dictionary keyed by frame number             
-    return data
-
-# Load predictions (YOLO + BYTETrack format)
-def load_predictions(file_path):
-    data = defaultdict(list)
+            yield frame, (track_id, label, bbox)
+
+# Predictions (YOLO + BYTETrack format): one (frame, (track_id, label, bbox, conf)) per line, in file order
+def prediction_rows(file_path):
+    if file_path.endswith('.npy'):
+        for frame_id, records in BoxStore(file_path).frames():
+            for track_id, cls_id, bbox, conf in zip(records['track_id'].tolist(), records['cls'].tolist(),
+                                                    records['box'].tolist(), records['conf'].tolist()):
+                yield frame_id, (track_id, class_id_to_name.get(cls_id, "Unknown"), tuple(bbox), conf)
+        return
     with open(file_path, 'r') as f:
         for line in f:
             fields = line.strip().split()
+            if len(fields) < 10:
+                continue                                                                              # Skip blank lines
             frame = int(fields[0])
             track_id = int(fields[1])
             cls_id = int(fields[2])
             x1, y1, x2, y2 = map(float, fields[6:10])                                                 # KITTI uses [x1, y1, x2, y2]
             conf = float(fields[5]) if len(fields) > 5 else 1.0                                       # fallback if no score
             label = class_id_to_name.get(cls_id, "Unknown")                                           # Store label & unknown (default)
-            data[frame].append((track_id, label, (x1, y1, x2, y2), conf))
+            yield frame, (track_id, label, (x1, y1, x2, y2), conf)
+
+# Load GT boxes / predictions as whole-sequence dicts keyed by frame number
+def load_kitti_labels(file_path, allowed_classes):
+    data = defaultdict(list)
+    for frame, obj in kitti_label_rows(file_path, allowed_classes):
+        data[frame].append(obj)
+    return data
+
+def load_predictions(file_path):
+    data = defaultdict(list)
+    for frame, obj in prediction_rows(file_path):
+        data[frame].append(obj)
     return data
 
+# Streaming versions: (frame, objects) one frame at a time, files must be sorted by frame
+def iter_kitti_labels(file_path, allowed_classes):
+    return iter_frames(kitti_label_rows(file_path, allowed_classes))
+
+def iter_predictions(file_path):
+    return iter_frames(prediction_rows(file_path))
+
 # Colors for GT & predictions
 CLASS_COLORS = {
     "Car": (0, 255, 255),                                                                             # Yellow for GT Car
@@ -58,21 +113,13 @@ CLASS_COLORS = {
     "Unknown": (100, 100, 100)                                                                        # Grey for fallback
 }
 
-# Video generation
-gt_boxes = load_kitti_labels(gt_file, allowed_classes)
-pred_boxes = load_predictions(pred_file)
-
-img_files = sorted(os.listdir(image_dir))
-h, w = cv2.imread(os.path.join(image_dir, img_files[0])).shape[:2]
-fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-out = cv2.VideoWriter(output_video_path, fourcc, 10.0, (w, h))
-
-for frame_idx, img_name in enumerate(img_files):
-    img_path = os.path.join(image_dir, img_name)
+def draw_frame(task):
+    # Worker: decode + draw one frame, returns (MP4 frame, downscaled RGB GIF frame or None)
+    img_path, gt_objs, pred_objs, gif_scale = task
     img = cv2.imread(img_path)
 
     # Draw GT boxes
-    for track_id, label, box in gt_boxes.get(frame_idx, []):
+    for track_id, label, box in gt_objs:
         x1, y1, x2, y2 = map(int, box)
         color = CLASS_COLORS[label]
         cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
@@ -80,23 +127,74 @@ for frame_idx, img_name in enumerate(img_files):
                     cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
     # Draw predicted boxes
-    for track_id, label, box, conf in pred_boxes.get(frame_idx, []):
+    for track_id, label, box, conf in pred_objs:
         x1, y1, x2, y2 = map(int, box)
         color = CLASS_COLORS.get(f"Pred_{label}", CLASS_COLORS["Unknown"])                            # If label, then color of that label else unknown class' color i.e., grey
         cv2.rectangle(img, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
         cv2.putText(img, f"Pred: {label} ID: {track_id}", (int(x1), int(y2) + 15),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
-    out.write(img)
-
-out.release()
-print(f" Video saved to: {output_video_path}")
-
-# Convert the MP4 video to GIF
-mp4_path = "/content/kitti_tracking_output.mp4"
-gif_path = "/content/kitti_tracking_output.gif"
-
-clip = VideoFileClip(mp4_path)
-clip.subclip(0, 10).resize(0.5).write_gif(gif_path, fps=10)                                           # Resize to avoid large GIFs
-
-print(f"GIF saved to: {gif_path}")
+    gif_frame = None
+    if gif_scale is not None:
+        small = cv2.resize(img, None, fx=gif_scale, fy=gif_scale, interpolation=cv2.INTER_AREA)
+        gif_frame = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+    return img, gif_frame
+
+def make_tasks(image_dir, img_files, gt_frames, pred_frames, frame_range=None, pred_track_ids=None, gt_track_ids=None,
+               gif_frames=0, gif_scale=0.5):
+    # Yields one task per frame in the range, with the GT / predicted objects to draw (filtered by track ID)
+    # gt_frames / pred_frames: frame-ordered (frame, objects) streams, e.g. iter_kitti_labels() / iter_predictions()
+    start, end = frame_range if frame_range else (0, len(img_files))
+    frames = merge_frames(gt_frames, pred_frames, frame_range=(start, min(end, len(img_files))))
+    for i, (frame_idx, gt_objs, pred_objs) in enumerate(frames):
+        gt_objs = [o for o in gt_objs if gt_track_ids is None or o[0] in gt_track_ids]
+        pred_objs = [o for o in pred_objs if pred_track_ids is None or o[0] in pred_track_ids]
+        scale = gif_scale if i < gif_frames else None                                                 # Only the GIF part is downscaled
+        yield os.path.join(image_dir, img_files[frame_idx]), gt_objs, pred_objs, scale
+
+def bounded(tasks, slots):
+    # Hands tasks to the pool only while a slot is free (released once the frame is written), Pool.imap would read them all
+    for task in tasks:
+        slots.acquire()
+        yield task
+
+def render(tasks, output_video_path, gif_path, fps, num_workers, max_in_flight=64):
+    # Ordered writer: frames come back in task order, go straight into the MP4 and the GIF frame list
+    tasks = iter(tasks)
+    first = next(tasks, None)
+    if first is None:
+        return 0, 0
+    h, w = cv2.imread(first[0]).shape[:2]
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter(output_video_path, fourcc, fps, (w, h))
+    gif_frames = []
+    num_frames = 0
+    if max_in_flight < 1:
+        raise ValueError(f"max_in_flight must be >= 1, got {max_in_flight}")
+    slots = threading.Semaphore(max_in_flight)
+    chunksize = max(1, min(4, max_in_flight // num_workers))                                          # imap takes a chunk whole: it must fit in the free slots
+    with Pool(num_workers) as pool:
+        for img, gif_frame in pool.imap(draw_frame, bounded(itertools.chain([first], tasks), slots), chunksize=chunksize):
+            out.write(img)
+            slots.release()
+            num_frames += 1
+            if gif_frame is not None:
+                gif_frames.append(Image.fromarray(gif_frame))
+    out.release()
+
+    if gif_path and gif_frames:
+        gif_frames[0].save(gif_path, save_all=True, append_images=gif_frames[1:],
+                           duration=int(1000 / fps), loop=0)                                          # duration = ms per frame
+    return num_frames, len(gif_frames)
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    img_files = sorted(os.listdir(image_dir))
+    tasks = make_tasks(image_dir, img_files, iter_kitti_labels(gt_file, allowed_classes), iter_predictions(pred_file),
+                       frame_range=frame_range, pred_track_ids=pred_track_ids, gt_track_ids=gt_track_ids,
+                       gif_frames=int(gif_max_seconds * fps) if gif_path else 0, gif_scale=gif_scale)
+    num_frames, num_gif_frames = render(tasks, output_video_path, gif_path, fps, num_workers, max_in_flight)
+
+    print(f" Video saved to: {output_video_path} ({num_frames} frames, {time.perf_counter() - start:.1f}s with {num_workers} workers)")
+    if num_gif_frames:
+        print(f"GIF saved to: {gif_path} ({num_gif_frames} frames)")
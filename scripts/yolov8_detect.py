@@ -2,80 +2,115 @@
 # This piece of code does the following:
 # Performs inference on the kitti frame and give outputs where class ID correspond to YOLO/COCO format.
 # Computes IoU between person & bicycle to classify either pedestrian (keep) or cyclist (discard) based on threshold.
+# (All person x bicycle IoUs of a frame are computed in one batched call, see box_ops.py)
 # Saves all detection (cars, persons only) in BYTETrack format.
 
-from ultralytics import YOLO
+# Batched mode:
+# A thread pool decodes (and prefetches) the next frames while the model runs on the current batch.
+# 'batch_size' frames are sent to one model.predict call, so per-call overhead is paid once per batch.
+# batch_size = 1 is the original frame-by-frame behaviour. Output file format is unchanged.
+# The model runs through a pluggable backend (detector.py): 'torch' (Ultralytics, default), 'onnx' or 'onnx_int8'.
+# Input size follows the frames' aspect ratio (input_long_side, e.g. 224 x 640 for KITTI), tiles > 1 splits every frame into
+# overlapping horizontal tiles merged across tiles (see detector.py, benchmark_resolution.py for picking the setting).
+
 import os
-from PIL import Image
+import time
 import cv2
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from box_ops import cyclist_mask                                                                        # Vectorized person x bicycle IoU
+from detector import load_detector, input_size                                                          # Ultralytics / ONNX Runtime backends
+from class_resolver import CYCLIST_IOU_THRESH                                                           # Shared cyclist threshold
 
-def compute_iou(boxA, boxB):
-    # box: [x1, y1, x2, y2] consider max for 0, 1 and min for 2, 3
-    xA = max(boxA[0], boxB[0])
-    yA = max(boxA[1], boxB[1])
-    xB = min(boxA[2], boxB[2])
-    yB = min(boxA[3], boxB[3])
-
-    interArea = max(0, xB - xA) * max(0, yB - yA)                  
-    if interArea == 0:
-        return 0.0
-
-    boxAArea = (boxA[2] - boxA[0]) * (boxA[3] - boxA[1])                                                # x2-x1 * y2-y1
-    boxBArea = (boxB[2] - boxB[0]) * (boxB[3] - boxB[1])
-    iou = interArea / float(boxAArea + boxBArea - interArea)
-    return iou
-
-# Load YOLOv8 model
-model = YOLO("yolov8s.pt")
-
+# Config
+model_path = "yolov8s.pt"
+backend = "torch"                                                                                       # 'torch', 'onnx' or 'onnx_int8'
+num_threads = None                                                                                      # CPU threads for inference, None = library default
+input_long_side = 640                                                                                   # Model input long side, short side follows the aspect ratio
+tiles = 1                                                                                               # > 1 = overlapping horizontal tiles per frame
+tile_overlap = 0.2                                                                                      # Share of a tile overlapping its neighbour
 input_folder = "/content/drive/MyDrive/kitti_tracking/data_tracking_image_2/training/image_02/0000"
 output_det_file = "/content/filtered_0000.txt"
+conf_thresh = 0.6
+cyclist_iou_thresh = CYCLIST_IOU_THRESH                                                                 # person-bicycle IoU above this = cyclist
+batch_size = 8                                                                                          # Frames per model.predict call (1 = frame-by-frame)
+num_workers = 4                                                                                         # Decode threads used for prefetching
 
 wanted_classes = {'person': 0, 'bicycle': 1, 'car': 2}                                                  # As per COCO labels
 id_to_name = {v: k for k, v in wanted_classes.items()}
 
-results_lines = []
-frame_id = 0
-for filename in sorted(os.listdir(input_folder)):
-    if filename.endswith(".png"):
-        frame_path = os.path.join(input_folder, filename)
-        frame = Image.open(frame_path)
+def list_frames(folder):
+    return [os.path.join(folder, f) for f in sorted(os.listdir(folder)) if f.endswith(".png")]
+
+def load_frame(frame_path):
+    return cv2.imread(frame_path)                                                                       # BGR numpy array (what YOLO expects from OpenCV)
+
+def prefetch_batches(frame_paths, batch_size, num_workers):
+    # Yields lists of decoded frames in order. At most 2 batches are decoding ahead, so memory stays bounded.
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        pending = deque()
+        next_idx = 0
+        while next_idx < len(frame_paths) or pending:
+            while next_idx < len(frame_paths) and len(pending) < 2 * batch_size:
+                pending.append(pool.submit(load_frame, frame_paths[next_idx]))
+                next_idx += 1
+            batch = [pending.popleft().result() for _ in range(min(batch_size, len(pending)))]
+            yield batch
+
+def filter_detections(boxes_data, frame_id, cyclist_iou_thresh):
+    # boxes_data: rows of [x1, y1, x2, y2, conf, cls] for one frame -> BYTETrack format lines
+    persons = []
+    bicycles = []
+    cars = []
 
-        detections = model.predict(source=frame, conf=0.6, verbose=False)[0]
+    for det in boxes_data:
+        x1, y1, x2, y2, conf, cls = det
+        cls = int(cls)
+        if cls == 0:
+            persons.append([x1, y1, x2, y2, conf])
+        elif cls == 1:
+            bicycles.append([x1, y1, x2, y2, conf])
+        elif cls == 2:
+            cars.append([x1, y1, x2, y2, conf])
 
-        persons = []
-        bicycles = []
-        cars = []
+    is_cyclist = cyclist_mask(persons, bicycles, cyclist_iou_thresh)                                    # One bool per person, True if it overlaps any bicycle
 
-        for det in detections.boxes.data:
-            x1, y1, x2, y2, conf, cls = det.tolist()
-            cls = int(cls)
-            if cls == 0:
-                persons.append([x1, y1, x2, y2, conf])
-            elif cls == 1:
-                bicycles.append([x1, y1, x2, y2, conf])
-            elif cls == 2:
-                cars.append([x1, y1, x2, y2, conf])
+    lines = []
+    # Save unmatched persons as pedestrians
+    for i, pi in enumerate(persons):
+        if not is_cyclist[i]:
+            x1, y1, x2, y2, conf = pi
+            lines.append(f"{frame_id},-1,{x1:.2f},{y1:.2f},{x2:.2f},{y2:.2f},{conf:.2f},0\n")         # 0 = person
+    # Save cars
+    for ci in cars:
+        x1, y1, x2, y2, conf = ci
+        lines.append(f"{frame_id},-1,{x1:.2f},{y1:.2f},{x2:.2f},{y2:.2f},{conf:.2f},2\n")             # 2 = car
+    return lines
 
-        matched_person_indices = set()
-        for bi in bicycles:
-            for i, pi in enumerate(persons):                                                               # Example: persons = [p1, p2, p3]  i.e., 3 persons detected, bicycles = [b1]. If b1 overlaps with p2, then: matched_person_indices = {1}
-                iou = compute_iou(bi[:4], pi[:4])
-                if iou > 0.4:                                                                              # Cyclist detected
-                    matched_person_indices.add(i)
+def detect_sequence(detector, frame_paths, conf_thresh, cyclist_iou_thresh, batch_size=8, num_workers=4):
+    # Runs batched YOLO over all frames, returns (BYTETrack lines, frames/sec)
+    results_lines = []
+    frame_id = 0
+    start = time.perf_counter()
+    for frames in prefetch_batches(frame_paths, batch_size, num_workers):
+        detections = detector.predict(frames, conf_thresh)                                              # One call per batch, one (N, 6) array per frame
+        for boxes_data in detections:
+            results_lines.extend(filter_detections(boxes_data, frame_id, cyclist_iou_thresh))
+            frame_id += 1
+    elapsed = time.perf_counter() - start
+    fps = frame_id / elapsed if elapsed > 0 else 0.0
+    return results_lines, fps
 
-        # Save unmatched persons as pedestrians
-        for i, pi in enumerate(persons):
-            if i not in matched_person_indices:
-                x1, y1, x2, y2, conf = pi
-                results_lines.append(f"{frame_id},-1,{x1:.2f},{y1:.2f},{x2:.2f},{y2:.2f},{conf:.2f},0\n")  # 0 = person
-        # Save cars
-        for ci in cars:
-            x1, y1, x2, y2, conf = ci
-            results_lines.append(f"{frame_id},-1,{x1:.2f},{y1:.2f},{x2:.2f},{y2:.2f},{conf:.2f},2\n")      # 2 = car
+if __name__ == "__main__":
+    # Load YOLOv8 model, input size matched to the frames
+    frame_paths = list_frames(input_folder)
+    imgsz = input_size(load_frame(frame_paths[0]).shape[:2], input_long_side, tiles, tile_overlap)
+    detector = load_detector(backend, model_path, num_threads=num_threads, imgsz=imgsz, tiles=tiles, tile_overlap=tile_overlap)
 
-        frame_id += 1
+    results_lines, fps = detect_sequence(detector, frame_paths, conf_thresh, cyclist_iou_thresh,
+                                         batch_size=batch_size, num_workers=num_workers)
+    print(f"Detected {len(frame_paths)} frames at {fps:.1f} frames/sec (backend={backend}, batch_size={batch_size}, workers={num_workers}, imgsz={imgsz}, tiles={tiles})")
 
-# Save filtered detections
-with open(output_det_file, "w") as f:
-    f.writelines(results_lines)
+    # Save filtered detections
+    with open(output_det_file, "w") as f:
+        f.writelines(results_lines)